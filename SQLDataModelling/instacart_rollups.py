@@ -0,0 +1,459 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, inspect, text
+
+# ---------------------------------------------------------
+# CONFIGURATION
+# ---------------------------------------------------------
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instacart_PJ.sql')
+BENCH_URL = 'sqlite:///data/instacart_bench.db'
+RANDOM_SEED = 42
+INSERT_BATCH = 10_000
+# The unindexed correlated subquery of Query 3 is quadratic in orders
+# (~30 s at 20k orders, ~140 s at 40k); above this size it is not timed.
+UNINDEXED_BASELINE_MAX_ORDERS = 20_000
+QUADRATIC_WITHOUT_INDEXES = {'customer_last_order'}
+
+# ---------------------------------------------------------
+# SUPPORTING COMPOSITE INDEXES (base tables)
+# ---------------------------------------------------------
+INDEXES = {
+    'ix_orders_customer_created': ('ORDERS', ['CustomerID', 'CreatedAt', 'OrderID']),
+    'ix_orders_payment': ('ORDERS', ['PaymentID']),
+    'ix_payments_amount': ('PAYMENTS', ['Amount']),
+    'ix_orderitems_order': ('ORDERITEMS', ['OrderID', 'ProductID', 'Quantity']),
+    'ix_orderitems_product': ('ORDERITEMS', ['ProductID', 'Quantity']),
+    'ix_productstore_store': ('PRODUCTSTORE', ['StoreID', 'ProductID']),
+}
+
+# ---------------------------------------------------------
+# SUMMARY ("MATERIALIZED VIEW") TABLES
+# ---------------------------------------------------------
+# Each summary is (DDL, SELECT that produces its rows). The SELECTs take an
+# optional key filter so an incremental refresh recomputes only affected keys.
+SUMMARIES = {
+    # Query 3: every customer with their latest order (NULLs if none yet).
+    # Correlated per customer so both lookups are seeks on
+    # ix_orders_customer_created, for a full build and for a few customers.
+    'MV_CUSTOMER_LAST_ORDER': ('''
+        CREATE TABLE MV_CUSTOMER_LAST_ORDER (
+            CustomerID INT PRIMARY KEY,
+            FirstName VARCHAR(100),
+            LastName VARCHAR(100),
+            OrderID INT,
+            OrderStatus VARCHAR(50),
+            CreatedAt DATETIME,
+            OrderCount INT NOT NULL
+        )''', '''
+        SELECT c.CustomerID, c.FirstName, c.LastName, o.OrderID, o.OrderStatus, o.CreatedAt,
+               (SELECT COUNT(*) FROM ORDERS oc WHERE oc.CustomerID = c.CustomerID)
+        FROM CUSTOMERS c LEFT JOIN ORDERS o ON o.OrderID = (
+            SELECT o2.OrderID FROM ORDERS o2 WHERE o2.CustomerID = c.CustomerID
+            ORDER BY o2.CreatedAt DESC, o2.OrderID DESC LIMIT 1
+        )
+        {where_customers}'''),
+
+    # Query 4: order totals, indexed by Amount so the max is an index lookup
+    'MV_ORDER_TOTALS': ('''
+        CREATE TABLE MV_ORDER_TOTALS (
+            OrderID INT PRIMARY KEY,
+            CustomerID INT NOT NULL,
+            Amount DECIMAL(10, 2),
+            OrderStatus VARCHAR(50),
+            CreatedAt DATETIME
+        )''', '''
+        SELECT o.OrderID, o.CustomerID, p.Amount, o.OrderStatus, o.CreatedAt
+        FROM ORDERS o JOIN PAYMENTS p USING(PaymentID)
+        {where_orders}'''),
+
+    # Query 6: per-product order lines and units sold
+    'MV_PRODUCT_SALES': ('''
+        CREATE TABLE MV_PRODUCT_SALES (
+            ProductID INT PRIMARY KEY,
+            ProductName VARCHAR(255),
+            NumOrderLines INT NOT NULL,
+            TotalUnitsSold INT NOT NULL
+        )''', '''
+        SELECT p.ProductID, p.Name, COUNT(oi.OrderItemID), COALESCE(SUM(oi.Quantity), 0)
+        FROM PRODUCTS p LEFT JOIN ORDERITEMS oi USING(ProductID)
+        {where_products}
+        GROUP BY p.ProductID, p.Name'''),
+
+    # Store rollup: products carried and units sold of those products
+    'MV_STORE_SALES': ('''
+        CREATE TABLE MV_STORE_SALES (
+            StoreID INT PRIMARY KEY,
+            StoreName VARCHAR(100),
+            Location VARCHAR(255),
+            NumProducts INT NOT NULL,
+            TotalUnitsSold INT NOT NULL
+        )''', '''
+        SELECT s.StoreID, s.StoreName, s.Location, COUNT(ps.ProductID), COALESCE(SUM(mv.TotalUnitsSold), 0)
+        FROM STORES s LEFT JOIN PRODUCTSTORE ps USING(StoreID)
+            LEFT JOIN MV_PRODUCT_SALES mv USING(ProductID)
+        {where_stores}
+        GROUP BY s.StoreID, s.StoreName, s.Location'''),
+}
+SUMMARY_INDEXES = {
+    'ix_mv_order_totals_amount': ('MV_ORDER_TOTALS', ['Amount']),
+}
+
+# ---------------------------------------------------------
+# CHANGE LOG (filled by triggers, drained by refresh_summaries)
+# ---------------------------------------------------------
+# Every insert/update/delete on a table the summaries read from records the
+# keys it affects, so refunds, cancellations, re-priced payments and edited
+# order lines are picked up as well as new orders.
+CHANGES_DDL = {
+    'sqlite': "CREATE TABLE MV_CHANGES (ChangeID INTEGER PRIMARY KEY, OrderID INT, CustomerID INT, ProductID INT, StoreID INT)",
+    'default': "CREATE TABLE MV_CHANGES (ChangeID INT AUTO_INCREMENT PRIMARY KEY, OrderID INT, CustomerID INT, ProductID INT, StoreID INT)",
+}
+# (table, event) -> rows of (OrderID, CustomerID, ProductID, StoreID) to log
+CHANGE_TRIGGERS = {
+    ('ORDERS', 'INSERT'): ["VALUES (NEW.OrderID, NEW.CustomerID, NULL, NULL)"],
+    ('ORDERS', 'UPDATE'): ["VALUES (OLD.OrderID, OLD.CustomerID, NULL, NULL)",
+                           "VALUES (NEW.OrderID, NEW.CustomerID, NULL, NULL)"],
+    ('ORDERS', 'DELETE'): ["VALUES (OLD.OrderID, OLD.CustomerID, NULL, NULL)"],
+    ('PAYMENTS', 'INSERT'): ["SELECT OrderID, CustomerID, NULL, NULL FROM ORDERS WHERE PaymentID = NEW.PaymentID"],
+    ('PAYMENTS', 'UPDATE'): ["SELECT OrderID, CustomerID, NULL, NULL FROM ORDERS WHERE PaymentID IN (OLD.PaymentID, NEW.PaymentID)"],
+    ('PAYMENTS', 'DELETE'): ["SELECT OrderID, CustomerID, NULL, NULL FROM ORDERS WHERE PaymentID = OLD.PaymentID"],
+    ('ORDERITEMS', 'INSERT'): ["VALUES (NULL, NULL, NEW.ProductID, NULL)"],
+    ('ORDERITEMS', 'UPDATE'): ["VALUES (NULL, NULL, OLD.ProductID, NULL)", "VALUES (NULL, NULL, NEW.ProductID, NULL)"],
+    ('ORDERITEMS', 'DELETE'): ["VALUES (NULL, NULL, OLD.ProductID, NULL)"],
+    ('PRODUCTSTORE', 'INSERT'): ["VALUES (NULL, NULL, NULL, NEW.StoreID)"],
+    ('PRODUCTSTORE', 'UPDATE'): ["VALUES (NULL, NULL, NULL, OLD.StoreID)", "VALUES (NULL, NULL, NULL, NEW.StoreID)"],
+    ('PRODUCTSTORE', 'DELETE'): ["VALUES (NULL, NULL, NULL, OLD.StoreID)"],
+    ('CUSTOMERS', 'INSERT'): ["VALUES (NULL, NEW.CustomerID, NULL, NULL)"],
+    ('CUSTOMERS', 'UPDATE'): ["VALUES (NULL, OLD.CustomerID, NULL, NULL)", "VALUES (NULL, NEW.CustomerID, NULL, NULL)"],
+    ('CUSTOMERS', 'DELETE'): ["VALUES (NULL, OLD.CustomerID, NULL, NULL)"],
+    ('PRODUCTS', 'INSERT'): ["VALUES (NULL, NULL, NEW.ProductID, NULL)"],
+    ('PRODUCTS', 'UPDATE'): ["VALUES (NULL, NULL, OLD.ProductID, NULL)", "VALUES (NULL, NULL, NEW.ProductID, NULL)"],
+    ('PRODUCTS', 'DELETE'): ["VALUES (NULL, NULL, OLD.ProductID, NULL)"],
+    ('STORES', 'INSERT'): ["VALUES (NULL, NULL, NULL, NEW.StoreID)"],
+    ('STORES', 'UPDATE'): ["VALUES (NULL, NULL, NULL, OLD.StoreID)", "VALUES (NULL, NULL, NULL, NEW.StoreID)"],
+    ('STORES', 'DELETE'): ["VALUES (NULL, NULL, NULL, OLD.StoreID)"],
+}
+
+# ---------------------------------------------------------
+# QUERIES FOR THE BENCHMARK (original vs. summary-backed)
+# ---------------------------------------------------------
+BENCH_QUERIES = {
+    'customer_last_order': (
+        '''SELECT c.CustomerID, c.FirstName, c.LastName, o.OrderID, o.OrderStatus, o.CreatedAt
+           FROM CUSTOMERS c LEFT JOIN ORDERS o USING(CustomerID)
+           WHERE o.CreatedAt = ( SELECT MAX(o2.CreatedAt) FROM ORDERS o2
+                                 WHERE o2.CustomerID = c.CustomerID )
+           ORDER BY c.CustomerID''',
+        '''SELECT CustomerID, FirstName, LastName, OrderID, OrderStatus, CreatedAt
+           FROM MV_CUSTOMER_LAST_ORDER WHERE OrderID IS NOT NULL
+           ORDER BY CustomerID'''),
+    'highest_total_order': (
+        '''SELECT o.OrderID, o.CustomerID, p.Amount, o.OrderStatus
+           FROM ORDERS o JOIN PAYMENTS p USING(PaymentID)
+           WHERE p.Amount = ( SELECT MAX(Amount) FROM PAYMENTS)
+           ORDER BY o.OrderID''',
+        '''SELECT OrderID, CustomerID, Amount, OrderStatus
+           FROM MV_ORDER_TOTALS
+           WHERE Amount = ( SELECT MAX(Amount) FROM MV_ORDER_TOTALS)
+           ORDER BY OrderID'''),
+    'product_sales': (
+        '''SELECT p.ProductID, p.Name AS ProductName,
+                  COUNT(oi.OrderItemID) AS NumOrderLines, SUM(oi.Quantity) AS TotalUnitsSold
+           FROM PRODUCTS p LEFT JOIN ORDERITEMS oi USING(ProductID)
+           GROUP BY p.ProductID, p.Name
+           ORDER BY p.ProductID''',
+        '''SELECT ProductID, ProductName, NumOrderLines, TotalUnitsSold
+           FROM MV_PRODUCT_SALES ORDER BY ProductID'''),
+}
+
+def _create_missing_indexes(conn, indexes: dict):
+    """
+    Creates each index unless it already exists (MySQL has no CREATE INDEX IF NOT EXISTS).
+    """
+    inspector = inspect(conn)
+    for name, (table, columns) in indexes.items():
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+
+def create_indexes(engine):
+    """
+    Adds the composite indexes that back the summary refresh and the original queries.
+    """
+    with engine.begin() as conn:
+        _create_missing_indexes(conn, INDEXES)
+    print(f"✅ Ensured {len(INDEXES)} composite indexes on base tables.")
+
+def _render(select_sql: str, **filters) -> str:
+    placeholders = ('where_orders', 'where_customers', 'where_products', 'where_stores')
+    return select_sql.format(**{p: filters.get(p, '') for p in placeholders})
+
+def _trigger_name(table: str, event: str) -> str:
+    return f"trg_mv_{table.lower()}_{event.lower()}"
+
+def _create_change_log(conn):
+    """
+    (Re)creates an empty MV_CHANGES table and the triggers that fill it.
+    The trigger syntax (AFTER ... FOR EACH ROW BEGIN ...; END) is accepted
+    by both MySQL and SQLite.
+    """
+    for table, event in CHANGE_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {_trigger_name(table, event)}"))
+    if 'MV_CHANGES' in set(inspect(conn).get_table_names()):
+        conn.execute(text("DROP TABLE MV_CHANGES"))
+    conn.execute(text(CHANGES_DDL.get(conn.dialect.name, CHANGES_DDL['default'])))
+    for (table, event), rows in CHANGE_TRIGGERS.items():
+        body = ' '.join(
+            f"INSERT INTO MV_CHANGES (OrderID, CustomerID, ProductID, StoreID) {row};" for row in rows
+        )
+        conn.execute(text(
+            f"CREATE TRIGGER {_trigger_name(table, event)} AFTER {event} ON {table} "
+            f"FOR EACH ROW BEGIN {body} END"
+        ))
+
+def build_summaries(engine):
+    """
+    (Re)builds every summary table from scratch and starts an empty change log.
+    The base-table indexes are ensured first; the builds rely on them.
+    """
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        _create_missing_indexes(conn, INDEXES)
+        existing = set(inspect(conn).get_table_names())
+        for name in list(SUMMARIES) + ['MV_REFRESH_STATE']:  # MV_REFRESH_STATE: the old OrderID watermark
+            if name in existing:
+                conn.execute(text(f"DROP TABLE {name}"))
+        _create_change_log(conn)
+        for name, (ddl, select_sql) in SUMMARIES.items():
+            conn.execute(text(ddl))
+            conn.execute(text(f"INSERT INTO {name} {_render(select_sql)}"))
+        _create_missing_indexes(conn, SUMMARY_INDEXES)
+    print(f"✅ Built {len(SUMMARIES)} summary tables in {time.perf_counter() - start:.2f}s")
+
+def refresh_summaries(engine) -> int:
+    """
+    Folds the logged changes into the summaries: new, updated (e.g. refunded
+    or cancelled) and deleted orders, payment amounts, order lines, product
+    listings and dimension rows. Only the affected orders, customers,
+    products and stores are recomputed (delete + re-insert of their rows),
+    and the processed log entries are removed in the same transaction.
+    Returns the number of log entries processed.
+
+    Run it from a single scheduler: entries are drained up to the highest
+    ChangeID seen when the refresh starts.
+    """
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        newest = conn.execute(text("SELECT MAX(ChangeID) FROM MV_CHANGES")).scalar()
+        if newest is None:
+            print("Summaries are up to date.")
+            return 0
+        n_changes = conn.execute(text(f"SELECT COUNT(*) FROM MV_CHANGES WHERE ChangeID <= {int(newest)}")).scalar()
+
+        pending = f"FROM MV_CHANGES WHERE ChangeID <= {int(newest)}"
+        orders = f"SELECT OrderID {pending} AND OrderID IS NOT NULL"
+        customers = f"SELECT CustomerID {pending} AND CustomerID IS NOT NULL"
+        products = f"SELECT ProductID {pending} AND ProductID IS NOT NULL"
+        stores = (f"SELECT StoreID FROM PRODUCTSTORE WHERE ProductID IN ({products}) "
+                  f"UNION SELECT StoreID {pending} AND StoreID IS NOT NULL")
+
+        steps = [
+            ('MV_CUSTOMER_LAST_ORDER', 'CustomerID', customers, {
+                'where_customers': f"WHERE c.CustomerID IN ({customers})",
+            }),
+            ('MV_ORDER_TOTALS', 'OrderID', orders, {
+                'where_orders': f"WHERE o.OrderID IN ({orders})",
+            }),
+            ('MV_PRODUCT_SALES', 'ProductID', products, {
+                'where_products': f"WHERE p.ProductID IN ({products})",
+            }),
+            # Runs after MV_PRODUCT_SALES so it rolls up the refreshed product rows
+            ('MV_STORE_SALES', 'StoreID', stores, {
+                'where_stores': f"WHERE s.StoreID IN ({stores})",
+            }),
+        ]
+        for name, key, affected, filters in steps:
+            conn.execute(text(f"DELETE FROM {name} WHERE {key} IN ({affected})"))
+            conn.execute(text(f"INSERT INTO {name} {_render(SUMMARIES[name][1], **filters)}"))
+
+        conn.execute(text(f"DELETE FROM MV_CHANGES WHERE ChangeID <= {int(newest)}"))
+    print(f"✅ Refreshed summaries from {n_changes} logged changes in {time.perf_counter() - start:.2f}s")
+    return n_changes
+
+# ---------------------------------------------------------
+# SYNTHETIC DATA + BENCHMARK
+# ---------------------------------------------------------
+def create_schema(engine):
+    """
+    Creates the normalized schema from instacart_PJ.sql (CREATE TABLE statements only).
+    """
+    with open(SCHEMA_FILE) as f:
+        statements = re.findall(r"CREATE TABLE .*?\);", f.read(), flags=re.S)
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        for statement in statements:
+            table = statement.split()[2]
+            if table not in existing:
+                conn.execute(text(statement))
+
+def _insert_rows(conn, table: str, columns: list, rows):
+    stmt = text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})")
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(columns, row)))
+        if len(batch) >= INSERT_BATCH:
+            conn.execute(stmt, batch)
+            batch = []
+    if batch:
+        conn.execute(stmt, batch)
+
+def generate_data(engine, n_customers: int, n_orders: int, n_products: int = 2_000,
+                  n_stores: int = 50, items_per_order: int = 4, order_id_offset: int = 0):
+    """
+    Populates the schema with seeded synthetic rows. With order_id_offset > 0
+    only new orders (and their payments, deliveries and items) are appended,
+    which simulates a day of new activity for refresh_summaries().
+    (Rows written after build_summaries() also fill the change log.)
+    """
+    rng = random.Random(RANDOM_SEED + order_id_offset)
+    start_time = datetime(2024, 1, 1)
+    statuses = ['Delivered', 'Pending', 'Cancelled', 'Refunded']
+
+    with engine.begin() as conn:
+        if order_id_offset == 0:
+            _insert_rows(conn, 'ADDRESSES', ['AddressID', 'City', 'State', 'Country'],
+                         ((i, f"City{i % 100}", 'AZ', 'USA') for i in range(1, n_stores + 1)))
+            _insert_rows(conn, 'CUSTOMERS', ['CustomerID', 'FirstName', 'LastName', 'CustomerEmail'],
+                         ((i, f"First{i}", f"Last{i}", f"customer{i}@example.com") for i in range(1, n_customers + 1)))
+            _insert_rows(conn, 'CATEGORIES', ['CategoryID', 'CategoryName'],
+                         ((i, f"Category{i}") for i in range(1, 21)))
+            _insert_rows(conn, 'STORES', ['StoreID', 'StoreName', 'Location', 'AddressID'],
+                         ((i, f"Store{i}", f"City{i % 100}", i) for i in range(1, n_stores + 1)))
+            _insert_rows(conn, 'PRODUCTS', ['ProductID', 'Name', 'Price', 'CategoryID'],
+                         ((i, f"Product{i}", round(rng.uniform(1, 50), 2), rng.randint(1, 20))
+                          for i in range(1, n_products + 1)))
+            _insert_rows(conn, 'PRODUCTSTORE', ['ProductID', 'StoreID'],
+                         ((p, s) for p in range(1, n_products + 1)
+                          for s in rng.sample(range(1, n_stores + 1), min(3, n_stores))))
+
+        order_ids = range(order_id_offset + 1, order_id_offset + n_orders + 1)
+        _insert_rows(conn, 'PAYMENTS', ['PaymentID', 'Amount', 'Currency', 'OrderID'],
+                     ((o, round(rng.uniform(5, 500), 2), 'USD', o) for o in order_ids))
+        _insert_rows(conn, 'DELIVERIES', ['DeliveryID', 'Delivery_Status', 'AddressID', 'OrderID'],
+                     ((o, 'Delivered', rng.randint(1, n_stores), o) for o in order_ids))
+        _insert_rows(conn, 'ORDERS', ['OrderID', 'OrderStatus', 'CreatedAt', 'PaymentID', 'DeliveryID', 'CustomerID'],
+                     ((o, rng.choice(statuses),
+                       (start_time + timedelta(minutes=o)).strftime('%Y-%m-%d %H:%M:%S'),
+                       o, o, rng.randint(1, n_customers)) for o in order_ids))
+        _insert_rows(conn, 'ORDERITEMS', ['OrderItemID', 'OrderID', 'ProductID', 'Quantity'],
+                     (((o - 1) * items_per_order + k + 1, o, rng.randint(1, n_products), rng.randint(1, 5))
+                      for o in order_ids for k in range(items_per_order)))
+
+def _time_query(engine, sql: str, repeats: int) -> float:
+    """
+    Returns the best-of-`repeats` wall time in milliseconds, fetching all rows.
+    """
+    best = float('inf')
+    with engine.connect() as conn:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(text(sql)).fetchall()
+            best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+def run_benchmark(url: str = BENCH_URL, n_customers: int = 10_000, n_orders: int = 100_000,
+                  n_new_orders: int = 2_000, repeats: int = 3,
+                  unindexed_max_orders: int = UNINDEXED_BASELINE_MAX_ORDERS) -> dict:
+    """
+    Generates a large local dataset and reports query latency for the
+    original queries without indexes, with the composite indexes, and
+    against the summary tables, plus build and incremental refresh times.
+    Quadratic unindexed baselines are skipped (reported as None) above
+    `unindexed_max_orders` orders.
+    """
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+    engine = create_engine(url)
+
+    print(f"Generating {n_customers} customers and {n_orders} orders...")
+    create_schema(engine)
+    generate_data(engine, n_customers, n_orders)
+
+    report = {name: {} for name in BENCH_QUERIES}
+    for name, (original, _) in BENCH_QUERIES.items():
+        if name in QUADRATIC_WITHOUT_INDEXES and n_orders > unindexed_max_orders:
+            print(f"Skipping unindexed {name} ({n_orders} > {unindexed_max_orders} orders).")
+            report[name]['original_ms'] = None
+            continue
+        report[name]['original_ms'] = _time_query(engine, original, repeats)
+
+    create_indexes(engine)
+    for name, (original, _) in BENCH_QUERIES.items():
+        report[name]['original_indexed_ms'] = _time_query(engine, original, repeats)
+
+    start = time.perf_counter()
+    build_summaries(engine)
+    build_seconds = time.perf_counter() - start
+    for name, (_, summary) in BENCH_QUERIES.items():
+        report[name]['summary_ms'] = _time_query(engine, summary, repeats)
+
+    generate_data(engine, n_customers, n_new_orders, order_id_offset=n_orders)
+    n_refunds = max(1, n_new_orders // 10)
+    with engine.begin() as conn:  # Late refunds of existing orders
+        conn.execute(text(f"UPDATE ORDERS SET OrderStatus = 'Refunded' WHERE OrderID % {n_orders // n_refunds or 1} = 0"))
+    start = time.perf_counter()
+    refresh_summaries(engine)
+    report['_maintenance'] = {
+        'full_build_s': build_seconds,
+        'incremental_refresh_s': time.perf_counter() - start,
+        'new_orders': n_new_orders,
+        'refunded_orders': n_refunds,
+    }
+
+    print(f"\n{'Query':<22}{'original':>12}{'+indexes':>12}{'summary':>12}  (ms, best of {repeats})")
+    for name in BENCH_QUERIES:
+        r = report[name]
+        original = f"{r['original_ms']:>12.1f}" if r['original_ms'] is not None else f"{'skipped':>12}"
+        print(f"{name:<22}{original}{r['original_indexed_ms']:>12.1f}{r['summary_ms']:>12.1f}")
+    m = report['_maintenance']
+    print(f"Full build: {m['full_build_s']:.2f}s | Incremental refresh ({n_new_orders} new, "
+          f"~{n_refunds} refunded orders): {m['incremental_refresh_s']:.2f}s")
+    return report
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build/refresh Instacart summary tables or benchmark them.")
+    parser.add_argument('command', choices=['build', 'refresh', 'benchmark'])
+    parser.add_argument('--url', default=BENCH_URL, help="SQLAlchemy URL of the instacart database.")
+    parser.add_argument('--customers', type=int, default=10_000)
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--new-orders', type=int, default=2_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--unindexed-max-orders', type=int, default=UNINDEXED_BASELINE_MAX_ORDERS,
+                        help="Skip the quadratic unindexed baseline above this many orders.")
+    parser.add_argument('--output', default=None, help="Optional JSON file for benchmark results.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.command == 'benchmark':
+        results = run_benchmark(args.url, args.customers, args.orders, args.new_orders,
+                                args.repeats, args.unindexed_max_orders)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+    else:
+        engine = create_engine(args.url)
+        create_indexes(engine)
+        if args.command == 'build':
+            build_summaries(engine)
+        else:
+            refresh_summaries(engine)
@@ -5,52 +5,62 @@ import os
 import joblib # Often used for saving scikit-learn pipelines
 import glob
 from pathlib import Path
+from inference import INPUT_FEATURES, score_frame
+from instrumentation import TIMINGS, profiled, stage
+from predcache import PredictionCache
+from registry import load_model, resolve_model
 
 # --- Configuration ---
 MLFLOW_EXPERIMENT_NAME = "Disease_Risk_Classification_SMOTE"
-TARGET_MODEL_NAME = "Logistic Regression" 
 # The model artifact is stored inside a 'model' directory in the MLflow run folder.
 ARTIFACT_PATH = "models" 
 MODEL_FILENAME = "model.pkl" # Common filename for joblib-saved models in MLflow
-
-# Define the features that require user input, based on your notebook's setup
-# The order is crucial as the pipeline expects features in this order.
-INPUT_FEATURES = [
-    'age', 'bmi', 'daily_steps', 'sleep_hours', 'water_intake_l', 
-    'calories_consumed', 'resting_hr', 'systolic_bp', 'diastolic_bp', 
-    'cholesterol', 'family_history', 'smoker', 'alcohol', 'gender'
-]
+PROFILE_REQUESTS = os.environ.get("APP_PROFILE") == "1" # cProfile each prediction into data/profiles
 
 @st.cache_resource
 def load_model_from_file():
     """
-    Loads the model using joblib from the file path found.
+    Resolves the best logged model (by Recall) from the local MLflow store,
+    loads it with memory-mapped arrays and pre-warms it with a dummy
+    inference. Returns (model, info); model is None if loading failed.
     """
-    model_path = "mlruns/1/models/m-3e191b86b3b74c17bd4ac66aedefda4d/artifacts/model.pkl"
-    
-    if model_path:
-        try:
-            # Using joblib.load for scikit-learn/ImbPipeline models
-            model = joblib.load(model_path)
-            return model
-        except Exception as e:
-            st.error(f"Error loading pipeline file from disk (`joblib.load`): {e}")
-            return None
-    return None
+    try:
+        with stage('load_model'):
+            return load_model()
+    except Exception as e:
+        st.error(f"Error loading pipeline file from disk (`joblib.load`): {e}")
+        return None, {}
+
+@st.cache_resource
+def get_prediction_cache(model_path: str = None, metric: str = None, strategy: str = None):
+    """
+    One prediction cache shared across sessions, so resubmitted forms are
+    answered without rerunning the pipeline. With a metric and strategy the
+    cache re-resolves the model through the MLflow registry, so a newly
+    logged better model invalidates it (and triggers a reload) without a
+    restart; otherwise it watches the fixed model_path.
+    """
+    if metric:
+        return PredictionCache(resolve_path=lambda: resolve_model(metric=metric, strategy=strategy)['model_path'])
+    return PredictionCache(model_path=model_path)
 
 # --- Prediction Function (Unchanged) ---
 
-def make_prediction(model, input_data: pd.DataFrame):
+def make_prediction(model, input_data: pd.DataFrame, cache: PredictionCache = None):
     """
     Makes a prediction and returns the result.
     """
     try:
         # The loaded model is the imblearn pipeline, which handles
         # preprocessing (scaling/encoding) internally.
-        prediction = model.predict(input_data)[0]
-        # Get probability for risk score visualization
-        probability = model.predict_proba(input_data)[0][1] 
-        return prediction, probability
+        # Label and risk probability come from a single predict_proba pass,
+        # or from the cache for a form that was already scored.
+        with stage('predict'), profiled('app_predict', enabled=PROFILE_REQUESTS, log_to_mlflow=False):
+            if cache is not None:
+                predictions, probabilities = cache.score_frame(model, input_data)
+            else:
+                predictions, probabilities = score_frame(model, input_data)
+        return predictions[0], probabilities[0]
     except Exception as e:
         st.error(f"Prediction error: {e}")
         return None, None
@@ -63,16 +73,41 @@ def main():
     st.markdown("Use the input fields below to assess the patient's likelihood of **Disease Risk** (1) based on their lifestyle and health metrics.")
     
     # Load the model once and cache it
-    model = load_model_from_file()
+    model, model_info = load_model_from_file()
     if model is None:
         st.warning("Prediction functionality is disabled until a model is successfully loaded.")
         return
 
+    if model_info.get('model_id'):
+        cache = get_prediction_cache(metric=model_info['metric'], strategy=model_info['strategy'])
+    else:
+        cache = get_prediction_cache(model_info.get('model_path'))
+    if cache.check_version() or cache.model_path != model_info.get('model_path'):
+        # The registry now selects another model or the artifact was replaced
+        # on disk: reload it along with the cleared cache.
+        load_model_from_file.clear()
+        model, model_info = load_model_from_file()
+        if model is None:
+            return
+
     # --- Sidebar for Model Info (Updated) ---
     st.sidebar.header("Model Details")
-    st.sidebar.markdown(f"**Model Type:** `{TARGET_MODEL_NAME}`")
-    st.sidebar.markdown("This model was loaded directly from the local MLflow artifact file (`mlruns` folder) using `joblib`.")
-    st.sidebar.markdown("It was selected for its high **Recall** (sensitivity) score, minimizing false negatives.")
+    st.sidebar.markdown(f"**Model Type:** `{model_info.get('run_name') or 'unknown'}`")
+    if model_info.get('model_id'):
+        st.sidebar.markdown(f"**Model ID:** `{model_info['model_id']}`")
+        metric_value = model_info.get('metric_value')
+        score = f" = {metric_value:.3f}" if metric_value is not None and metric_value == metric_value else ""
+        st.sidebar.markdown(
+            f"Resolved from the local MLflow store (`{model_info['strategy']}` by `{model_info['metric']}`{score})"
+            f" and loaded from `{model_info['load_path']}`."
+        )
+    else:
+        st.sidebar.markdown(f"No logged model was found; loaded the fallback file `{model_info['load_path']}`.")
+    st.sidebar.markdown(f"**Time to first prediction:** {model_info['time_to_first_prediction_s'] * 1000:.0f} ms")
+    cache_stats = cache.stats()
+    st.sidebar.markdown(f"**Prediction cache:** {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    with st.sidebar.expander("Performance"):
+        st.text(TIMINGS.summary())
 
     # --- Input Form ---
     with st.form("risk_assessment_form"):
@@ -118,7 +153,7 @@ def main():
         ]], columns=INPUT_FEATURES)
 
         # 2. Make Prediction
-        prediction, probability = make_prediction(model, input_data)
+        prediction, probability = make_prediction(model, input_data, cache)
 
         if prediction is not None:
             # 3. Display Results
@@ -0,0 +1,159 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from inference import MODEL_PATH, INPUT_FEATURES, load_pipeline, score_frame
+from predcache import PredictionCache
+
+# --- Configuration ---
+CHUNK_SIZE = 100_000
+ID_COLUMN = 'id'
+
+# Per-process model handle, set once by the pool initializer so the pipeline
+# is unpickled a single time per worker instead of once per chunk.
+_WORKER_MODEL = None
+_WORKER_CACHE = None
+
+def iter_chunks(input_path: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Yields the input file as DataFrames of at most `chunk_size` rows.
+    Supports CSV and Parquet; only the feature and id columns are read.
+    """
+    if input_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        available = set(parquet_file.schema_arrow.names)
+        columns = [c for c in [ID_COLUMN] + INPUT_FEATURES if c in available]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        columns = lambda c: c == ID_COLUMN or c in INPUT_FEATURES
+        yield from pd.read_csv(input_path, chunksize=chunk_size, usecols=columns)
+
+class ResultWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file as they arrive.
+    """
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, chunk: pd.DataFrame):
+        if self.output_path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(
+                self.output_path, mode='a' if self._wrote_header else 'w',
+                header=not self._wrote_header, index=False
+            )
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def _score_chunk(model, chunk: pd.DataFrame, cache: PredictionCache = None) -> pd.DataFrame:
+    """
+    Scores one chunk and returns the id (if present), label and probability.
+    With a cache, repeated patient rows skip the pipeline.
+    """
+    if cache is not None:
+        predictions, probabilities = cache.score_frame(model, chunk)
+    else:
+        predictions, probabilities = score_frame(model, chunk)
+    result = pd.DataFrame({'prediction': predictions, 'probability': probabilities})
+    if ID_COLUMN in chunk.columns:
+        result.insert(0, ID_COLUMN, chunk[ID_COLUMN].to_numpy())
+    return result
+
+def _make_cache(model_path: str, cache_size: int):
+    return PredictionCache(model_path=model_path, max_entries=cache_size) if cache_size else None
+
+def _init_worker(model_path: str, cache_size: int = 0):
+    global _WORKER_MODEL, _WORKER_CACHE
+    # One BLAS/OpenMP thread per process; the pool itself provides the parallelism.
+    threadpool_limits(1)
+    _WORKER_MODEL = load_pipeline(model_path)
+    _WORKER_CACHE = _make_cache(model_path, cache_size)
+
+def _score_chunk_in_worker(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _score_chunk(_WORKER_MODEL, chunk, _WORKER_CACHE)
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str = MODEL_PATH,
+    chunk_size: int = CHUNK_SIZE,
+    n_jobs: int = -1,
+    cache_size: int = 0
+) -> int:
+    """
+    Streams `input_path` through the pipeline in fixed-size chunks and writes
+    predictions to `output_path` in input order. Memory stays bounded by
+    roughly 2 * n_jobs chunks in flight. Returns the number of rows scored.
+
+    cache_size: if > 0, each worker keeps a PredictionCache of this many
+        entries, so files with many repeated patient rows score them once.
+    """
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    writer = ResultWriter(output_path)
+    n_rows = 0
+    start = time.perf_counter()
+    try:
+        if n_jobs == 1:
+            model = load_pipeline(model_path)
+            cache = _make_cache(model_path, cache_size)
+            for chunk in iter_chunks(input_path, chunk_size):
+                writer.write(_score_chunk(model, chunk, cache))
+                n_rows += len(chunk)
+        else:
+            max_in_flight = 2 * n_jobs
+            pending = deque()
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_worker, initargs=(model_path, cache_size)
+            ) as executor:
+                for chunk in iter_chunks(input_path, chunk_size):
+                    pending.append(executor.submit(_score_chunk_in_worker, chunk))
+                    if len(pending) >= max_in_flight:
+                        result = pending.popleft().result()
+                        writer.write(result)
+                        n_rows += len(result)
+                while pending:
+                    result = pending.popleft().result()
+                    writer.write(result)
+                    n_rows += len(result)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_rows} rows in {elapsed:.2f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) -> {output_path}")
+    return n_rows
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch-score a CSV/Parquet file of patients.")
+    parser.add_argument('input_path', help="CSV or Parquet file with the model input features.")
+    parser.add_argument('output_path', help="Destination CSV or Parquet file for predictions.")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the joblib/pickle pipeline.")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per chunk.")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Worker processes (-1 = all cores).")
+    parser.add_argument('--cache-size', type=int, default=0, help="Per-worker prediction cache entries (0 = off).")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    score_file(args.input_path, args.output_path, args.model, args.chunk_size, args.n_jobs, args.cache_size)
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataloader import load_data, split_data
+from inference import score_frame
+from instrumentation import current_rss_mb, peak_rss_mb, reset_peak_rss
+from mlpipeline import create_pipeline, create_preprocessor, get_models, RANDOM_STATE
+from synthdata import write_dataset
+
+# --- Configuration ---
+BENCHMARK_DIR = 'data/benchmarks'
+TARGET_COLUMN = 'disease_risk'
+MLFLOW_EXPERIMENT_NAME = "Performance_Benchmarks"
+DEFAULT_ROWS = 1_000_000
+# Training rows per model fit. Kernel SVC is quadratic in the row count and
+# is capped far lower than the others; None fits on the whole training split.
+FIT_ROWS = {"SVC": 20_000, "Nystroem SVM": 200_000, "Random Forest": 200_000}
+BATCH_SIZES = [1_000, 10_000, 100_000]
+SINGLE_ROW_REPEATS = 200
+REGRESSION_TOLERANCE = 0.20 # Flag stages more than 20% slower than the baseline
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def measure(func, *args, **kwargs):
+    """
+    Runs func once and returns (result, {"seconds", "peak_rss_mb", "rss_delta_mb"}).
+    The call is timed without tracing (tracemalloc would slow allocation-heavy
+    stages down). Memory comes from RSS, which also covers native allocations:
+    peak_rss_mb is the process peak during the call (the kernel counter is
+    reset first; elsewhere it is the peak so far, an upper bound) and
+    rss_delta_mb is the memory still held afterwards.
+    """
+    rss_before = current_rss_mb()
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    return result, {"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "rss_delta_mb": current_rss_mb() - rss_before}
+
+def _latency_ms(func, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings = np.asarray(timings)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean()),
+    }
+
+def run_benchmark(
+    n_rows: int = DEFAULT_ROWS,
+    data_file: str = None,
+    model_names: list = None,
+    random_state: int = RANDOM_STATE
+) -> dict:
+    """
+    Times the pipeline stages on a synthetic dataset of n_rows (generated once
+    and reused via data_file): load_data, split_data, each model's
+    pipeline.fit, single-row and batch prediction latency, and peak memory.
+    Returns a JSON-serializable result dict.
+    """
+    data_file = data_file or os.path.join(BENCHMARK_DIR, f"synthetic_{n_rows}_{random_state}.csv")
+    if not os.path.exists(data_file):
+        write_dataset(n_rows, data_file, random_state)
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "n_rows": n_rows,
+        "data_file": data_file,
+        "stages": {},
+    }
+    stages = results["stages"]
+
+    df, stages["load_data"] = measure(load_data, data_file)
+    print(f"load_data: {stages['load_data']['seconds']:.2f}s ({len(df):,} rows)")
+    (X_train, X_test, y_train, y_test), stages["split_data"] = measure(split_data, df, TARGET_COLUMN)
+    print(f"split_data: {stages['split_data']['seconds']:.2f}s")
+    del df
+
+    models = get_models()
+    for name in model_names or list(models):
+        n_fit = min(FIT_ROWS.get(name) or len(X_train), len(X_train))
+        X_fit, y_fit = X_train.iloc[:n_fit], y_train.iloc[:n_fit]
+        pipeline = create_pipeline(name, models[name], create_preprocessor())
+        _, fit_stats = measure(pipeline.fit, X_fit, y_fit)
+        stage = {"fit_rows": n_fit, "fit_seconds": fit_stats["seconds"], "fit_peak_rss_mb": fit_stats["peak_rss_mb"]}
+
+        single_row = X_test.iloc[:1]
+        score_frame(pipeline, single_row)  # warm-up
+        for key, value in _latency_ms(lambda: score_frame(pipeline, single_row), SINGLE_ROW_REPEATS).items():
+            stage[f"single_row_{key}"] = value
+        for batch_size in BATCH_SIZES:
+            batch = X_test.iloc[:batch_size]
+            _, batch_stats = measure(score_frame, pipeline, batch)
+            stage[f"batch_{len(batch)}_seconds"] = batch_stats["seconds"]
+            stage[f"batch_{len(batch)}_rows_per_second"] = len(batch) / max(batch_stats["seconds"], 1e-9)
+
+        stages[name] = stage
+        print(f"{name}: fit {stage['fit_seconds']:.2f}s on {n_fit:,} rows, "
+              f"single-row p50 {stage['single_row_p50_ms']:.2f}ms")
+
+    # measure() resets the peak counter per stage, so the run's peak is the largest stage peak
+    stage_peaks = [v for values in stages.values() for k, v in values.items() if k.endswith('peak_rss_mb')]
+    results["peak_rss_mb"] = max(stage_peaks + [peak_rss_mb()])
+    print(f"Peak RSS: {results['peak_rss_mb']:.0f} MB")
+    return results
+
+def flatten_metrics(results: dict) -> dict:
+    """
+    Flattens the stage results into MLflow-safe metric names, e.g.
+    'xgboost.fit_seconds' or 'load_data.peak_rss_mb'.
+    """
+    metrics = {"peak_rss_mb": results["peak_rss_mb"]}
+    for stage, values in results["stages"].items():
+        prefix = stage.lower().replace(' ', '_')
+        metrics.update({f"{prefix}.{key}": value for key, value in values.items()})
+    return metrics
+
+def log_to_mlflow(results: dict):
+    import mlflow
+
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+    with mlflow.start_run(run_name=f"benchmark_{results['n_rows']}_{results['commit']}"):
+        mlflow.log_params({k: results[k] for k in ("commit", "n_rows", "python", "cpu_count")})
+        mlflow.log_metrics(flatten_metrics(results))
+        mlflow.log_dict(results, "benchmark.json")
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE) -> pd.DataFrame:
+    """
+    Compares time/memory metrics against a baseline result file and returns
+    the metrics that got worse by more than `tolerance` (relative).
+    Throughput metrics (rows_per_second) regress when they drop instead.
+    """
+    current, previous = flatten_metrics(results), flatten_metrics(baseline)
+    rows = []
+    for metric, value in current.items():
+        # Retained RSS can be ~0 or negative, so its relative change is noise
+        if metric not in previous or not previous[metric] or metric.endswith(('fit_rows', 'rss_delta_mb')):
+            continue
+        change = value / previous[metric] - 1
+        if metric.endswith('rows_per_second'):
+            change = -change
+        rows.append({"Metric": metric, "Baseline": previous[metric], "Current": value, "Change": change})
+    comparison = pd.DataFrame(rows, columns=["Metric", "Baseline", "Current", "Change"]).set_index("Metric")
+    return comparison[comparison["Change"] > tolerance]
+
+def check_baseline(results: dict, baseline_path: str, tolerance: float = REGRESSION_TOLERANCE) -> int:
+    """
+    Compares results against a baseline JSON file and returns the process
+    exit code: 1 if any metric regressed by more than `tolerance`, else 0.
+    """
+    with open(baseline_path) as f:
+        regressions = compare_to_baseline(results, json.load(f), tolerance)
+    if regressions.empty:
+        print("No regressions against the baseline.")
+        return 0
+    print("\nRegressions against the baseline:")
+    print(regressions)
+    return 1
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark data loading, training and prediction at scale.")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--data-file', default=None, help="Reuse an existing (synthetic) CSV instead of generating one.")
+    parser.add_argument('--models', nargs='*', default=None, help="Subset of model names to benchmark.")
+    parser.add_argument('--output', default=None, help="JSON result file (default: data/benchmarks/<commit>_<rows>.json).")
+    parser.add_argument('--baseline', default=None, help="Earlier JSON result to check for regressions.")
+    parser.add_argument('--mlflow', action='store_true', help="Also log the results as MLflow metrics.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = run_benchmark(args.rows, args.data_file, args.models)
+
+    output = args.output or os.path.join(BENCHMARK_DIR, f"{results['commit']}_{args.rows}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.mlflow:
+        log_to_mlflow(results)
+
+    if args.baseline:
+        sys.exit(check_baseline(results, args.baseline))
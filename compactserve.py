@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fastpath import COMPILED_MODEL_PATH, load_scorer, validate_rows
+
+# --- Configuration ---
+HOST = "127.0.0.1"
+PORT = 8080
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+class CompactHandler(BaseHTTPRequestHandler):
+    """
+    Same routes and payloads as predictservice.py, served from a compiled
+    fastpath model with the standard library and NumPy only:
+      GET  /health         liveness and model status
+      POST /predict        one patient as a JSON object
+      POST /predict/batch  {"instances": [...]} or a JSON list of patients
+    """
+    scorer = None
+    model_path = None
+    started_at = time.time()
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] == '/health':
+            return self._respond(200, {
+                "status": "ok",
+                "model": self.model_path,
+                "model_loaded": self.scorer is not None,
+                "uptime_s": round(time.time() - self.started_at, 1),
+            })
+        self._respond(404, {"error": f"No route for GET {self.path}"})
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path not in ('/predict', '/predict/batch'):
+            return self._respond(404, {"error": f"No route for POST {self.path}"})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            return self._respond(400, {"error": "Invalid Content-Length header."})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._respond(413, {"error": "Request body too large."})
+        try:
+            data = json.loads(self.rfile.read(length) or b'null')
+        except json.JSONDecodeError as e:
+            return self._respond(400, {"error": f"Invalid JSON: {e}"})
+
+        rows = [data] if path == '/predict' else (data.get('instances') if isinstance(data, dict) else data)
+        error = validate_rows(
+            rows, self.scorer.numeric_features, self.scorer.categorical_features, self.scorer.supports_missing
+        )
+        if error:
+            return self._respond(400, {"error": error})
+
+        try:
+            labels, probabilities = self.scorer.predict_records(rows)
+        except Exception as e:
+            return self._respond(500, {"error": f"Prediction error: {e}"})
+
+        predictions = [
+            {"prediction": int(p), "probability": float(prob)} for p, prob in zip(labels, probabilities)
+        ]
+        if path == '/predict':
+            return self._respond(200, predictions[0])
+        self._respond(200, {"predictions": predictions})
+
+    def _respond(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the request path free of per-request stderr writes
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a compiled fastpath model over HTTP (NumPy only).")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--model', default=os.environ.get('COMPACT_MODEL', COMPILED_MODEL_PATH),
+                        help="Compiled .json (Logistic Regression) or .npz (XGBoost) model.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    CompactHandler.scorer = load_scorer(args.model)
+    CompactHandler.model_path = args.model
+    server = ThreadingHTTPServer((args.host, args.port), CompactHandler)
+    print(f"Compact prediction service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,25 +1,159 @@
+import hashlib
+import os
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
+from sqlalchemy import create_engine, text
+
+try:
+    import pyarrow  # noqa: F401 - enables the pyarrow CSV engine and Parquet/Feather caching
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# --- Schema ---
+# Explicit, downcast dtypes for the 16 columns of health_lifestyle_dataset.csv.
+# Value ranges (from the EDA notebook) fit comfortably in these widths.
+DTYPES = {
+    'id': 'int32',
+    'age': 'int8',
+    'gender': 'category',
+    'bmi': 'float32',
+    'daily_steps': 'int32',
+    'sleep_hours': 'float32',
+    'water_intake_l': 'float32',
+    'calories_consumed': 'int16',
+    'smoker': 'int8',
+    'alcohol': 'int8',
+    'resting_hr': 'int16',
+    'systolic_bp': 'int16',
+    'diastolic_bp': 'int16',
+    'cholesterol': 'int16',
+    'family_history': 'int8',
+    'disease_risk': 'int8',
+}
+# Fallback widths when an integer column has missing values (pandas' nullable integers)
+NULLABLE_INTS = {'int8': 'Int8', 'int16': 'Int16', 'int32': 'Int32'}
+# Bump when DTYPES or the cleaning steps change so stale caches are ignored.
+SCHEMA_VERSION = 1
+DROP_COLUMNS = ['id']
+WAREHOUSE_TABLE = 'life_style_data'
+WAREHOUSE_FETCH_SIZE = 50_000
+
+def _file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 of a file's contents, read in 1 MiB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_path(file_path: str, cache_dir: str, cache_format: str) -> str:
+    key = hashlib.sha256(f"{_file_digest(file_path)}:{SCHEMA_VERSION}".encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{key}.{cache_format}")
 
-def load_data(file_path: str) -> pd.DataFrame:
+def _read_chunks(file_path: str, chunksize: int = None, nullable: bool = False):
     """
-    Loads the dataset from a CSV file.
+    Yields the CSV as typed DataFrames, skipping DROP_COLUMNS at parse time.
+    Uses the pyarrow engine for whole-file reads when available; pyarrow
+    does not support chunksize, so chunked reads use the C engine.
+    With nullable=True integer columns use NULLABLE_INTS, so missing values
+    load as <NA> instead of failing the int8/int16 cast.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    usecols = [c for c in header if c not in DROP_COLUMNS]
+    dtype = {c: (NULLABLE_INTS.get(t, t) if nullable else t) for c, t in DTYPES.items() if c in usecols}
+
+    if chunksize:
+        yield from pd.read_csv(file_path, usecols=usecols, dtype=dtype, chunksize=chunksize)
+    else:
+        engine = 'pyarrow' if HAS_PYARROW else 'c'
+        yield pd.read_csv(file_path, usecols=usecols, dtype=dtype, engine=engine)
+
+def _first_seen_mask(chunk: pd.DataFrame, seen: set) -> np.ndarray:
+    """
+    Hash-based streaming deduplication: each row is reduced to a 64-bit
+    content hash and only its first occurrence across all chunks is kept.
+    `seen` grows with the number of unique rows (one int per row), not with
+    the row width. Returns the boolean mask of rows to keep.
+    """
+    hashes = pd.util.hash_pandas_object(chunk, index=False)
+    first_in_chunk = ~hashes.duplicated().to_numpy()
+    unseen = np.fromiter((h not in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+    keep = first_in_chunk & unseen
+    seen.update(hashes[keep].tolist())
+    return keep
+
+def _read_deduplicated(file_path: str, chunksize: int = None, nullable: bool = False):
+    """
+    Returns (deduplicated chunks, rows read).
+    """
+    seen, chunks, initial_rows = set(), [], 0
+    for chunk in _read_chunks(file_path, chunksize, nullable):
+        initial_rows += len(chunk)
+        chunks.append(chunk[_first_seen_mask(chunk, seen)])
+    return chunks, initial_rows
+
+def load_data(
+    file_path: str,
+    chunksize: int = None,
+    cache_dir: str = None,
+    cache_format: str = 'parquet'
+) -> pd.DataFrame:
+    """
+    Loads the dataset from a CSV file with an explicit downcast schema.
+
+    chunksize: read the CSV in chunks of this many rows (bounded parse memory).
+    cache_dir: if set, the cleaned frame is cached as Parquet/Feather keyed by
+        the source file's SHA-256, so repeat runs skip CSV parsing entirely.
     """
     try:
-        df = pd.read_csv(file_path)
+        cache_file = None
+        if cache_dir and HAS_PYARROW:
+            cache_file = _cache_path(file_path, cache_dir, cache_format)
+            if os.path.exists(cache_file):
+                print(f"Loading cached frame from {cache_file}")
+                if cache_format == 'feather':
+                    return pd.read_feather(cache_file)
+                return pd.read_parquet(cache_file)
+        elif cache_dir:
+            print("pyarrow is not installed; skipping the Parquet/Feather cache.")
+
+        # Drop 'id' (at parse time) as it carries no predictive value, then
+        # remove duplicates (though none were found in the notebook)
+        try:
+            chunks, initial_rows = _read_deduplicated(file_path, chunksize)
+        except ValueError as e:
+            print(f"Missing values in an integer column ({e}); reloading with nullable integer dtypes.")
+            chunks, initial_rows = _read_deduplicated(file_path, chunksize, nullable=True)
     except FileNotFoundError:
         print(f"Error: File not found at {file_path}")
         return pd.DataFrame()
 
-    # Drop 'id' as it carries no predictive value
-    if 'id' in df.columns:
-        df = df.drop('id', axis=1)
-        
-    # Remove duplicates (though none were found in the notebook)
-    initial_rows = len(df)
-    df = df.drop_duplicates()
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    if 'gender' in df.columns and df['gender'].dtype != 'category':
+        # Chunks can infer different category sets; re-unify after concat.
+        df['gender'] = df['gender'].astype('category')
     print(f"Duplicates removed: {initial_rows - len(df)}")
-    
+
+    if cache_file:
+        # Write to a private temporary file and rename it into place, so an
+        # interrupted or concurrent writer never leaves a truncated cache file.
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.tmp{os.getpid()}"
+        if cache_format == 'feather':
+            df.reset_index(drop=True).to_feather(tmp_file)
+        else:
+            df.to_parquet(tmp_file)
+        os.replace(tmp_file, cache_file)
+        print(f"Cached cleaned frame to {cache_file}")
+
     return df
 
 def split_data(df: pd.DataFrame, target: str, test_size: float = 0.2, random_state: int = 42):
@@ -28,7 +162,7 @@ def split_data(df: pd.DataFrame, target: str, test_size: float = 0.2, random_sta
     """
     if df.empty:
         raise ValueError("DataFrame is empty. Check data loading.")
-        
+
     X = df.drop(columns=[target])
     y = df[target]
 
@@ -36,17 +170,166 @@ def split_data(df: pd.DataFrame, target: str, test_size: float = 0.2, random_sta
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=random_state, stratify=y
     )
-    
+
+    return X_train, X_test, y_train, y_test
+
+def iter_warehouse_chunks(
+    url: str,
+    table: str = WAREHOUSE_TABLE,
+    columns: list = None,
+    where: str = None,
+    params: dict = None,
+    chunksize: int = WAREHOUSE_FETCH_SIZE
+):
+    """
+    Streams a warehouse table as typed DataFrame chunks through a server-side
+    cursor, so the full result set is never buffered in the client.
+
+    columns: column pushdown (defaults to every schema column).
+    where: predicate pushdown as a SQL boolean expression with bound
+        parameters, e.g. where="id > :last_id", params={"last_id": 100000}.
+    """
+    columns = columns or list(DTYPES)
+    unknown = [c for c in columns if c not in DTYPES]
+    if unknown:
+        raise ValueError(f"Unknown columns requested from the warehouse: {unknown}")
+
+    query = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        query += f" WHERE {where}"
+    dtype = {c: DTYPES[c] for c in columns}
+
+    engine = create_engine(url)
+    try:
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+            yield from pd.read_sql(text(query), conn, params=params, chunksize=chunksize, dtype=dtype)
+    finally:
+        engine.dispose()
+
+def split_stream(chunks, target: str, test_size: float = 0.2, random_state: int = 42):
+    """
+    Splits a stream of chunks into train/test parts without materialising
+    the full table. Each row goes to the test set when a seeded hash of its
+    'id' falls below `test_size`, so a given id always lands on the same side
+    across runs, reloads and chunk sizes. The assignment is independent of the
+    target: each class gets the `test_size` proportion only in expectation,
+    not exactly as with split_data's `stratify=y`. The deviation shrinks with
+    the class size (about one binomial standard deviation).
+    'id' is dropped and duplicates are removed as in load_data.
+
+    Yields (X_train, X_test, y_train, y_test) per chunk.
+    """
+    # hash_key only applies to object columns, so the seed is mixed into the
+    # numeric hash explicitly and the result hashed again.
+    seed = np.uint64(int.from_bytes(hashlib.sha256(str(random_state).encode()).digest()[:8], 'little'))
+    seen = set()
+    for chunk in chunks:
+        if 'id' in chunk.columns:
+            keys = pd.util.hash_array(chunk['id'].to_numpy())
+            chunk = chunk.drop(columns=DROP_COLUMNS)
+        else:
+            keys = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keys = pd.util.hash_array(keys ^ seed)
+        keep = _first_seen_mask(chunk, seen)
+        chunk, keys = chunk[keep], keys[keep]
+
+        is_test = keys < np.uint64(test_size * 2.0 ** 64)
+        X, y = chunk.drop(columns=[target]), chunk[target]
+        yield X[~is_test], X[is_test], y[~is_test], y[is_test]
+
+def _scatter_positions(split_ids: np.ndarray, sorter: np.ndarray, chunk_ids: np.ndarray):
+    """
+    Returns (mask, positions): which chunk_ids belong to split_ids and their
+    row positions in it (split_ids[sorter] is sorted).
+    """
+    idx = np.minimum(np.searchsorted(split_ids, chunk_ids, sorter=sorter), len(split_ids) - 1)
+    positions = sorter[idx]
+    mask = split_ids[positions] == chunk_ids
+    return mask, positions[mask]
+
+def split_warehouse_data(
+    url: str,
+    target: str,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    table: str = WAREHOUSE_TABLE,
+    columns: list = None,
+    where: str = None,
+    params: dict = None,
+    chunksize: int = WAREHOUSE_FETCH_SIZE
+):
+    """
+    Warehouse-backed equivalent of load_data + split_data, streamed in two
+    passes over the same predicate:
+
+    1. Only (id, target) is read (5 bytes per row) and split with
+       train_test_split(stratify=y) in id order, as split_data does on the
+       id-ordered CSV, so class proportions are exact. Duplicate rows under
+       different ids are removed in the database first (the lowest id of
+       each full-row group is kept), as load_data does.
+    2. The feature columns are streamed and each chunk is written straight
+       into preallocated train/test frames by id, so the selected rows are
+       held once (no list of chunks, no concat). Ids outside the split
+       (duplicates, or rows added between the passes) are skipped.
+
+    Returns X_train, X_test, y_train, y_test.
+    """
+    columns = [c for c in (columns or list(DTYPES)) if c not in DROP_COLUMNS]
+    if target not in columns:
+        columns.append(target)
+
+    # Pass 1: labels of the first row of each duplicate group, then the same
+    # stratified split as split_data
+    row_columns = ', '.join(c for c in DTYPES if c not in DROP_COLUMNS)
+    first_rows = f"id IN (SELECT MIN(id) FROM {table} GROUP BY {row_columns})"
+    label_where = f"({where}) AND {first_rows}" if where else first_rows
+    labels = list(iter_warehouse_chunks(url, table, ['id', target], label_where, params, chunksize))
+    if not labels or not sum(len(chunk) for chunk in labels):
+        raise ValueError("Warehouse query returned no rows. Check the table and predicate.")
+    ids = np.concatenate([chunk['id'].to_numpy() for chunk in labels])
+    y_all = np.concatenate([chunk[target].to_numpy() for chunk in labels])
+    del labels
+    order = np.argsort(ids, kind='stable')
+    ids, y_all = ids[order], y_all[order]
+    train_ids, test_ids = train_test_split(ids, test_size=test_size, random_state=random_state, stratify=y_all)
+    del ids, y_all
+
+    # Pass 2: scatter feature chunks into preallocated columns by id
+    splits = []
+    for split_ids in (train_ids, test_ids):
+        data = {c: np.empty(len(split_ids), dtype=object if DTYPES[c] == 'category' else DTYPES[c]) for c in columns}
+        splits.append((split_ids, np.argsort(split_ids), data, np.zeros(len(split_ids), dtype=bool)))
+    for chunk in iter_warehouse_chunks(url, table, ['id'] + columns, where, params, chunksize):
+        chunk_ids = chunk['id'].to_numpy()
+        for split_ids, sorter, data, filled in splits:
+            mask, positions = _scatter_positions(split_ids, sorter, chunk_ids)
+            for c in columns:
+                data[c][positions] = chunk[c].to_numpy()[mask]
+            filled[positions] = True
+
+    parts = []
+    for _, _, data, filled in splits:
+        if not filled.all():
+            print(f"Skipping {int((~filled).sum())} rows removed or changed between the passes.")
+            data = {c: values[filled] for c, values in data.items()}
+        y = pd.Series(data.pop(target), name=target)
+        X = pd.DataFrame(data, copy=False)
+        if 'gender' in X.columns:
+            X['gender'] = X['gender'].astype('category')
+        parts += [X, y]
+
+    X_train, y_train, X_test, y_test = parts
+    print(f"Loaded {len(X_train) + len(X_test)} rows from '{table}': {len(X_train)} train / {len(X_test)} test")
     return X_train, X_test, y_train, y_test
 
 if __name__ == '__main__':
     # Example usage for testing
     DATA_FILE = '/Users/avikumart/Documents/GitHub/Data-Warehousing-and-Analytics-Project/data/health_lifestyle_dataset.csv' # Adjust path as needed
     TARGET_COLUMN = 'disease_risk'
-    
+
     df = load_data(DATA_FILE)
     if not df.empty:
         X_train, X_test, y_train, y_test = split_data(df, TARGET_COLUMN)
         print(f"X_train shape: {X_train.shape}")
         print(f"X_test shape: {X_test.shape}")
-        print(f"Class distribution in y_train:\n{y_train.value_counts(normalize=True)}")
\ No newline at end of file
+        print(f"Class distribution in y_train:\n{y_train.value_counts(normalize=True)}")
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from mlpipeline import CONTINUOUS_FEATURES, CATEGORICAL_FEATURES, RANDOM_STATE
+
+# --- Configuration ---
+DECISION_THRESHOLD = 0.5 # predict() == argmax(predict_proba) == (p > 0.5) for two classes
+PRECISION_TARGETS = (0.3, 0.4, 0.5) # Report the best recall reachable at these precisions
+SWEEP_GRID = np.round(np.linspace(0.05, 0.95, 19), 2) # Thresholds in the logged sweep table
+PERMUTATION_REPEATS = 5
+N_JOBS = -1
+
+class _SortedScores:
+    """
+    One sort of the probability vector plus suffix counts of positives, from
+    which the confusion matrix at any threshold is two searchsorted lookups.
+    """
+    def __init__(self, y_true, y_prob):
+        y_true = np.asarray(y_true).astype(bool)
+        y_prob = np.asarray(y_prob, dtype=np.float64)
+        order = np.argsort(y_prob, kind='mergesort')
+        self.scores = y_prob[order]
+        # positives_from[k] = positives among the k-th smallest score and above
+        self.positives_from = np.append(np.cumsum(y_true[order][::-1])[::-1], 0)
+        self.n = len(y_prob)
+        self.n_pos = int(y_true.sum())
+        self.n_neg = self.n - self.n_pos
+
+    def confusion(self, thresholds, inclusive: bool):
+        """
+        Returns (tp, fp, fn, tn) arrays for predicting positive when
+        score >= t (inclusive) or score > t (exclusive).
+        """
+        k = np.searchsorted(self.scores, thresholds, side='left' if inclusive else 'right')
+        tp = self.positives_from[k]
+        fp = (self.n - k) - tp
+        return tp, fp, self.n_pos - tp, self.n_neg - fp
+
+def _rates(tp, fp, fn, tn) -> dict:
+    """
+    Rates from confusion counts. Undefined ratios are 0.0, as sklearn does
+    with zero_division=0 (e.g. precision with no predicted positives).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        specificity = np.where(tn + fp > 0, tn / (tn + fp), 0.0)
+    return {
+        "accuracy": (tp + tn) / (tp + fp + fn + tn),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "specificity": specificity,
+    }
+
+def threshold_sweep(y_true, y_prob, thresholds=None) -> pd.DataFrame:
+    """
+    Confusion counts and rates for predicting positive when p >= threshold,
+    at every distinct score (default) or at the given thresholds. Vectorized
+    over thresholds from a single sort.
+    """
+    scores = _SortedScores(y_true, y_prob)
+    thresholds = np.unique(scores.scores) if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+    tp, fp, fn, tn = scores.confusion(thresholds, inclusive=True)
+    sweep = pd.DataFrame({"threshold": thresholds, "tp": tp, "fp": fp, "fn": fn, "tn": tn})
+    for name, values in _rates(tp, fp, fn, tn).items():
+        sweep[name] = values
+    return sweep
+
+def fast_roc_auc(y_true, y_prob) -> float:
+    """
+    ROC AUC via the rank-sum (Mann-Whitney U) statistic with tie-averaged
+    ranks; equals sklearn's roc_auc_score.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_prob = np.asarray(y_prob, dtype=np.float64)
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    # Average ranks of tied scores from one sort
+    order = np.argsort(y_prob, kind='mergesort')
+    sorted_scores = y_prob[order]
+    distinct = np.r_[True, sorted_scores[1:] != sorted_scores[:-1]]
+    group = np.cumsum(distinct) - 1
+    starts = np.flatnonzero(distinct)
+    ends = np.r_[starts[1:], len(sorted_scores)]
+    ranks = np.empty(len(y_prob))
+    ranks[order] = ((starts + ends + 1) / 2.0)[group]
+    return (ranks[y_true].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+
+def evaluate_probabilities(
+    y_true,
+    y_prob,
+    threshold: float = DECISION_THRESHOLD,
+    precision_targets=PRECISION_TARGETS
+) -> dict:
+    """
+    All threshold-dependent metrics from one probability vector: the
+    get_metrics() set at `threshold` (labels are p > threshold, as predict()
+    does), precision, PR AUC (average precision), the F1-optimal threshold
+    and the best recall at each precision target.
+    """
+    scores = _SortedScores(y_true, y_prob)
+    at_threshold = _rates(*scores.confusion(np.array([threshold]), inclusive=False))
+
+    thresholds = np.unique(scores.scores)
+    tp, fp, fn, tn = scores.confusion(thresholds, inclusive=True)
+    rates = _rates(tp, fp, fn, tn)
+    # ROC points from the strictest threshold down, starting at (0, 0)
+    fpr = np.r_[0.0, fp[::-1] / max(scores.n_neg, 1)]
+    tpr = np.r_[0.0, tp[::-1] / max(scores.n_pos, 1)]
+    # Recall rises as the threshold falls; step-wise average precision
+    recall_desc = np.r_[0.0, rates["recall"][::-1]]
+    best = int(np.argmax(rates["f1"]))
+
+    metrics = {
+        "Accuracy": float(at_threshold["accuracy"][0]),
+        "Recall": float(at_threshold["recall"][0]),
+        "F1 Score": float(at_threshold["f1"][0]),
+        "ROC AUC": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2)),
+        "Precision": float(at_threshold["precision"][0]),
+        "PR AUC": float(np.sum(np.diff(recall_desc) * rates["precision"][::-1])),
+        "Best F1": float(rates["f1"][best]),
+        "Best F1 Threshold": float(thresholds[best]),
+    }
+    for target in precision_targets:
+        reachable = rates["precision"] >= target
+        metrics[f"Recall at Precision {target:g}"] = float(rates["recall"][reachable].max()) if reachable.any() else 0.0
+    return metrics
+
+def feature_groups(preprocessor) -> dict:
+    """
+    Maps each raw input feature to its column indices in the fitted
+    preprocessor's output, so one-hot columns (gender) are permuted together.
+    """
+    encoded = list(preprocessor.transformers_[1][1].get_feature_names_out(CATEGORICAL_FEATURES))
+    groups = {feature: [i] for i, feature in enumerate(CONTINUOUS_FEATURES)}
+    for feature in CATEGORICAL_FEATURES:
+        groups[feature] = [
+            len(CONTINUOUS_FEATURES) + j for j, name in enumerate(encoded) if name.startswith(f"{feature}_")
+        ]
+    return groups
+
+def _permuted_scores(predict_proba, X, y_true, columns, n_repeats: int, seed: int) -> list:
+    """
+    AUC after shuffling `columns` (with one shared row permutation), n_repeats times.
+    """
+    rng = np.random.default_rng(seed)
+    X_permuted = X.copy()
+    scores = []
+    for _ in range(n_repeats):
+        permutation = rng.permutation(len(X))
+        if isinstance(X, pd.DataFrame):
+            for column in columns:
+                X_permuted[column] = X[column].to_numpy()[permutation]
+        else:
+            X_permuted[:, columns] = X[np.ix_(permutation, columns)]
+        scores.append(fast_roc_auc(y_true, predict_proba(X_permuted)[:, 1]))
+    return scores
+
+def permutation_importance(
+    pipeline,
+    X_test: pd.DataFrame,
+    y_test,
+    X_transformed: np.ndarray = None,
+    n_repeats: int = PERMUTATION_REPEATS,
+    n_jobs: int = N_JOBS,
+    random_state: int = RANDOM_STATE
+) -> pd.DataFrame:
+    """
+    Model-agnostic importance: the drop in test ROC AUC when a feature's
+    values are shuffled, in parallel across features.
+
+    For a fitted ImbPipeline the test set is transformed once (or
+    X_transformed is reused, e.g. from the fold cache) and only the
+    classifier is re-run per permutation. Other models (FoldEnsemble) are
+    scored on permuted raw columns.
+    """
+    y_test = np.asarray(y_test)
+    if hasattr(pipeline, 'named_steps'):
+        if X_transformed is None:
+            X_transformed = pipeline.named_steps['preprocessor'].transform(X_test)
+        X = np.asarray(X_transformed, dtype=np.float64)
+        predict_proba = pipeline.named_steps['classifier'].predict_proba
+        groups = feature_groups(pipeline.named_steps['preprocessor'])
+    else:
+        X = X_test
+        predict_proba = pipeline.predict_proba
+        groups = {feature: [feature] for feature in CONTINUOUS_FEATURES + CATEGORICAL_FEATURES}
+
+    baseline = fast_roc_auc(y_test, predict_proba(X)[:, 1])
+    permuted = Parallel(n_jobs=n_jobs)(
+        delayed(_permuted_scores)(predict_proba, X, y_test, columns, n_repeats, random_state + i)
+        for i, columns in enumerate(groups.values())
+    )
+    drops = baseline - np.asarray(permuted)
+    importance_df = pd.DataFrame({
+        'Feature': list(groups),
+        'Importance': drops.mean(axis=1),
+        'Std': drops.std(axis=1),
+    })
+    return importance_df.sort_values(by='Importance', ascending=False, ignore_index=True)
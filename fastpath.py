@@ -0,0 +1,429 @@
+import json
+import math
+import numbers
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# --- Configuration ---
+COMPILED_MODEL_PATH = "models/logreg_fastpath.json"
+COMPILED_TREE_PATH = "models/xgboost_fastpath.npz"
+PARITY_ATOL = 1e-9
+TREE_PARITY_ATOL = 1e-5 # Leaf values are float32, as in XGBoost itself
+TREE_BATCH_ROWS = 4096 # Rows traversed at once; bounds the (rows x trees) node-index matrix
+TREE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing', 'value', 'roots')
+
+def _preprocessor_layout(preprocessor):
+    """
+    Reads a fitted create_preprocessor() ColumnTransformer. Returns the
+    numeric features with their StandardScaler mean/scale, and for each
+    categorical feature the (output column, category) pairs of its one-hot
+    encoding. Output columns index the transformed matrix.
+    """
+    numeric_features, mean, scale = [], [], []
+    categorical_columns = []
+    offset = 0
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == 'remainder':
+            if transformer != 'drop' and len(columns) > 0:
+                raise ValueError(f"Passthrough remainder columns are not supported: {columns}")
+            continue
+
+        if name == 'num':
+            n = len(columns)
+            numeric_features += list(columns)
+            mean += list(transformer.mean_ if transformer.mean_ is not None else np.zeros(n))
+            scale += list(transformer.scale_ if transformer.scale_ is not None else np.ones(n))
+            offset += n
+
+        elif name == 'cat':
+            drop_idx = transformer.drop_idx_
+            for i, feature in enumerate(columns):
+                levels = []
+                for j, category in enumerate(transformer.categories_[i]):
+                    if drop_idx is not None and drop_idx[i] is not None and j == drop_idx[i]:
+                        continue  # Dropped level encodes as all zeros
+                    levels.append((offset, str(category)))
+                    offset += 1
+                categorical_columns.append((feature, levels))
+
+        else:
+            raise ValueError(f"Unsupported transformer in preprocessor: {name}")
+
+    return numeric_features, [float(v) for v in mean], [float(v) for v in scale], categorical_columns, offset
+
+def compile_pipeline(pipeline) -> dict:
+    """
+    Flattens a fitted create_pipeline() output into plain arrays that the
+    NumPy-only scorers below evaluate: Logistic Regression becomes scaler
+    mean/scale, a per-category weight table and coefficients (JSON);
+    XGBoost becomes flat float32 tree arrays with the scaler baked into the
+    split thresholds (see compile_xgboost).
+
+    SMOTE is a no-op at inference time and is ignored.
+    """
+    classifier = pipeline.named_steps['classifier']
+    if hasattr(classifier, 'get_booster'):
+        return compile_xgboost(pipeline)
+
+    preprocessor = pipeline.named_steps['preprocessor']
+    if len(classifier.classes_) != 2 or not hasattr(classifier, 'coef_'):
+        raise ValueError("Only binary Logistic Regression and XGBoost pipelines can be compiled.")
+
+    numeric_features, mean, scale, categorical_columns, n_columns = _preprocessor_layout(preprocessor)
+    coef = classifier.coef_[0]
+    if n_columns != len(coef):
+        raise ValueError(f"Compiled {n_columns} features but the classifier has {len(coef)} coefficients.")
+
+    return {
+        "kind": "logistic",
+        "numeric_features": numeric_features,
+        "mean": mean,
+        "scale": scale,
+        "numeric_coef": [float(v) for v in coef[:len(numeric_features)]],
+        "categorical_features": [feature for feature, _ in categorical_columns],
+        "category_weights": [
+            {category: float(coef[column]) for column, category in levels}
+            for _, levels in categorical_columns
+        ],
+        "intercept": float(classifier.intercept_[0]),
+        "classes": [int(c) for c in classifier.classes_],
+    }
+
+def _tree_arrays(booster) -> tuple:
+    """
+    Concatenates every tree of a gbtree Booster into flat node arrays from
+    its JSON model dump. Leaves point to themselves on every branch, so a
+    fixed number of vectorized steps (the maximum depth) reaches all leaves.
+    Returns (arrays, max_depth).
+    """
+    model = json.loads(bytes(booster.save_raw(raw_format='json')))
+    gradient_booster = model['learner']['gradient_booster']
+    if gradient_booster['name'] != 'gbtree':
+        raise ValueError(f"Only the gbtree booster can be compiled, not {gradient_booster['name']}.")
+
+    parts = {name: [] for name in TREE_ARRAYS}
+    offset, max_depth = 0, 0
+    for tree in gradient_booster['model']['trees']:
+        if any(tree.get('split_type', [])):
+            raise ValueError("Categorical splits are not supported.")
+        left = np.asarray(tree['left_children'], dtype=np.int64)
+        right = np.asarray(tree['right_children'], dtype=np.int64)
+        condition = np.asarray(tree['split_conditions'], dtype=np.float32)
+        default_left = np.asarray(tree['default_left'], dtype=bool)
+        leaf = left == -1
+        node_ids = np.arange(len(left)) + offset
+
+        parts['feature'].append(np.where(leaf, 0, tree['split_indices']))
+        parts['threshold'].append(np.where(leaf, 0.0, condition))  # Leaf values live in split_conditions
+        parts['left'].append(np.where(leaf, node_ids, left + offset))
+        parts['right'].append(np.where(leaf, node_ids, right + offset))
+        parts['missing'].append(np.where(leaf, node_ids, np.where(default_left, left, right) + offset))
+        parts['value'].append(np.where(leaf, condition, 0.0))
+        parts['roots'].append([offset])
+
+        stack = [(0, 0)]
+        while stack:
+            node, depth = stack.pop()
+            max_depth = max(max_depth, depth)
+            if not leaf[node]:
+                stack += [(left[node], depth + 1), (right[node], depth + 1)]
+        offset += len(left)
+
+    arrays = {name: np.concatenate(values) for name, values in parts.items()}
+    for name in ('feature', 'left', 'right', 'missing', 'roots'):
+        arrays[name] = arrays[name].astype(np.int32)
+    for name in ('threshold', 'value'):
+        arrays[name] = arrays[name].astype(np.float32)
+    return arrays, max_depth
+
+def _tree_margin(trees: dict, X: np.ndarray, max_depth: int) -> np.ndarray:
+    """
+    Sum of leaf values over all trees for each row of the float32 matrix X.
+    Goes left when x < threshold and follows the learned default on NaN,
+    as XGBoost does.
+    """
+    node = np.repeat(trees['roots'][None, :], len(X), axis=0)
+    rows = np.arange(len(X))[:, None]
+    for _ in range(max_depth):
+        x = X[rows, trees['feature'][node]]
+        child = np.where(x < trees['threshold'][node], trees['left'][node], trees['right'][node])
+        node = np.where(np.isnan(x), trees['missing'][node], child)
+    return trees['value'][node].sum(axis=1, dtype=np.float64)
+
+def compile_xgboost(pipeline) -> dict:
+    """
+    Compiles a fitted create_pipeline() output with an XGBoost classifier
+    (trees up to best_iteration when early stopping was used).
+
+    Splits on scaled numeric columns are moved to raw units
+    (x_scaled < t  <=>  x < t * scale + mean), so the scorer reads raw
+    numeric values plus one 0/1 indicator per kept one-hot level and never
+    standardises. The base margin is measured rather than parsed from the
+    booster config: it is the classifier's raw margin on an all-zero row
+    minus the compiled trees' sum on that row.
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    classifier = pipeline.named_steps['classifier']
+    if len(classifier.classes_) != 2:
+        raise ValueError("Only binary XGBoost classifiers can be compiled.")
+
+    numeric_features, mean, scale, categorical_columns, n_columns = _preprocessor_layout(preprocessor)
+    booster = classifier.get_booster()
+    if booster.num_features() != n_columns:
+        raise ValueError(f"Preprocessor yields {n_columns} columns but the booster expects {booster.num_features()}.")
+    best_iteration = getattr(classifier, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[:best_iteration + 1]
+
+    trees, max_depth = _tree_arrays(booster)
+    zeros = np.zeros((1, n_columns), dtype=np.float32)
+    margin = classifier.predict(zeros, output_margin=True, validate_features=False)
+    base_margin = float(np.ravel(margin)[0]) - float(_tree_margin(trees, zeros, max_depth)[0])
+
+    # Bake StandardScaler into the numeric thresholds (one-hot columns keep theirs)
+    split = trees['left'] != np.arange(len(trees['left']))
+    numeric_split = split & (trees['feature'] < len(numeric_features))
+    features = trees['feature'][numeric_split]
+    trees['threshold'][numeric_split] = (
+        trees['threshold'][numeric_split].astype(np.float64) * np.asarray(scale)[features] + np.asarray(mean)[features]
+    ).astype(np.float32)
+
+    return {
+        "kind": "xgboost",
+        "numeric_features": numeric_features,
+        "categorical_features": [feature for feature, _ in categorical_columns],
+        "indicator_levels": [[category for _, category in levels] for _, levels in categorical_columns],
+        "base_margin": base_margin,
+        "max_depth": max_depth,
+        "n_trees": len(trees['roots']),
+        "classes": [int(c) for c in classifier.classes_],
+        "trees": trees,
+    }
+
+class _CompiledScorer(ABC):
+    """
+    Shared scoring front-end: subclasses implement decision_function() on
+    (numeric, categorical) arrays and get probabilities, labels and
+    dict/DataFrame entry points from here.
+    """
+    parity_atol = PARITY_ATOL
+    supports_missing = False # Whether NaN/None numeric inputs are scored (routed like XGBoost)
+
+    def __init__(self, compiled: dict):
+        self.compiled = compiled
+        self.numeric_features = compiled["numeric_features"]
+        self.categorical_features = compiled["categorical_features"]
+        self.features = self.numeric_features + self.categorical_features
+        self.classes = np.asarray(compiled["classes"])
+
+    @abstractmethod
+    def decision_function(self, numeric: np.ndarray, categorical: np.ndarray) -> np.ndarray:
+        """
+        Raw margin (log-odds of the positive class) for each row.
+        """
+
+    def predict_proba(self, numeric: np.ndarray, categorical: np.ndarray) -> np.ndarray:
+        """
+        Returns the positive-class probability for each row.
+        """
+        z = self.decision_function(numeric, categorical)
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict(self, numeric: np.ndarray, categorical: np.ndarray) -> np.ndarray:
+        z = self.decision_function(numeric, categorical)
+        return self.classes[(z > 0).astype(int)]
+
+    def predict_records(self, records):
+        """
+        Scores a dict (one patient) or a list of dicts keyed by feature name.
+        Returns (predictions, probabilities).
+        """
+        if isinstance(records, dict):
+            records = [records]
+        numeric = np.array([[r[f] for f in self.numeric_features] for r in records], dtype=np.float64)
+        categorical = np.array([[r[f] for f in self.categorical_features] for r in records], dtype=object)
+        z = self.decision_function(numeric, categorical)
+        return self.classes[(z > 0).astype(int)], 1.0 / (1.0 + np.exp(-z))
+
+    def predict_frame(self, df):
+        """
+        Scores a DataFrame (or any mapping of column -> array).
+        Returns (predictions, probabilities).
+        """
+        numeric = np.column_stack([np.asarray(df[f], dtype=np.float64) for f in self.numeric_features])
+        categorical = np.column_stack([np.asarray(df[f], dtype=object) for f in self.categorical_features])
+        z = self.decision_function(numeric, categorical)
+        return self.classes[(z > 0).astype(int)], 1.0 / (1.0 + np.exp(-z))
+
+class FastLogisticScorer(_CompiledScorer):
+    """
+    NumPy-only scorer for a compiled Logistic Regression pipeline.
+    Equivalent to pipeline.predict_proba(X)[:, 1] without the
+    ColumnTransformer/ImbPipeline dispatch overhead.
+    """
+    def __init__(self, compiled: dict):
+        super().__init__(compiled)
+        self._mean = np.asarray(compiled["mean"], dtype=np.float64)
+        self._scale = np.asarray(compiled["scale"], dtype=np.float64)
+        self._coef = np.asarray(compiled["numeric_coef"], dtype=np.float64)
+        self._intercept = compiled["intercept"]
+        self._category_weights = compiled["category_weights"]
+
+    def decision_function(self, numeric: np.ndarray, categorical: np.ndarray) -> np.ndarray:
+        """
+        numeric: (n, n_numeric) array in `numeric_features` order.
+        categorical: (n, n_categorical) array of category labels.
+        """
+        numeric = np.asarray(numeric, dtype=np.float64).reshape(-1, len(self.numeric_features))
+        categorical = np.asarray(categorical, dtype=object).reshape(len(numeric), -1)
+        z = ((numeric - self._mean) / self._scale) @ self._coef + self._intercept
+        for i, weights in enumerate(self._category_weights):
+            column = categorical[:, i].astype(str)
+            for category, weight in weights.items():
+                z += np.where(column == category, weight, 0.0)  # Unknown levels contribute 0
+        return z
+
+class FastTreeScorer(_CompiledScorer):
+    """
+    NumPy-only scorer for a compiled XGBoost pipeline. All trees are walked
+    together, one vectorized step per depth level, over float32 inputs.
+    Equivalent to pipeline.predict_proba(X)[:, 1] up to float32 rounding.
+    """
+    parity_atol = TREE_PARITY_ATOL
+    supports_missing = True
+
+    def __init__(self, compiled: dict):
+        super().__init__(compiled)
+        self._trees = compiled["trees"]
+        self._indicator_levels = compiled["indicator_levels"]
+        self._base_margin = compiled["base_margin"]
+        self._max_depth = compiled["max_depth"]
+
+    def decision_function(self, numeric: np.ndarray, categorical: np.ndarray) -> np.ndarray:
+        """
+        numeric: (n, n_numeric) array in `numeric_features` order (raw units).
+        categorical: (n, n_categorical) array of category labels.
+        """
+        numeric = np.asarray(numeric, dtype=np.float32).reshape(-1, len(self.numeric_features))
+        categorical = np.asarray(categorical, dtype=object).reshape(len(numeric), -1)
+        columns = [numeric]
+        for i, levels in enumerate(self._indicator_levels):
+            column = categorical[:, i].astype(str)
+            columns += [(column == level).astype(np.float32)[:, None] for level in levels]  # Unknown -> all 0
+        X = np.hstack(columns)
+
+        z = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), TREE_BATCH_ROWS):
+            z[start:start + TREE_BATCH_ROWS] = _tree_margin(self._trees, X[start:start + TREE_BATCH_ROWS], self._max_depth)
+        return z + self._base_margin
+
+def validate_rows(rows, numeric_features: list, categorical_features: list, allow_missing: bool = False) -> str:
+    """
+    Returns an error message if `rows` is not a non-empty list of patient
+    objects carrying every feature with a usable value (a finite number for
+    numeric features, a string for categorical ones), otherwise an empty
+    string. With allow_missing, numeric values may also be null/NaN.
+    Shared by predictservice.py and compactserve.py so a bad value is a 400
+    for that request instead of a scoring error.
+    """
+    if not isinstance(rows, list) or not rows:
+        return "Expected a non-empty list of patient objects."
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            return f"Instance {i} is not a JSON object."
+        missing = [f for f in list(numeric_features) + list(categorical_features) if f not in row]
+        if missing:
+            return f"Instance {i} is missing features: {missing}"
+        for f in numeric_features:
+            value = row[f]
+            if allow_missing and (value is None or (isinstance(value, float) and math.isnan(value))):
+                continue
+            if not isinstance(value, numbers.Real) or isinstance(value, str) or not math.isfinite(value):
+                return f"Instance {i}: feature '{f}' must be a finite number, got {value!r}."
+        for f in categorical_features:
+            if not isinstance(row[f], str):
+                return f"Instance {i}: feature '{f}' must be a string, got {row[f]!r}."
+    return ""
+
+def save_compiled(compiled: dict, path: str = None) -> str:
+    """
+    Writes a compiled model: Logistic Regression to JSON, XGBoost to a
+    compressed .npz holding the tree arrays plus a JSON `meta` entry.
+    Returns the path written.
+    """
+    if compiled.get("kind") == "xgboost":
+        path = path or COMPILED_TREE_PATH
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        meta = {key: value for key, value in compiled.items() if key != "trees"}
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **compiled["trees"])
+        return path
+
+    path = path or COMPILED_MODEL_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(compiled, f, indent=2)
+    return path
+
+def load_scorer(path: str = COMPILED_MODEL_PATH) -> _CompiledScorer:
+    """
+    Loads a compiled model into a FastLogisticScorer (.json) or a
+    FastTreeScorer (.npz).
+    """
+    if path.endswith('.npz'):
+        with np.load(path, allow_pickle=False) as archive:
+            compiled = json.loads(str(archive['meta']))
+            compiled["trees"] = {name: archive[name] for name in TREE_ARRAYS}
+        return FastTreeScorer(compiled)
+    with open(path) as f:
+        return FastLogisticScorer(json.load(f))
+
+def check_parity(pipeline, scorer: _CompiledScorer, X, atol: float = None) -> float:
+    """
+    Compares the fast scorer against pipeline.predict_proba on the DataFrame X.
+    Raises RuntimeError if probabilities differ by more than `atol` (default:
+    the scorer's parity_atol) or any predicted label differs. Returns the
+    max absolute probability difference.
+    """
+    atol = scorer.parity_atol if atol is None else atol
+    expected = pipeline.predict_proba(X)[:, 1]
+    labels, actual = scorer.predict_frame(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    if max_diff > atol:
+        raise RuntimeError(f"Fast-path probabilities differ from the pipeline by {max_diff:.3e} (atol={atol}).")
+    mismatched = int(np.sum(labels != pipeline.predict(X)))
+    if mismatched:
+        raise RuntimeError(f"Fast-path labels differ from the pipeline on {mismatched} rows.")
+    return max_diff
+
+def parse_args():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a trained pipeline to the compact NumPy-only format.")
+    parser.add_argument('--model', default=None, help="joblib/pickle pipeline (default: inference.MODEL_PATH).")
+    parser.add_argument('--output', default=None, help=f"Defaults to {COMPILED_MODEL_PATH} (LR) or {COMPILED_TREE_PATH} (XGBoost).")
+    parser.add_argument('--data-file', default='data/health_lifestyle_dataset.csv', help="Rows for the parity check.")
+    parser.add_argument('--parity-rows', type=int, default=10_000)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    # Compile a trained artifact, save it and verify parity on a sample.
+    import time
+    import pandas as pd
+    from inference import MODEL_PATH, INPUT_FEATURES, load_pipeline
+
+    args = parse_args()
+    pipeline = load_pipeline(args.model or MODEL_PATH)
+    path = save_compiled(compile_pipeline(pipeline), args.output)
+
+    start = time.perf_counter()
+    scorer = load_scorer(path)
+    load_ms = (time.perf_counter() - start) * 1000.0
+    print(f"Compiled model written to {path} ({os.path.getsize(path) / 1024:.1f} KB, loads in {load_ms:.1f} ms)")
+
+    sample = pd.read_csv(args.data_file, nrows=args.parity_rows, usecols=INPUT_FEATURES)[INPUT_FEATURES]
+    max_diff = check_parity(pipeline, scorer, sample)
+    print(f"Parity check passed on {len(sample)} rows (max |diff| = {max_diff:.2e}).")
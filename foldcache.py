@@ -0,0 +1,127 @@
+import os
+import shutil
+import uuid
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+
+from instrumentation import StageTimings
+
+# --- Configuration ---
+FOLD_CACHE_DIR = 'data/.fold_cache'
+FOLD_CACHE_MAX_BYTES = 4 * 1024 ** 3  # 4 GiB
+ARRAY_NAMES = ('X_resampled', 'y_resampled', 'X_val', 'X_test')
+
+class FoldCache:
+    """
+    Content-addressed on-disk cache of per-fold preprocessed and resampled
+    matrices. Each entry is keyed by a hash of the fold data plus the
+    (unfitted) preprocessor and sampler, holds the fitted preprocessor and
+    the transformed train/validation/test matrices as .npy files, and is
+    opened memory-mapped so every model and worker in a sweep shares one copy.
+
+    Entries are evicted least-recently-used once the cache exceeds max_bytes.
+    """
+    def __init__(self, cache_dir: str = FOLD_CACHE_DIR, max_bytes: int = FOLD_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(preprocessor, sampler, X_fit, y_fit, X_val, X_test) -> str:
+        return joblib.hash([preprocessor, sampler, X_fit, y_fit, X_val, X_test])
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._entry_dir(key), 'preprocessor.joblib'))
+
+    def put(self, key: str, preprocessor, arrays: dict):
+        """
+        Writes an entry atomically: files go to a temporary directory that is
+        renamed into place, so concurrent workers never see a partial entry.
+        """
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            if array is not None:
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+        joblib.dump(preprocessor, os.path.join(tmp_dir, 'preprocessor.joblib'))
+        try:
+            os.rename(tmp_dir, self._entry_dir(key))
+        except OSError:
+            # Another worker published the same key first; contents are identical.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, key: str) -> dict:
+        """
+        Returns the fitted preprocessor and read-only memory-mapped arrays.
+        """
+        entry_dir = self._entry_dir(key)
+        os.utime(entry_dir)  # Mark as recently used for LRU eviction
+        entry = {'preprocessor': joblib.load(os.path.join(entry_dir, 'preprocessor.joblib'))}
+        for name in ARRAY_NAMES:
+            path = os.path.join(entry_dir, f"{name}.npy")
+            entry[name] = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+        return entry
+
+    def evict(self, protect=()):
+        """
+        Deletes least-recently-used entries until the cache fits in max_bytes.
+        Keys in `protect` (e.g. the folds of a running sweep) are never evicted.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith('.tmp-') or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), name, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name in protect:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
+
+def _dense(X):
+    return X.toarray() if sparse.issparse(X) else np.asarray(X)
+
+def prepare_fold(cache: FoldCache, preprocessor, sampler, X_fit, y_fit, X_val, X_test):
+    """
+    Ensures the cache holds the preprocessed + resampled matrices for one fold.
+    Performs exactly the steps ImbPipeline.fit runs before the classifier
+    (preprocessor.fit_transform, then sampler.fit_resample), so a classifier
+    fitted on the cached matrices is bit-identical to one fitted through the
+    pipeline.
+
+    Returns (key, stage_seconds) with the preprocess/SMOTE/cache-write
+    durations (empty on a cache hit).
+    """
+    key = cache.key(preprocessor, sampler, X_fit, y_fit, X_val, X_test)
+    if cache.contains(key):
+        return key, {}
+
+    timings = StageTimings()
+    with timings.stage('preprocess'):
+        fitted_preprocessor = clone(preprocessor)
+        X_transformed = fitted_preprocessor.fit_transform(X_fit, y_fit)
+    with timings.stage('smote'):
+        X_resampled, y_resampled = clone(sampler).fit_resample(X_transformed, y_fit)
+    with timings.stage('preprocess'):
+        arrays = {
+            'X_resampled': _dense(X_resampled),
+            'y_resampled': np.asarray(y_resampled),
+            'X_val': _dense(fitted_preprocessor.transform(X_val)) if X_val is not None else None,
+            'X_test': _dense(fitted_preprocessor.transform(X_test)),
+        }
+    with timings.stage('fold_cache_write'):
+        cache.put(key, fitted_preprocessor, arrays)
+    return key, timings.as_dict()
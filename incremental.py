@@ -0,0 +1,199 @@
+import argparse
+
+import mlflow
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+from mlflow.exceptions import MlflowException
+from sklearn.base import BaseEstimator, ClassifierMixin, TransformerMixin
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from dataloader import DTYPES, iter_warehouse_chunks, split_stream
+from mlpipeline import CONTINUOUS_FEATURES, CATEGORICAL_FEATURES, RANDOM_STATE, get_metrics
+
+# --- Configuration ---
+DATA_FILE = 'data/health_lifestyle_dataset.csv'
+TARGET_COLUMN = 'disease_risk'
+MLFLOW_EXPERIMENT_NAME = "Disease_Risk_Classification_SMOTE"
+REGISTERED_MODEL_NAME = "disease_risk_incremental_lr"
+CHUNK_SIZE = 50_000
+CLASSES = np.array([0, 1])
+# Known levels of each categorical feature; the first level is dropped like
+# OneHotEncoder(drop='if_binary') in create_preprocessor().
+CATEGORY_LEVELS = {'gender': ['Female', 'Male']}
+
+class IncrementalPreprocessor(TransformerMixin, BaseEstimator):
+    """
+    Streaming replacement for create_preprocessor(): categorical features are
+    one-hot encoded against fixed, known levels, and the output column layout
+    matches the batch ColumnTransformer (scaled continuous features, then
+    gender_Male).
+
+    The StandardScaler is fitted on the first batch only and then frozen:
+    updating its statistics with later deltas would silently rescale the
+    inputs of every coefficient learned so far. Call fit() to re-estimate it
+    (which also requires retraining the classifier from scratch).
+    """
+    def partial_fit(self, X: pd.DataFrame, y=None):
+        if not hasattr(self, 'scaler_'):
+            self.scaler_ = StandardScaler().fit(X[CONTINUOUS_FEATURES])
+        return self
+
+    def fit(self, X: pd.DataFrame, y=None):
+        if hasattr(self, 'scaler_'):
+            del self.scaler_
+        return self.partial_fit(X, y)
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        parts = [self.scaler_.transform(X[CONTINUOUS_FEATURES])]
+        for feature in CATEGORICAL_FEATURES:
+            values = X[feature].astype(str).to_numpy()
+            levels = CATEGORY_LEVELS[feature][1:]
+            parts.append(np.column_stack([values == level for level in levels]).astype(np.float64))
+        return np.hstack(parts)
+
+class IncrementalRiskModel(ClassifierMixin, BaseEstimator):
+    """
+    Logistic regression trained by SGD (log loss) with partial_fit, so the
+    model can be updated from only the newly arrived rows. Class imbalance is
+    handled with balanced sample weights from the running class counts, in
+    place of SMOTE, which needs the full training set.
+    """
+    def __init__(self, alpha: float = 1e-4, random_state=RANDOM_STATE):
+        self.alpha = alpha
+        self.random_state = random_state
+
+    def partial_fit(self, X: pd.DataFrame, y: pd.Series):
+        if not hasattr(self, 'classifier_'):
+            self.preprocessor_ = IncrementalPreprocessor()
+            self.classifier_ = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=self.random_state)
+            self.class_counts_ = np.zeros(len(CLASSES), dtype=np.int64)
+            self.n_samples_seen_ = 0
+        y = np.asarray(y)
+        self.class_counts_ += np.bincount(y, minlength=len(CLASSES))
+        self.n_samples_seen_ += len(y)
+
+        self.preprocessor_.partial_fit(X)
+        class_weights = self.n_samples_seen_ / (len(CLASSES) * np.maximum(self.class_counts_, 1))
+        self.classifier_.partial_fit(
+            self.preprocessor_.transform(X), y, classes=CLASSES, sample_weight=class_weights[y]
+        )
+        return self
+
+    def fit(self, X: pd.DataFrame, y: pd.Series):
+        for attribute in ('classifier_', 'preprocessor_', 'class_counts_', 'n_samples_seen_'):
+            if hasattr(self, attribute):
+                delattr(self, attribute)
+        return self.partial_fit(X, y)
+
+    @property
+    def classes_(self):
+        return self.classifier_.classes_
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        return self.classifier_.predict_proba(self.preprocessor_.transform(X))
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.classifier_.predict(self.preprocessor_.transform(X))
+
+def load_current_model(name: str = REGISTERED_MODEL_NAME):
+    """
+    Returns (model, last_id) for the latest registered version, or a fresh
+    model and last_id = 0 if nothing has been registered yet.
+    """
+    try:
+        model = mlflow.sklearn.load_model(f"models:/{name}/latest")
+    except MlflowException:
+        print(f"No registered '{name}' model yet; starting from scratch.")
+        return IncrementalRiskModel(), 0
+    return model, getattr(model, 'last_id_', 0)
+
+def _tracking_ids(chunks, state: dict):
+    """
+    Passes chunks through while recording the highest id seen.
+    """
+    for chunk in chunks:
+        if len(chunk):
+            state['last_id'] = max(state['last_id'], int(chunk['id'].max()))
+        yield chunk
+
+def update_model(model: IncrementalRiskModel, chunks, last_id: int, test_size: float = 0.2) -> dict:
+    """
+    Streams new rows through model.partial_fit. Each chunk is split with the
+    seeded id-hash split (split_stream), so a row's side never changes between
+    updates; the test parts are accumulated only as predictions to score the
+    update.
+    """
+    state = {'last_id': last_id}
+    y_true, y_pred, y_prob = [], [], []
+    n_train = 0
+    for X_train, X_test, y_train, y_test in split_stream(
+        _tracking_ids(chunks, state), TARGET_COLUMN, test_size, RANDOM_STATE
+    ):
+        if len(y_train):
+            model.partial_fit(X_train, y_train)
+            n_train += len(y_train)
+        if len(y_test) and hasattr(model, 'classifier_'):
+            y_true.append(y_test.to_numpy())
+            y_pred.append(model.predict(X_test))
+            y_prob.append(model.predict_proba(X_test)[:, 1])
+
+    model.last_id_ = state['last_id']
+    metrics = {}
+    if y_true:
+        y_true = np.concatenate(y_true)
+        if len(np.unique(y_true)) == len(CLASSES):
+            metrics = get_metrics(y_true, np.concatenate(y_pred), np.concatenate(y_prob))
+    return {'rows_trained': n_train, 'last_id': state['last_id'], 'metrics': metrics}
+
+def run_incremental_update(source: str = 'csv', file_path: str = DATA_FILE, url: str = None):
+    """
+    Updates the latest registered model with rows whose id is above its
+    watermark and registers the result as a new MLflow model version.
+    """
+    mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+    model, last_id = load_current_model()
+
+    if source == 'warehouse':
+        chunks = iter_warehouse_chunks(url, where="id > :last_id", params={'last_id': last_id}, chunksize=CHUNK_SIZE)
+    else:
+        chunks = (
+            chunk[chunk['id'] > last_id]
+            for chunk in pd.read_csv(file_path, dtype=DTYPES, chunksize=CHUNK_SIZE)
+        )
+
+    with mlflow.start_run(run_name="Incremental_Update"):
+        summary = update_model(model, chunks, last_id)
+        if summary['rows_trained'] == 0:
+            print(f"No new rows above id {last_id}; model unchanged.")
+            mlflow.log_param("status", "No new rows")
+            return summary
+
+        mlflow.log_param("source", source)
+        mlflow.log_param("previous_last_id", last_id)
+        mlflow.log_param("last_id", summary['last_id'])
+        mlflow.log_metric("rows_trained", summary['rows_trained'])
+        mlflow.log_metric("n_samples_seen", model.n_samples_seen_)
+        for metric_name, value in summary['metrics'].items():
+            mlflow.log_metric(f"delta_{metric_name.lower().replace(' ', '_')}", value)
+            print(f"Delta {metric_name}: {value:.4f}")
+
+        # skops (the newer default) rejects the custom estimator classes
+        mlflow.sklearn.log_model(
+            model, "model", registered_model_name=REGISTERED_MODEL_NAME, serialization_format='cloudpickle'
+        )
+        print(f"Trained on {summary['rows_trained']} new rows (ids {last_id + 1}..{summary['last_id']}); "
+              f"registered a new version of '{REGISTERED_MODEL_NAME}'.")
+    return summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update the incremental LR model with newly arrived rows.")
+    parser.add_argument('--source', choices=['csv', 'warehouse'], default='csv')
+    parser.add_argument('--file', default=DATA_FILE, help="CSV with new (and optionally old) rows.")
+    parser.add_argument('--url', default=None, help="SQLAlchemy URL of the warehouse.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    run_incremental_update(args.source, args.file, args.url)
@@ -0,0 +1,37 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+# The production pipeline logged by train.py (Logistic Regression run). The app
+# resolves its model from mlflow.db via registry.py and falls back to this path.
+MODEL_PATH = "mlruns/1/models/m-3e191b86b3b74c17bd4ac66aedefda4d/artifacts/model.pkl"
+
+# Define the features that require user input, based on your notebook's setup
+# The order is crucial as the pipeline expects features in this order.
+INPUT_FEATURES = [
+    'age', 'bmi', 'daily_steps', 'sleep_hours', 'water_intake_l',
+    'calories_consumed', 'resting_hr', 'systolic_bp', 'diastolic_bp',
+    'cholesterol', 'family_history', 'smoker', 'alcohol', 'gender'
+]
+CATEGORICAL_INPUTS = ['gender'] # Every other input feature is numeric
+NUMERIC_INPUTS = [f for f in INPUT_FEATURES if f not in CATEGORICAL_INPUTS]
+
+def load_pipeline(model_path: str = MODEL_PATH):
+    """
+    Loads a fitted scikit-learn/ImbPipeline model from disk with joblib.
+    """
+    return joblib.load(model_path)
+
+def score_frame(model, input_data: pd.DataFrame):
+    """
+    Scores a DataFrame with a single predict_proba pass.
+
+    Returns (predictions, probabilities) where probabilities are for the
+    positive class. Labels are derived from the same probability matrix the
+    way scikit-learn classifiers do it (argmax over classes_), so the pipeline
+    only runs once per row.
+    """
+    proba = model.predict_proba(input_data[INPUT_FEATURES])
+    predictions = np.asarray(model.classes_).take(np.argmax(proba, axis=1))
+    return predictions, proba[:, 1]
@@ -0,0 +1,181 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# --- Configuration ---
+PROFILE_DIR = 'data/profiles' # Where opt-in cProfile dumps are written
+PROFILE_TOP_N = 30 # Functions listed in the text summary next to each .prof dump
+PEAK_RSS_KEY = 'peak_rss_mb' # Entry in as_dict() carrying a (worker) process's peak RSS
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def current_rss_mb() -> float:
+    """
+    Current resident set size, from /proc on Linux (falls back to the peak elsewhere).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+def _metric_name(stage_name: str) -> str:
+    return stage_name.lower().replace(' ', '_')
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the kernel's peak-RSS counter (Linux 4.0+, /proc/self/clear_refs),
+    so peak_rss_mb() then reports the peak since this call. Returns False
+    where unsupported, in which case peak_rss_mb() keeps the process peak.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class StageTimings:
+    """
+    Collects wall-clock durations per named stage. Repeated stages (e.g. one
+    fit per fold) accumulate, and their call count and the RSS after the
+    latest call are kept alongside. Pool workers return as_dict(), which also
+    carries their peak RSS; merge() keeps the largest as worker_peak_rss_mb.
+
+        timings = StageTimings()
+        with timings.stage('load_data'):
+            df = load_data(...)
+
+        @timings.timed('predict')
+        def predict(...): ...
+    """
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.rss_after_mb = {}
+        self.worker_peak_rss_mb = 0.0
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+            self.rss_after_mb[name] = current_rss_mb()
+
+    def timed(self, name: str = None):
+        """
+        Decorator form of stage(); the stage name defaults to the function name.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        """
+        Records a duration measured elsewhere, e.g. returned by a pool worker.
+        """
+        self.seconds[name] += seconds
+        self.calls[name] += calls
+
+    def merge(self, other: dict, prefix: str = ''):
+        """
+        Adds a {stage: seconds} dict (as returned by as_dict()) into these
+        timings. A PEAK_RSS_KEY entry updates worker_peak_rss_mb instead.
+        """
+        for name, seconds in other.items():
+            if name == PEAK_RSS_KEY:
+                self.worker_peak_rss_mb = max(self.worker_peak_rss_mb, seconds)
+            else:
+                self.add(f"{prefix}{name}", seconds)
+
+    def as_dict(self) -> dict:
+        """
+        {stage: seconds} plus this process's peak RSS under PEAK_RSS_KEY.
+        """
+        return {**self.seconds, PEAK_RSS_KEY: peak_rss_mb()}
+
+    def to_metrics(self, prefix: str = 'time_') -> dict:
+        """
+        MLflow-ready metrics: <prefix><stage>_s per stage, rss_after_<stage>_mb
+        for stages run in this process, its peak RSS and the largest worker
+        peak RSS merged in.
+        """
+        metrics = {f"{prefix}{_metric_name(name)}_s": seconds for name, seconds in self.seconds.items()}
+        metrics.update({f"rss_after_{_metric_name(name)}_mb": rss for name, rss in self.rss_after_mb.items()})
+        metrics[PEAK_RSS_KEY] = peak_rss_mb()
+        if self.worker_peak_rss_mb:
+            metrics["worker_peak_rss_mb"] = self.worker_peak_rss_mb
+        return metrics
+
+    def log_to_mlflow(self, prefix: str = 'time_'):
+        import mlflow
+
+        mlflow.log_metrics(self.to_metrics(prefix))
+
+    def summary(self) -> str:
+        lines = [f"{'Stage':<32}{'Seconds':>10}{'Calls':>7}{'RSS MB':>9}"]
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            rss = f"{self.rss_after_mb[name]:.0f}" if name in self.rss_after_mb else "-"
+            lines.append(f"{name:<32}{seconds:>10.3f}{self.calls[name]:>7}{rss:>9}")
+        lines.append(f"Peak RSS: {peak_rss_mb():.0f} MB")
+        if self.worker_peak_rss_mb:
+            lines.append(f"Worker peak RSS: {self.worker_peak_rss_mb:.0f} MB")
+        return "\n".join(lines)
+
+# Process-wide default, for code that has no timings object threaded through.
+TIMINGS = StageTimings()
+stage = TIMINGS.stage
+timed = TIMINGS.timed
+
+@contextmanager
+def profiled(name: str, enabled: bool = True, output_dir: str = PROFILE_DIR, log_to_mlflow: bool = True):
+    """
+    Opt-in cProfile around a block. Writes <output_dir>/<name>-<timestamp>.prof
+    (open with snakeviz or pstats) and a cumulative-time text summary, and
+    logs both as artifacts of the active MLflow run. A no-op when disabled.
+
+    Only the current process is profiled; sweep workers report their stage
+    timings back instead.
+    """
+    if not enabled:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        profiler.dump_stats(f"{stem}.prof")
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        with open(f"{stem}.txt", 'w') as f:
+            f.write(text.getvalue())
+        print(f"Profile written to {stem}.prof")
+        if log_to_mlflow:
+            import mlflow
+
+            if mlflow.active_run() is not None:
+                mlflow.log_artifact(f"{stem}.prof", "profiles")
+                mlflow.log_artifact(f"{stem}.txt", "profiles")
@@ -0,0 +1,178 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import mlflow
+import mlflow.sklearn
+from mlflow.entities import Metric, Param, RunStatus
+from mlflow.tracking import MlflowClient
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+# --- Configuration ---
+# MlflowClient.log_batch limits per request
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+
+class MlflowLogger:
+    """
+    Buffered MLflow tracking for the training loop.
+
+    Params and metrics are kept in memory per run and written with one
+    MlflowClient.log_batch call when the run closes, the buffer fills or a
+    model is logged. Batches, model serialisation, artifact writes and run
+    termination go to a single background writer thread, so the loop
+    continues while a pipeline is pickled and copied and those writes never
+    contend for the SQLite lock. Runs themselves are created on the calling
+    thread, since their id is needed straight away.
+
+    close() (or leaving the `with` block) is the barrier: it flushes every
+    buffer, waits for all queued writes and re-raises the first failure.
+
+        with mlflow.start_run(run_name="Overall_Training_Run"), MlflowLogger() as logger:
+            with logger.run("XGBoost"):
+                logger.log_metric("cv_mean_f1_score", 0.41)
+                logger.log_model(pipeline, "model")
+    """
+    def __init__(self):
+        self.client = MlflowClient()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-writer")
+        self._futures = []
+        self._buffers = {}
+        self._run_stack = []
+        self._experiment_ids = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Runs ---
+    def _current_run_id(self, run_id: str = None) -> str:
+        if run_id:
+            return run_id
+        if self._run_stack:
+            return self._run_stack[-1]
+        active = mlflow.active_run()
+        if active is None:
+            raise RuntimeError("No active MLflow run; start one or pass run_id.")
+        return active.info.run_id
+
+    @contextmanager
+    def run(self, run_name: str, nested: bool = True):
+        """
+        Creates a (nested) run without making it the fluent active run and
+        yields its run_id. Logging calls inside the block default to it.
+        Must be used inside an active fluent run (the experiment is taken
+        from it).
+        """
+        active = mlflow.active_run()
+        parent_id = self._current_run_id() if nested else None
+        experiment_id = self._experiment_ids.get(parent_id) or active.info.experiment_id
+        tags = {MLFLOW_PARENT_RUN_ID: parent_id} if parent_id else {}
+        run_id = self.client.create_run(experiment_id, run_name=run_name, tags=tags).info.run_id
+        self._experiment_ids[run_id] = experiment_id
+        self._run_stack.append(run_id)
+        status = RunStatus.to_string(RunStatus.FINISHED)
+        try:
+            yield run_id
+        except BaseException:
+            status = RunStatus.to_string(RunStatus.FAILED)
+            raise
+        finally:
+            self._run_stack.pop()
+            self.flush(run_id)
+            self._submit(self.client.set_terminated, run_id, status)
+
+    # --- Buffered params and metrics ---
+    def _buffer(self, run_id: str) -> dict:
+        return self._buffers.setdefault(run_id, {"params": {}, "metrics": []})
+
+    def log_param(self, key: str, value, run_id: str = None):
+        self.log_params({key: value}, run_id)
+
+    def log_params(self, params: dict, run_id: str = None):
+        run_id = self._current_run_id(run_id)
+        with self._lock:
+            self._buffer(run_id)["params"].update({key: str(value) for key, value in params.items()})
+
+    def log_metric(self, key: str, value: float, step: int = 0, run_id: str = None):
+        self.log_metrics({key: value}, step, run_id)
+
+    def log_metrics(self, metrics: dict, step: int = 0, run_id: str = None):
+        run_id = self._current_run_id(run_id)
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            buffer = self._buffer(run_id)
+            buffer["metrics"].extend(Metric(key, float(value), timestamp, step) for key, value in metrics.items())
+            full = len(buffer["metrics"]) >= MAX_METRICS_PER_BATCH
+        if full:
+            self.flush(run_id)
+
+    def flush(self, run_id: str = None):
+        """
+        Queues a log_batch write of the buffered params/metrics of one run
+        (or of every run when run_id is None).
+        """
+        with self._lock:
+            run_ids = [run_id] if run_id else list(self._buffers)
+            batches = [(rid, self._buffers.pop(rid)) for rid in run_ids if rid in self._buffers]
+        for rid, buffer in batches:
+            params = [Param(key, value) for key, value in buffer["params"].items()]
+            self._submit(self._write_batch, rid, params, buffer["metrics"])
+
+    def _write_batch(self, run_id: str, params: list, metrics: list):
+        for start in range(0, len(params), MAX_PARAMS_PER_BATCH):
+            self.client.log_batch(run_id, params=params[start:start + MAX_PARAMS_PER_BATCH])
+        for start in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+            self.client.log_batch(run_id, metrics=metrics[start:start + MAX_METRICS_PER_BATCH])
+
+    # --- Background artifact writes ---
+    def _submit(self, func, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("MlflowLogger is closed.")
+        self._futures.append(self._writer.submit(func, *args, **kwargs))
+
+    def log_text(self, text: str, artifact_file: str, run_id: str = None):
+        self._submit(self.client.log_text, self._current_run_id(run_id), text, artifact_file)
+
+    def log_model(self, model, name: str = "model", run_id: str = None, **kwargs):
+        """
+        Serialises and logs an sklearn model in the writer thread. The active
+        run stack is thread-local, so the writer resumes the run there and
+        log_model links the logged model to it as usual.
+
+        The run's buffered params/metrics are queued first: MLflow copies the
+        metrics a run already has onto the logged model (which is what
+        registry.resolve_model ranks by), and the writer runs in order.
+        """
+        run_id = self._current_run_id(run_id)
+        self.flush(run_id)
+        self._submit(self._write_model, run_id, model, name, kwargs)
+
+    @staticmethod
+    def _write_model(run_id: str, model, name: str, kwargs: dict):
+        # registry.py loads model.pkl, and skops (the newer default) rejects
+        # custom estimators such as FoldEnsemble, so pin the pickle format.
+        kwargs = {'serialization_format': 'cloudpickle', **kwargs}
+        with mlflow.start_run(run_id=run_id):
+            mlflow.sklearn.log_model(model, name, **kwargs)
+
+    # --- Barrier ---
+    def close(self):
+        """
+        Flushes all buffers, waits for every queued write and shuts the writer
+        down. Raises the first error raised by a background write.
+        """
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._writer.shutdown(wait=True)
+        errors = [future.exception() for future in self._futures if future.exception() is not None]
+        self._futures = []
+        if errors:
+            raise errors[0]
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import numbers
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from inference import INPUT_FEATURES, score_frame
+
+# --- Configuration ---
+MAX_ENTRIES = 100_000 # ~200 bytes per entry, so roughly 20 MB at most
+TTL_SECONDS = 3600.0
+FLOAT_PRECISION = 6 # Decimals kept when canonicalizing numeric inputs (29 == 29.0 == 29.0000001)
+VERSION_CHECK_SECONDS = 1.0 # How often the model artifact is re-stat'ed for changes
+RESOLVE_CHECK_SECONDS = 10.0 # How often resolve_path (e.g. the MLflow registry) is asked for the current model
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache of (prediction, probability) results in front
+    of score_frame().
+
+    Keys are the SHA-256 of the canonical INPUT_FEATURES vector (numbers
+    rounded to FLOAT_PRECISION, strings stripped) plus the model version.
+    The version is the artifact's mtime and size when model_path is given,
+    so replacing the artifact clears the cache automatically; otherwise pass
+    an explicit model_version.
+
+    resolve_path, if given, is called (at most every RESOLVE_CHECK_SECONDS)
+    to get the current model path, e.g. from registry.resolve_model. When a
+    different model is selected there, the cache follows the new path and
+    clears itself, so a newly logged model does not need a restart.
+    """
+    def __init__(
+        self,
+        model_path: str = None,
+        model_version: str = None,
+        max_entries: int = MAX_ENTRIES,
+        ttl_seconds: float = TTL_SECONDS,
+        precision: int = FLOAT_PRECISION,
+        resolve_path=None
+    ):
+        self.resolve_path = resolve_path
+        self.model_path = model_path or (resolve_path() if resolve_path else None)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = model_version or self._artifact_version() or 'unversioned'
+        self._checked_at = self._resolved_at = time.monotonic()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _artifact_version(self) -> str:
+        if not self.model_path:
+            return None
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return f"{self.model_path}:{stat.st_mtime_ns}-{stat.st_size}"
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def check_version(self, force: bool = False) -> bool:
+        """
+        Re-resolves the model path (if resolve_path is set), re-stats the
+        artifact (at most every VERSION_CHECK_SECONDS) and clears the cache if
+        either changed. Returns True when it was invalidated.
+        """
+        now = time.monotonic()
+        if not self.model_path or (not force and now - self._checked_at < VERSION_CHECK_SECONDS):
+            return False
+        self._checked_at = now
+        if self.resolve_path and (force or now - self._resolved_at >= RESOLVE_CHECK_SECONDS):
+            self._resolved_at = now
+            try:
+                self.model_path = self.resolve_path()
+            except Exception as e:
+                print(f"Model resolution failed ({e}); keeping {self.model_path}")
+        version = self._artifact_version()
+        if version is None or version == self._version:
+            return False
+        with self._lock:
+            self._version = version
+            self._entries.clear()
+            self.invalidations += 1
+        print(f"Model artifact {self.model_path} changed; prediction cache cleared.")
+        return True
+
+    def key(self, values) -> bytes:
+        """
+        Returns the cache key for one INPUT_FEATURES-ordered value sequence.
+        """
+        canonical = [
+            round(float(v), self.precision) if isinstance(v, numbers.Number) else str(v).strip()
+            for v in values
+        ]
+        payload = json.dumps([self._version, canonical], separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).digest()
+
+    def get(self, key: bytes):
+        """
+        Returns the cached (prediction, probability) or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: bytes, prediction, probability: float):
+        with self._lock:
+            self._entries[key] = (prediction, probability, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def score_frame(self, model, input_data: pd.DataFrame):
+        """
+        Cached drop-in for inference.score_frame: only rows missing from the
+        cache go through the model, in one predict_proba call.
+        """
+        self.check_version()
+        keys = [self.key(row) for row in input_data[INPUT_FEATURES].itertuples(index=False, name=None)]
+        results = [self.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            predictions, probabilities = score_frame(model, input_data.iloc[missing])
+            for i, prediction, probability in zip(missing, predictions.tolist(), probabilities.tolist()):
+                results[i] = (prediction, probability)
+                self.put(keys[i], prediction, probability)
+        return (
+            np.asarray([result[0] for result in results]),
+            np.asarray([result[1] for result in results], dtype=np.float64),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self._version,
+        }
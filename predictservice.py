@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import json
+import time
+from bisect import bisect_left
+
+import pandas as pd
+
+from fastpath import validate_rows
+from inference import MODEL_PATH, INPUT_FEATURES, NUMERIC_INPUTS, CATEGORICAL_INPUTS, load_pipeline, score_frame
+from predcache import PredictionCache, MAX_ENTRIES
+
+# --- Configuration ---
+HOST = "127.0.0.1"
+PORT = 8080
+MAX_BATCH_ROWS = 256      # Flush a micro-batch once it holds this many rows...
+MAX_WAIT_MS = 5.0         # ...or once the oldest queued request has waited this long.
+MAX_BODY_BYTES = 10 * 1024 * 1024
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+ROUTES = ('/health', '/metrics', '/predict', '/predict/batch') # Latency is tracked per route; anything else is "other"
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds in `unit` (e.g. 'ms'
+    for request latency, 'rows' for batch sizes).
+    """
+    def __init__(self, bounds=LATENCY_BUCKETS_MS, unit: str = 'ms'):
+        self.bounds = list(bounds)
+        self.unit = unit
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        labels = [str(b) for b in self.bounds] + ["+Inf"]
+        cumulative, running = {}, 0
+        for label, count in zip(labels, self.counts):
+            running += count
+            cumulative[label] = running
+        return {
+            "count": self.total,
+            f"sum_{self.unit}": round(self.sum, 3),
+            f"mean_{self.unit}": round(self.sum / self.total, 3) if self.total else 0.0,
+            f"buckets_{self.unit}": cumulative,
+        }
+
+def row_buckets(max_rows: int) -> list:
+    """
+    Powers of two up to max_rows, plus max_rows itself: 1, 2, 4, ..., max_rows.
+    """
+    bounds = [1 << i for i in range(max(max_rows, 1).bit_length()) if 1 << i < max_rows]
+    return bounds + [max_rows]
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into a single predict_proba call
+    of up to `max_batch_rows` rows or `max_wait_ms` milliseconds, whichever
+    comes first. The model runs in a worker thread so the event loop keeps
+    accepting connections while a batch is being scored.
+    """
+    def __init__(self, model, max_batch_rows: int = MAX_BATCH_ROWS, max_wait_ms: float = MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batch_sizes = Histogram(row_buckets(max_batch_rows), unit='rows')
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, rows: list) -> list:
+        """
+        Queues a list of feature dicts and waits for their (prediction, probability) pairs.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((rows, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait_s
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            rows = [row for item_rows, _ in pending for row in item_rows]
+            try:
+                predictions, probabilities = await loop.run_in_executor(None, self._score, rows)
+                self.batch_sizes.observe(len(rows))
+            except Exception:
+                # Isolate the failure: re-score each request on its own so
+                # only the request(s) that break the model get the error.
+                for item_rows, future in pending:
+                    try:
+                        result = await loop.run_in_executor(None, self._score, item_rows)
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        self._resolve(future, *result)
+                continue
+
+            offset = 0
+            for item_rows, future in pending:
+                n = len(item_rows)
+                self._resolve(future, predictions[offset:offset + n], probabilities[offset:offset + n])
+                offset += n
+
+    def _score(self, rows: list):
+        return score_frame(self.model, pd.DataFrame.from_records(rows, columns=INPUT_FEATURES))
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, predictions, probabilities):
+        if not future.done():
+            future.set_result([(int(p), float(prob)) for p, prob in zip(predictions, probabilities)])
+
+class PredictionService:
+    """
+    Minimal asyncio HTTP/1.1 server exposing:
+      GET  /health         liveness and model status
+      GET  /metrics        per-endpoint latency histograms and batch sizes
+      POST /predict        one patient as a JSON object
+      POST /predict/batch  {"instances": [...]} or a JSON list of patients
+
+    With a PredictionCache, repeated patients are answered from the cache and
+    only misses are queued for the model. When the cache sees the artifact
+    change on disk, the model is reloaded from cache.model_path; requests wait
+    for the reload so cached results always come from the current model.
+    """
+    def __init__(
+        self,
+        model,
+        max_batch_rows: int = MAX_BATCH_ROWS,
+        max_wait_ms: float = MAX_WAIT_MS,
+        cache: PredictionCache = None
+    ):
+        self.model = model
+        self.batcher = MicroBatcher(model, max_batch_rows, max_wait_ms)
+        self.cache = cache
+        self.model_version = cache.version if cache is not None else None
+        self._reload_lock = asyncio.Lock()
+        self.latency = {}
+        self.started_at = time.time()
+
+    async def serve(self, host: str = HOST, port: int = PORT):
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Prediction service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "Malformed request line."}, keep_alive=False)
+                    break
+                method, path, version = parts
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length header."}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                start = time.perf_counter()
+                status, payload = await self._route(method, path.split('?', 1)[0], body)
+                self._observe(path.split('?', 1)[0], (time.perf_counter() - start) * 1000.0)
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes):
+        if method == 'GET' and path == '/health':
+            return 200, {
+                "status": "ok",
+                "model_loaded": self.model is not None,
+                "queue_depth": self.batcher.queue.qsize(),
+                "uptime_s": round(time.time() - self.started_at, 1),
+            }
+        if method == 'GET' and path == '/metrics':
+            metrics = {
+                "latency": {route: hist.to_dict() for route, hist in self.latency.items()},
+                "batch_rows": self.batcher.batch_sizes.to_dict(),
+            }
+            if self.cache is not None:
+                metrics["cache"] = self.cache.stats()
+            return 200, metrics
+        if method == 'POST' and path in ('/predict', '/predict/batch'):
+            try:
+                data = json.loads(body or b'null')
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"Invalid JSON: {e}"}
+
+            if path == '/predict':
+                rows = [data]
+            else:
+                rows = data.get('instances') if isinstance(data, dict) else data
+
+            error = validate_rows(rows, NUMERIC_INPUTS, CATEGORICAL_INPUTS)
+            if error:
+                return 400, {"error": error}
+
+            try:
+                results = await self._predict(rows)
+            except Exception as e:
+                return 500, {"error": f"Prediction error: {e}"}
+
+            predictions = [{"prediction": p, "probability": prob} for p, prob in results]
+            if path == '/predict':
+                return 200, predictions[0]
+            return 200, {"predictions": predictions}
+        return 404, {"error": f"No route for {method} {path}"}
+
+    async def _predict(self, rows: list) -> list:
+        """
+        Returns (prediction, probability) pairs for rows, going through the
+        cache (if any) and micro-batching only the misses.
+        """
+        if self.cache is None:
+            return await self.batcher.submit(rows)
+        await self._ensure_current_model()
+
+        # No await between the version check and key building, so the keys
+        # carry the version of the model that is now being served.
+        version = self.model_version
+        keys = [self.cache.key([row[f] for f in INPUT_FEATURES]) for row in rows]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            scored = await self.batcher.submit([rows[i] for i in missing])
+            # A reload during scoring may have mixed models; answer, but do not cache.
+            store = self.model_version == version
+            for i, (prediction, probability) in zip(missing, scored):
+                results[i] = (prediction, probability)
+                if store:
+                    self.cache.put(keys[i], prediction, probability)
+        return results
+
+    async def _ensure_current_model(self):
+        """
+        Reloads the model when the cache reports a new artifact version. All
+        requests wait on one lock until the served model matches the cache
+        version, so nothing is scored by the old model and stored under the
+        new version while the reload is in flight.
+        """
+        self.cache.check_version()
+        if self.model_version == self.cache.version:
+            return
+        async with self._reload_lock:
+            while self.model_version != self.cache.version:
+                version, path = self.cache.version, self.cache.model_path
+                model = await asyncio.get_running_loop().run_in_executor(None, load_pipeline, path)
+                self.model = self.batcher.model = model
+                self.model_version = version
+
+    def _observe(self, path: str, latency_ms: float):
+        path = path if path in ROUTES else 'other'  # Bounded: 404 scans must not grow the dict
+        if path not in self.latency:
+            self.latency[path] = Histogram(LATENCY_BUCKETS_MS, unit='ms')
+        self.latency[path].observe(latency_ms)
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {reasons.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve disease-risk predictions over HTTP.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the joblib/pickle pipeline.")
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--cache-size', type=int, default=MAX_ENTRIES, help="Prediction cache entries (0 = off).")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    cache = PredictionCache(model_path=args.model, max_entries=args.cache_size) if args.cache_size else None
+    service = PredictionService(load_pipeline(args.model), args.max_batch_rows, args.max_wait_ms, cache)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
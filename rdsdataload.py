@@ -1,7 +1,17 @@
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import (
+    create_engine, text, MetaData, Table, Column, Integer, SmallInteger, Float, String, insert
+)
+from sqlalchemy.dialects import mysql, sqlite
 import urllib.parse
 
+from dataloader import DTYPES
+
 # ---------------------------------------------------------
 # CONFIGURATION
 # ---------------------------------------------------------
@@ -11,46 +21,199 @@ DB_HOST = 'database-1.cnqscyas2poo.us-east-2.rds.amazonaws.com'
 DB_PORT = '3306'
 NEW_DB_NAME = 'health_lifestyle_db'  # We will create this specific DB
 FILE_PATH = 'data/health_lifestyle_dataset.csv'
+TABLE_NAME = 'life_style_data'
+CHUNK_SIZE = 20_000   # Rows per multi-row INSERT batch
+N_WRITERS = 4         # Parallel chunk writers (one pooled connection each)
+
+# ---------------------------------------------------------
+# TABLE DDL
+# ---------------------------------------------------------
+# Plain Float is single-precision FLOAT on MySQL; FLOAT(53) is DOUBLE there
+# and stays REAL/DOUBLE PRECISION on SQLite and PostgreSQL.
+DOUBLE = Float(precision=53)
+metadata = MetaData()
+life_style_data = Table(
+    TABLE_NAME, metadata,
+    Column('id', Integer, primary_key=True, autoincrement=False),
+    Column('age', SmallInteger, nullable=False),
+    Column('gender', String(16), nullable=False),
+    Column('bmi', DOUBLE, nullable=False),
+    Column('daily_steps', Integer, nullable=False),
+    Column('sleep_hours', DOUBLE, nullable=False),
+    Column('water_intake_l', DOUBLE, nullable=False),
+    Column('calories_consumed', SmallInteger, nullable=False),
+    Column('smoker', SmallInteger, nullable=False),
+    Column('alcohol', SmallInteger, nullable=False),
+    Column('resting_hr', SmallInteger, nullable=False),
+    Column('systolic_bp', SmallInteger, nullable=False),
+    Column('diastolic_bp', SmallInteger, nullable=False),
+    Column('cholesterol', SmallInteger, nullable=False),
+    Column('family_history', SmallInteger, nullable=False),
+    Column('disease_risk', SmallInteger, nullable=False),
+)
+COLUMNS = [c.name for c in life_style_data.columns]
+
+_ENGINES = {}
+
+def build_mysql_url(db_name: str) -> str:
+    encoded_password = urllib.parse.quote_plus(DB_PASSWORD)
+    return f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{db_name}"
+
+def get_engine(url: str, pool_size: int = N_WRITERS):
+    """
+    Returns a pooled engine, created once per URL and reused across calls.
+    MySQL engines allow LOAD DATA LOCAL INFILE and recycle idle connections.
+    """
+    if url not in _ENGINES:
+        if url.startswith('sqlite'):
+            _ENGINES[url] = create_engine(url)
+        else:
+            _ENGINES[url] = create_engine(
+                url,
+                pool_size=pool_size,
+                max_overflow=pool_size,
+                pool_pre_ping=True,
+                pool_recycle=3600,
+                connect_args={'local_infile': True},
+            )
+    return _ENGINES[url]
 
 def create_database_if_not_exists():
     """
     Connects to the MySQL server (sys database) to create the new database.
     """
-    encoded_password = urllib.parse.quote_plus(DB_PASSWORD)
-    
     # Connect to the 'mysql' system database just to run the CREATE command
     # We use 'mysql' or empty database to establish the initial connection
-    server_connection_str = f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/mysql"
-    
-    engine = create_engine(server_connection_str)
-    
+    engine = get_engine(build_mysql_url('mysql'), pool_size=1)
+
     with engine.connect() as conn:
         # We must use commit() because CREATE DATABASE cannot run inside a transaction block in some drivers
-        conn.execute(text("COMMIT")) 
+        conn.execute(text("COMMIT"))
         conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {NEW_DB_NAME}"))
         print(f"✅ Database '{NEW_DB_NAME}' exists or was created successfully.")
 
-def load_data_to_rds():
+def _build_insert(dialect_name: str, mode: str):
+    """
+    Returns the INSERT statement for a load mode. 'upsert' updates existing
+    rows by primary key (ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE).
+    """
+    if mode != 'upsert':
+        return insert(life_style_data)
+    non_key = [c for c in COLUMNS if c != 'id']
+    if dialect_name == 'mysql':
+        stmt = mysql.insert(life_style_data)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in non_key})
+    if dialect_name == 'sqlite':
+        stmt = sqlite.insert(life_style_data)
+        return stmt.on_conflict_do_update(index_elements=['id'], set_={c: stmt.excluded[c] for c in non_key})
+    raise ValueError(f"Upsert is not implemented for the '{dialect_name}' dialect.")
+
+def _write_chunk(engine, stmt, chunk: pd.DataFrame) -> int:
+    """
+    Writes one chunk in a single transaction. SQLAlchemy batches the
+    executemany into multi-row INSERT ... VALUES statements.
+    """
+    records = chunk[COLUMNS].to_dict('records')
+    with engine.begin() as conn:
+        conn.execute(stmt, records)
+    return len(records)
+
+def _load_infile(engine, file_path: str, mode: str) -> int:
+    """
+    MySQL fast path: server-side CSV parse with LOAD DATA LOCAL INFILE.
+    'upsert' uses REPLACE semantics on the primary key.
+    """
+    duplicate_handling = 'REPLACE' if mode == 'upsert' else ''
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            f"LOAD DATA LOCAL INFILE :path {duplicate_handling} INTO TABLE {TABLE_NAME} "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+            f"({', '.join(COLUMNS)})"
+        ), {'path': file_path})
+        return result.rowcount
+
+def bulk_load(
+    url: str,
+    file_path: str = FILE_PATH,
+    mode: str = 'replace',
+    method: str = 'insert',
+    chunk_size: int = CHUNK_SIZE,
+    n_writers: int = N_WRITERS
+) -> dict:
+    """
+    Loads the CSV into TABLE_NAME using the explicit DDL above.
+
+    mode: 'replace' drops and recreates the table; 'append' inserts into the
+        existing table; 'upsert' inserts new ids and updates existing ones,
+        so reloads and incremental files never rebuild the table.
+    method: 'insert' streams typed CSV chunks to n_writers parallel writers
+        with multi-row INSERTs; 'infile' uses LOAD DATA LOCAL INFILE (MySQL).
+
+    Returns {"rows", "seconds", "rows_per_second"}.
+    """
+    engine = get_engine(url, pool_size=n_writers)
+    dialect_name = engine.dialect.name
+    if dialect_name == 'sqlite' and n_writers > 1:
+        print("SQLite allows a single writer; using 1 writer thread.")
+        n_writers = 1
+
+    if mode == 'replace':
+        metadata.drop_all(engine, tables=[life_style_data])
+    metadata.create_all(engine, tables=[life_style_data])
+
+    start = time.perf_counter()
+    n_rows = 0
+    if method == 'infile':
+        if dialect_name != 'mysql':
+            raise ValueError("LOAD DATA LOCAL INFILE is only available on MySQL/MariaDB.")
+        n_rows = _load_infile(engine, file_path, mode)
+    else:
+        stmt = _build_insert(dialect_name, mode)
+        # Integers keep the compact DTYPES widths; floats are parsed as float64
+        # so the DOUBLE (FLOAT(53)) columns store 29.1, not float32's 29.100000381469727.
+        dtype = {c: ('float64' if t.startswith('float') else t) for c, t in DTYPES.items() if t != 'category'}
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=n_writers) as executor:
+            for chunk in pd.read_csv(file_path, usecols=COLUMNS, dtype=dtype, chunksize=chunk_size):
+                pending.append(executor.submit(_write_chunk, engine, stmt, chunk))
+                if len(pending) >= 2 * n_writers:
+                    n_rows += pending.popleft().result()
+            while pending:
+                n_rows += pending.popleft().result()
+
+    seconds = time.perf_counter() - start
+    stats = {"rows": n_rows, "seconds": seconds, "rows_per_second": n_rows / max(seconds, 1e-9)}
+    print(f"Loaded {n_rows} rows into '{TABLE_NAME}' in {seconds:.2f}s ({stats['rows_per_second']:,.0f} rows/s)")
+    return stats
+
+def load_data_to_rds(mode: str = 'replace', method: str = 'insert'):
     try:
         # 1. Ensure the database exists
         create_database_if_not_exists()
 
-        # 2. Connect to the NEW database
-        encoded_password = urllib.parse.quote_plus(DB_PASSWORD)
-        db_connection_str = f"mysql+pymysql://{DB_USER}:{encoded_password}@{DB_HOST}:{DB_PORT}/{NEW_DB_NAME}"
-        engine = create_engine(db_connection_str)
-
-        # 3. Load and Upload Data
-        print(f"Reading data from {FILE_PATH}...")
-        df = pd.read_csv(FILE_PATH)
-        
-        print(f"Uploading {len(df)} rows to table 'life_style_data' in DB '{NEW_DB_NAME}'...")
-        df.to_sql('life_style_data', con=engine, if_exists='replace', index=False)
-        
+        # 2. Load and Upload Data to the NEW database
+        print(f"Uploading {FILE_PATH} to table '{TABLE_NAME}' in DB '{NEW_DB_NAME}' ({mode}, {method})...")
+        bulk_load(build_mysql_url(NEW_DB_NAME), FILE_PATH, mode=mode, method=method)
+
         print("✅ Data loaded successfully!")
 
     except Exception as e:
         print(f"❌ Error: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-load the lifestyle CSV into MySQL (or a local stand-in).")
+    parser.add_argument('--url', default=None, help="SQLAlchemy URL, e.g. sqlite:///data/warehouse.db. Defaults to the RDS instance.")
+    parser.add_argument('--file', default=FILE_PATH)
+    parser.add_argument('--mode', choices=['replace', 'append', 'upsert'], default='replace')
+    parser.add_argument('--method', choices=['insert', 'infile'], default='insert')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--writers', type=int, default=N_WRITERS)
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    load_data_to_rds()
\ No newline at end of file
+    args = parse_args()
+    if args.url is None:
+        load_data_to_rds(args.mode, args.method)
+    else:
+        bulk_load(args.url, args.file, args.mode, args.method, args.chunk_size, args.writers)
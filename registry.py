@@ -0,0 +1,182 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import joblib
+import pandas as pd
+
+from inference import INPUT_FEATURES, MODEL_PATH, load_pipeline, score_frame
+
+# --- Configuration ---
+MLFLOW_DB = 'mlflow.db' # Local MLflow tracking store (sqlite)
+MLRUNS_DIR = 'mlruns' # Local artifact root the logged artifact_location values point into
+MODEL_FILENAME = 'model.pkl' # Pickled sklearn flavor inside each logged model's artifacts
+SELECTION_METRIC = 'test_recall' # The app's model was chosen for its Recall
+MMAP_CACHE_DIR = 'models/.mmap' # joblib re-dumps of artifacts, loadable with mmap_mode='r'
+# A typical patient (the app's form defaults), used to pre-warm the model.
+WARMUP_RECORD = {
+    'age': 48, 'bmi': 29.0, 'daily_steps': 10000, 'sleep_hours': 6.5, 'water_intake_l': 2.75,
+    'calories_consumed': 2600, 'resting_hr': 74, 'systolic_bp': 135, 'diastolic_bp': 90,
+    'cholesterol': 224, 'family_history': 0, 'smoker': 0, 'alcohol': 0, 'gender': 'Female',
+}
+
+# Latest value of each model's metrics (a metric can be logged at several steps).
+_MODELS_QUERY = """
+SELECT m.model_id, m.experiment_id, m.name, m.artifact_location, m.creation_timestamp_ms,
+       m.source_run_id, r.name, metric.metric_value
+FROM logged_models m
+LEFT JOIN runs r ON r.run_uuid = m.source_run_id
+LEFT JOIN (
+    SELECT model_id, metric_value,
+           ROW_NUMBER() OVER (PARTITION BY model_id ORDER BY metric_timestamp_ms DESC, metric_step DESC) AS rn
+    FROM logged_model_metrics WHERE metric_name = :metric
+) metric ON metric.model_id = m.model_id AND metric.rn = 1
+WHERE m.status = 2 AND m.lifecycle_stage = 'active'
+"""
+_MODEL_COLUMNS = [
+    'model_id', 'experiment_id', 'name', 'artifact_location', 'created_ms', 'run_id', 'run_name', 'metric_value'
+]
+
+def local_artifact_path(artifact_location: str, mlruns_dir: str = MLRUNS_DIR) -> str:
+    """
+    Maps a logged artifact_location to a readable local directory. Locations
+    recorded on another machine (absolute paths into someone else's checkout)
+    are remapped to the same suffix under the local mlruns directory.
+    """
+    path = artifact_location[len('file://'):] if artifact_location.startswith('file://') else artifact_location
+    if os.path.isdir(path):
+        return path
+    parts = path.replace('\\', '/').split('/')
+    if 'mlruns' in parts:
+        last_mlruns = len(parts) - 1 - parts[::-1].index('mlruns')
+        return os.path.join(mlruns_dir, *parts[last_mlruns + 1:])
+    return path
+
+def list_models(db_path: str = MLFLOW_DB, metric: str = SELECTION_METRIC, experiment_id: int = None) -> pd.DataFrame:
+    """
+    Returns the READY, active logged models with their latest `metric` value
+    and local model file path, newest first.
+    """
+    query = _MODELS_QUERY + (" AND m.experiment_id = :experiment_id" if experiment_id is not None else "")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(query, {'metric': metric, 'experiment_id': experiment_id}).fetchall()
+    finally:
+        conn.close()
+    models = pd.DataFrame(rows, columns=_MODEL_COLUMNS)
+    models['model_path'] = [
+        os.path.join(local_artifact_path(location), MODEL_FILENAME) for location in models['artifact_location']
+    ]
+    return models.sort_values('created_ms', ascending=False, ignore_index=True)
+
+def resolve_model(
+    db_path: str = MLFLOW_DB,
+    metric: str = SELECTION_METRIC,
+    strategy: str = 'best',
+    experiment_id: int = None
+) -> dict:
+    """
+    Picks a model from the local MLflow metadata.
+
+    strategy: 'best' takes the highest `metric` (ties go to the newest
+        model); 'latest' takes the newest model regardless of metrics.
+
+    Only models whose artifact file exists locally are considered.
+    Raises LookupError if none qualifies.
+    """
+    models = list_models(db_path, metric, experiment_id)
+    models = models[[os.path.exists(path) for path in models['model_path']]]
+    if strategy == 'best':
+        models = models.dropna(subset=['metric_value'])
+        # Stable sort keeps newest-first order among equal metric values.
+        models = models.sort_values('metric_value', ascending=False, kind='stable')
+    elif strategy != 'latest':
+        raise ValueError(f"Unknown strategy '{strategy}'; use 'best' or 'latest'.")
+    if models.empty:
+        raise LookupError(f"No loadable logged model with metric '{metric}' found in {db_path}.")
+    return models.iloc[0].to_dict()
+
+def _mmap_copy(model_path: str, model_id: str, cache_dir: str) -> str:
+    """
+    Re-dumps a pickled artifact once with joblib (uncompressed), so its numpy
+    arrays can be memory-mapped on later loads. Keyed by model id and the
+    artifact's mtime, so a replaced artifact is re-dumped.
+    """
+    mtime = int(os.path.getmtime(model_path))
+    cache_file = os.path.join(cache_dir, f"{model_id}-{mtime}.joblib")
+    if not os.path.exists(cache_file):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.tmp{os.getpid()}"
+        joblib.dump(load_pipeline(model_path), tmp_file)
+        os.replace(tmp_file, cache_file)
+    return cache_file
+
+def warm_up(model):
+    """
+    Runs one dummy inference so lazy imports, first-call allocations and any
+    page faults on mapped arrays happen before the first real request.
+    """
+    score_frame(model, pd.DataFrame([WARMUP_RECORD], columns=INPUT_FEATURES))
+
+def load_model(
+    db_path: str = MLFLOW_DB,
+    metric: str = SELECTION_METRIC,
+    strategy: str = 'best',
+    mmap_dir: str = MMAP_CACHE_DIR,
+    fallback_path: str = MODEL_PATH
+):
+    """
+    Resolves, loads (memory-mapped) and pre-warms the serving model.
+
+    Falls back to `fallback_path` when the tracking store is missing or has
+    no loadable model. Returns (model, info) where info holds the model id,
+    path, selection metric and the resolve/load/warm-up timings, including
+    time_to_first_prediction_s.
+    """
+    start = time.perf_counter()
+    try:
+        info = resolve_model(db_path, metric, strategy)
+    except (LookupError, sqlite3.Error) as e:
+        print(f"Model registry lookup failed ({e}); using {fallback_path}")
+        info = {'model_id': None, 'run_name': None, 'model_path': fallback_path, 'metric_value': None}
+    info.update(metric=metric, strategy=strategy)
+    resolved = time.perf_counter()
+
+    if mmap_dir and info['model_id']:
+        info['load_path'] = _mmap_copy(info['model_path'], info['model_id'], mmap_dir)
+        model = joblib.load(info['load_path'], mmap_mode='r')
+    else:
+        info['load_path'] = info['model_path']
+        model = load_pipeline(info['load_path'])
+    loaded = time.perf_counter()
+
+    warm_up(model)
+    warmed = time.perf_counter()
+
+    info.update(
+        resolve_s=resolved - start,
+        load_s=loaded - resolved,
+        warmup_s=warmed - loaded,
+        time_to_first_prediction_s=warmed - start,
+    )
+    print(f"Loaded model {info['model_id'] or info['model_path']} "
+          f"(time to first prediction: {info['time_to_first_prediction_s'] * 1000:.0f} ms)")
+    return model, info
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Resolve, load and warm the serving model from mlflow.db.")
+    parser.add_argument('--db', default=MLFLOW_DB)
+    parser.add_argument('--metric', default=SELECTION_METRIC)
+    parser.add_argument('--strategy', choices=['best', 'latest'], default='best')
+    parser.add_argument('--list', action='store_true', help="Only list the logged models.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.list:
+        print(list_models(args.db, args.metric).drop(columns=['artifact_location']).to_string())
+    else:
+        _, info = load_model(args.db, args.metric, args.strategy)
+        for key in ('model_id', 'model_path', 'metric_value', 'resolve_s', 'load_s', 'warmup_s', 'time_to_first_prediction_s'):
+            print(f"{key}: {info[key]}")
@@ -0,0 +1,270 @@
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.utils import _safe_indexing
+from sklearn.utils.validation import check_is_fitted
+
+from foldcache import FoldCache, prepare_fold
+from instrumentation import StageTimings
+from mlpipeline import create_pipeline, create_sampler, get_feature_importances, RANDOM_STATE
+
+# --- Configuration ---
+N_SPLITS = 5
+FULL_FIT = -1  # Fold id of the task that fits on the whole training set
+# Rough relative fit cost; the most expensive tasks are dispatched first so
+# the pool does not end up waiting on one long SVC fit at the tail.
+MODEL_COST = {"SVC": 100, "Random Forest": 10, "XGBoost": 5, "Nystroem SVM": 3, "Logistic Regression": 1}
+
+class FoldEnsemble(ClassifierMixin, BaseEstimator):
+    """
+    Averages predict_proba over one fitted pipeline per CV fold. Used as the
+    final model when the sweep reuses fold estimators instead of refitting on
+    the full training set.
+
+    fit() clones `estimator` and fits it on each StratifiedKFold training
+    part (the sweep's folds), so clone() and refitting behave like any sklearn
+    classifier. from_fitted() wraps pipelines the sweep has already fitted.
+    """
+    def __init__(self, estimator=None, n_splits: int = N_SPLITS, random_state: int = RANDOM_STATE):
+        self.estimator = estimator
+        self.n_splits = n_splits
+        self.random_state = random_state
+
+    @classmethod
+    def from_fitted(cls, estimators: list, random_state: int = RANDOM_STATE):
+        """
+        Builds a fitted ensemble from already fitted fold pipelines.
+        """
+        ensemble = cls(clone(estimators[0]), n_splits=len(estimators), random_state=random_state)
+        ensemble.estimators_ = list(estimators)
+        ensemble.classes_ = np.asarray(estimators[0].classes_)
+        return ensemble
+
+    def fit(self, X, y):
+        cv = StratifiedKFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        self.estimators_ = [
+            clone(self.estimator).fit(_safe_indexing(X, train_idx), _safe_indexing(y, train_idx))
+            for train_idx, _ in cv.split(X, y)
+        ]
+        self.classes_ = np.asarray(self.estimators_[0].classes_)
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        check_is_fitted(self, 'estimators_')
+        return np.mean([estimator.predict_proba(X) for estimator in self.estimators_], axis=0)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def get_feature_importances(self, model_name: str) -> pd.DataFrame:
+        """
+        Mean of get_feature_importances() across the fold pipelines.
+        """
+        frames = [get_feature_importances(estimator, model_name) for estimator in self.estimators_]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        importance_df = pd.concat(frames).groupby('Feature', sort=False).mean(numeric_only=True).reset_index()
+        return importance_df.sort_values(by='Importance', ascending=False)
+
+def _limit_threads(model, n_threads: int):
+    """
+    Caps a model's own thread pool (RF/XGBoost n_jobs) to its share of the
+    worker budget so nested parallelism does not oversubscribe the cores.
+    """
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_threads)
+    return model
+
+def _labels(estimator, y_prob: np.ndarray) -> np.ndarray:
+    """
+    Labels from the positive-class probabilities (argmax over two classes),
+    so the test set needs only one predict_proba pass.
+    """
+    return np.asarray(estimator.classes_).take((y_prob > 0.5).astype(int))
+
+def _run_task(name, model, preprocessor, fold, train_idx, val_idx, X_train, y_train, X_test, n_threads, keep_estimator):
+    """
+    Fits one (model, fold) cell of the sweep matrix. Runs inside a pool worker
+    and returns plain results (including per-stage seconds); all MLflow
+    logging happens in the parent.
+    """
+    timings = StageTimings()
+    pipeline = create_pipeline(name, _limit_threads(clone(model), n_threads), clone(preprocessor))
+
+    if fold == FULL_FIT:
+        # Preprocessing and SMOTE run inside pipeline.fit here.
+        with timings.stage('fit'):
+            pipeline.fit(X_train, y_train)
+        with timings.stage('predict'):
+            y_prob = pipeline.predict_proba(X_test)[:, 1]
+            y_pred = _labels(pipeline, y_prob)
+        return {
+            "model": name, "fold": fold, "pipeline": pipeline, "y_pred": y_pred, "y_prob": y_prob,
+            "seconds": sum(timings.seconds.values()), "stages": timings.as_dict(),
+        }
+
+    with timings.stage('fit'):
+        pipeline.fit(X_train.iloc[train_idx], y_train.iloc[train_idx])
+    result = {"model": name, "fold": fold}
+    with timings.stage('predict'):
+        result["f1"] = f1_score(y_train.iloc[val_idx], pipeline.predict(X_train.iloc[val_idx]))
+        if keep_estimator:
+            result["pipeline"] = pipeline
+            result["y_prob"] = pipeline.predict_proba(X_test)[:, 1]
+    result["seconds"] = sum(timings.seconds.values())
+    result["stages"] = timings.as_dict()
+    return result
+
+def _run_cached_task(name, model, cache, key, fold, y_val, n_threads, keep_estimator):
+    """
+    Same as _run_task, but fits only the classifier on the fold's cached,
+    already preprocessed and resampled matrices.
+    """
+    timings = StageTimings()
+    with timings.stage('fold_cache_load'):
+        entry = cache.load(key)
+    classifier = _limit_threads(clone(model), n_threads)
+    with timings.stage('fit'):
+        classifier.fit(entry['X_resampled'], entry['y_resampled'])
+    pipeline = create_pipeline(name, classifier, entry['preprocessor'])
+
+    result = {"model": name, "fold": fold}
+    with timings.stage('predict'):
+        if fold != FULL_FIT:
+            result["f1"] = f1_score(y_val, classifier.predict(entry['X_val']))
+        if fold == FULL_FIT or keep_estimator:
+            result["pipeline"] = pipeline
+            result["y_prob"] = classifier.predict_proba(entry['X_test'])[:, 1]
+        if fold == FULL_FIT:
+            result["y_pred"] = _labels(classifier, result["y_prob"])
+            result["test_cache_key"] = key
+    result["seconds"] = sum(timings.seconds.values())
+    result["stages"] = timings.as_dict()
+    return result
+
+def run_sweep(
+    models: dict,
+    preprocessor,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_test: pd.DataFrame,
+    n_workers: int = None,
+    refit: bool = True,
+    n_splits: int = N_SPLITS,
+    fold_cache: FoldCache = None,
+    timings: StageTimings = None
+) -> dict:
+    """
+    Runs the models x folds matrix as one task graph over a process pool.
+
+    n_workers: process budget for the whole sweep (default: all cores). Each
+        worker gets cpu_count // n_workers BLAS/OpenMP/model threads.
+    refit: if True, the final model is an extra full-training-set fit that runs
+        alongside the folds (same results as cross_val_score + fit). If False,
+        the fold pipelines are kept and averaged as a FoldEnsemble, skipping
+        the refit entirely.
+    fold_cache: if set, each fold is preprocessed and resampled once (in
+        parallel) into the on-disk FoldCache and every model trains on the
+        shared memory-mapped matrices. Results are bit-identical.
+    timings: if set, worker-reported stage durations (summed over tasks) and
+        the wall time of each sweep phase are added to it.
+
+    Returns {model_name: {"cv_scores", "pipeline", "y_pred", "y_prob",
+    "fit_seconds", "stage_seconds", "worker_peak_rss_mb"}}, plus "test_cache_key" (the fold cache
+    entry holding the transformed test matrix) for cached refits.
+    """
+    n_cpus = os.cpu_count() or 1
+    n_workers = min(n_workers or n_cpus, n_cpus)
+    n_threads = max(1, n_cpus // n_workers)
+
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    folds = list(cv.split(X_train, y_train))
+
+    tasks = []
+    for name in sorted(models, key=lambda n: -MODEL_COST.get(n, 1)):
+        if refit:
+            tasks.append((name, FULL_FIT, None, None))
+        tasks += [(name, fold, train_idx, val_idx) for fold, (train_idx, val_idx) in enumerate(folds)]
+
+    timings = timings if timings is not None else StageTimings()
+    print(f"Dispatching {len(tasks)} fit tasks to {n_workers} workers ({n_threads} threads each)...")
+    with parallel_config(backend='loky', inner_max_num_threads=n_threads):
+        if fold_cache is None:
+            with timings.stage('sweep_fit_wall'):
+                outputs = Parallel(n_jobs=n_workers)(
+                    delayed(_run_task)(
+                        name, models[name], preprocessor, fold, train_idx, val_idx,
+                        X_train, y_train, X_test, n_threads, not refit
+                    )
+                    for name, fold, train_idx, val_idx in tasks
+                )
+        else:
+            # Stage 1: preprocess + resample each fold once, shared by all models.
+            fold_specs = [(fold, train_idx, val_idx) for fold, (train_idx, val_idx) in enumerate(folds)]
+            if refit:
+                fold_specs.append((FULL_FIT, None, None))
+            sampler = create_sampler()
+            with timings.stage('sweep_prepare_wall'):
+                prepared = Parallel(n_jobs=n_workers)(
+                    delayed(prepare_fold)(
+                        fold_cache, preprocessor, sampler,
+                        X_train if fold == FULL_FIT else X_train.iloc[train_idx],
+                        y_train if fold == FULL_FIT else y_train.iloc[train_idx],
+                        None if fold == FULL_FIT else X_train.iloc[val_idx],
+                        X_test
+                    )
+                    for fold, train_idx, val_idx in fold_specs
+                )
+            keys = [key for key, _ in prepared]
+            for _, stage_seconds in prepared:
+                timings.merge(stage_seconds)
+            fold_keys = {fold: key for (fold, _, _), key in zip(fold_specs, keys)}
+            fold_cache.evict(protect=set(keys))
+
+            # Stage 2: fit only the classifiers.
+            with timings.stage('sweep_fit_wall'):
+                outputs = Parallel(n_jobs=n_workers)(
+                    delayed(_run_cached_task)(
+                        name, models[name], fold_cache, fold_keys[fold], fold,
+                        None if fold == FULL_FIT else y_train.iloc[val_idx], n_threads, not refit
+                    )
+                    for name, fold, train_idx, val_idx in tasks
+                )
+            fold_cache.evict()
+
+    results = {name: {"cv_scores": [None] * n_splits, "fit_seconds": 0.0, "stage_seconds": StageTimings()} for name in models}
+    fold_outputs = {name: [] for name in models}
+    for output in outputs:
+        result = results[output["model"]]
+        result["fit_seconds"] += output["seconds"]
+        result["stage_seconds"].merge(output["stages"])
+        timings.merge(output["stages"])
+        if output["fold"] == FULL_FIT:
+            result.update(pipeline=output["pipeline"], y_pred=output["y_pred"], y_prob=output["y_prob"])
+            if "test_cache_key" in output:
+                result["test_cache_key"] = output["test_cache_key"]
+        else:
+            result["cv_scores"][output["fold"]] = output["f1"]
+            fold_outputs[output["model"]].append(output)
+
+    if not refit:
+        for name, outputs_for_model in fold_outputs.items():
+            outputs_for_model.sort(key=lambda o: o["fold"])
+            ensemble = FoldEnsemble.from_fitted([o["pipeline"] for o in outputs_for_model])
+            y_prob = np.mean([o["y_prob"] for o in outputs_for_model], axis=0)
+            results[name].update(
+                pipeline=ensemble,
+                y_prob=y_prob,
+                y_pred=_labels(ensemble, y_prob),
+            )
+
+    for result in results.values():
+        result["worker_peak_rss_mb"] = result["stage_seconds"].worker_peak_rss_mb
+        result["stage_seconds"] = dict(result["stage_seconds"].seconds)
+    return results
@@ -0,0 +1,159 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataloader import DTYPES
+
+# --- Configuration ---
+OUTPUT_FILE = 'data/synthetic_health_lifestyle.csv'
+RANDOM_STATE = 42
+CHUNK_SIZE = 1_000_000 # Rows generated and written per step (bounded memory at 100M rows)
+POSITIVE_RATE = 0.25 # Share of disease_risk == 1 in health_lifestyle_dataset.csv
+
+# Value ranges and rates of health_lifestyle_dataset.csv (from the EDA notebook).
+# Integer ranges are inclusive; float ranges are rounded to one decimal.
+INT_RANGES = {
+    'age': (18, 79),
+    'daily_steps': (1000, 19999),
+    'calories_consumed': (1200, 3999),
+    'resting_hr': (50, 99),
+    'systolic_bp': (90, 179),
+    'diastolic_bp': (60, 119),
+    'cholesterol': (150, 299),
+}
+FLOAT_RANGES = {
+    'bmi': (18.0, 40.0),
+    'sleep_hours': (3.0, 10.0),
+    'water_intake_l': (0.5, 5.0),
+}
+BINARY_RATES = {'smoker': 0.2, 'alcohol': 0.3, 'family_history': 0.3}
+GENDERS = ['Female', 'Male']
+
+# Weights on the standardized features for the risk logit, so the models have
+# a (weak) signal to learn; the intercept is calibrated to POSITIVE_RATE.
+RISK_WEIGHTS = {
+    'age': 0.35, 'bmi': 0.3, 'systolic_bp': 0.25, 'cholesterol': 0.2,
+    'smoker': 0.3, 'family_history': 0.3, 'alcohol': 0.1,
+    'daily_steps': -0.2, 'sleep_hours': -0.1,
+}
+
+def _risk_logit(df: pd.DataFrame) -> np.ndarray:
+    """
+    Linear risk score over features standardized with their known ranges/rates.
+    """
+    logit = np.zeros(len(df))
+    for feature, weight in RISK_WEIGHTS.items():
+        values = df[feature].to_numpy(dtype=np.float64)
+        if feature in BINARY_RATES:
+            rate = BINARY_RATES[feature]
+            mean, std = rate, np.sqrt(rate * (1 - rate))
+        else:
+            low, high = INT_RANGES.get(feature) or FLOAT_RANGES[feature]
+            mean, std = (low + high) / 2, (high - low) / np.sqrt(12)
+        logit += weight * (values - mean) / std
+    return logit
+
+def _features(n_rows: int, rng: np.random.Generator, start_id: int) -> pd.DataFrame:
+    columns = {'id': np.arange(start_id, start_id + n_rows)}
+    for feature, (low, high) in INT_RANGES.items():
+        columns[feature] = rng.integers(low, high + 1, n_rows)
+    for feature, (low, high) in FLOAT_RANGES.items():
+        columns[feature] = np.round(rng.uniform(low, high, n_rows), 1)
+    for feature, rate in BINARY_RATES.items():
+        columns[feature] = (rng.random(n_rows) < rate).astype(np.int8)
+    columns['gender'] = pd.Categorical.from_codes(rng.integers(0, len(GENDERS), n_rows), GENDERS)
+    return pd.DataFrame(columns)
+
+def calibrate_intercept(random_state: int = RANDOM_STATE, n_rows: int = 200_000) -> float:
+    """
+    Finds the logit intercept that gives POSITIVE_RATE positives, by bisection
+    on a fixed seeded sample (so every chunk uses the same label model).
+    """
+    logit = _risk_logit(_features(n_rows, np.random.default_rng(random_state), 1))
+    low, high = -10.0, 10.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if np.mean(1 / (1 + np.exp(-(logit + mid)))) < POSITIVE_RATE:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def generate_frame(
+    n_rows: int,
+    random_state: int = RANDOM_STATE,
+    start_id: int = 1,
+    intercept: float = None
+) -> pd.DataFrame:
+    """
+    Returns n_rows of synthetic data with the health_lifestyle_dataset.csv
+    columns (in DTYPES order and dtypes) and about POSITIVE_RATE positives.
+    """
+    if intercept is None:
+        intercept = calibrate_intercept(random_state)
+    # Seeded per starting id, so each chunk is reproducible on its own.
+    rng = np.random.default_rng([random_state, start_id])
+    df = _features(n_rows, rng, start_id)
+    proba = 1 / (1 + np.exp(-(_risk_logit(df) + intercept)))
+    df['disease_risk'] = (rng.random(n_rows) < proba).astype(np.int8)
+    return df[list(DTYPES)].astype(DTYPES)
+
+def iter_frames(n_rows: int, random_state: int = RANDOM_STATE, chunk_size: int = CHUNK_SIZE):
+    """
+    Yields the synthetic dataset as chunks of at most chunk_size rows.
+    """
+    intercept = calibrate_intercept(random_state)
+    for start in range(0, n_rows, chunk_size):
+        yield generate_frame(min(chunk_size, n_rows - start), random_state, start + 1, intercept)
+
+def write_dataset(
+    n_rows: int,
+    output_path: str = OUTPUT_FILE,
+    random_state: int = RANDOM_STATE,
+    chunk_size: int = CHUNK_SIZE
+) -> str:
+    """
+    Streams n_rows of synthetic data to a CSV (or .parquet) file. Memory use
+    is bounded by chunk_size, so 100M-row files can be produced.
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    start = time.perf_counter()
+    n_written, n_positive = 0, 0
+
+    if output_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for chunk in iter_frames(n_rows, random_state, chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+            n_written += len(chunk)
+            n_positive += int(chunk['disease_risk'].sum())
+        if writer is not None:
+            writer.close()
+    else:
+        for chunk in iter_frames(n_rows, random_state, chunk_size):
+            chunk.to_csv(output_path, mode='w' if n_written == 0 else 'a', header=n_written == 0, index=False)
+            n_written += len(chunk)
+            n_positive += int(chunk['disease_risk'].sum())
+
+    print(f"Wrote {n_written:,} rows ({n_positive / max(n_written, 1):.1%} high risk) to {output_path} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return output_path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic health_lifestyle dataset.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--output', default=OUTPUT_FILE, help="Output .csv or .parquet path.")
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    write_dataset(args.rows, args.output, args.seed, args.chunk_size)
@@ -0,0 +1,39 @@
+import json
+
+import pandas as pd
+
+from benchmark import check_baseline, compare_to_baseline
+from dataloader import DTYPES
+from synthdata import POSITIVE_RATE, generate_frame
+
+def _results(fit_seconds, rows_per_second=50_000.0, peak_rss_mb=500.0):
+    return {
+        "peak_rss_mb": peak_rss_mb,
+        "stages": {"XGBoost": {"fit_rows": 1_000, "fit_seconds": fit_seconds,
+                               "batch_1000_rows_per_second": rows_per_second}},
+    }
+
+def test_synthdata_is_deterministic_for_a_fixed_seed():
+    first = generate_frame(2_000, random_state=7)
+    pd.testing.assert_frame_equal(first, generate_frame(2_000, random_state=7))
+    assert not first.equals(generate_frame(2_000, random_state=8))
+
+def test_synthdata_matches_the_csv_schema_and_positive_rate():
+    df = generate_frame(20_000, random_state=42)
+    assert list(df.columns) == list(DTYPES)
+    assert {col: str(dtype) for col, dtype in df.dtypes.items()} == DTYPES
+    assert df['id'].is_unique
+    assert abs(df['disease_risk'].mean() - POSITIVE_RATE) < 0.02
+
+def test_baseline_check_fails_on_a_regression_over_tolerance(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_results(fit_seconds=10.0)))
+
+    assert check_baseline(_results(fit_seconds=11.5), str(baseline)) == 0
+    assert check_baseline(_results(fit_seconds=12.5), str(baseline)) == 1
+    # Throughput regresses when it drops
+    assert check_baseline(_results(fit_seconds=10.0, rows_per_second=35_000.0), str(baseline)) == 1
+
+    regressions = compare_to_baseline(_results(fit_seconds=12.5), _results(fit_seconds=10.0))
+    assert list(regressions.index) == ["xgboost.fit_seconds"]
+    assert regressions.loc["xgboost.fit_seconds", "Change"] == 0.25
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataloader import iter_warehouse_chunks, load_data, split_data, split_stream, split_warehouse_data
+from rdsdataload import bulk_load
+from synthdata import generate_frame
+
+def test_load_data_applies_compact_dtypes_and_deduplicates(tmp_path):
+    df = generate_frame(200, random_state=1)
+    path = tmp_path / 'data.csv'
+    pd.concat([df, df.iloc[:10].assign(id=df['id'].iloc[:10] + 1000)]).to_csv(path, index=False)
+
+    for chunksize in (None, 64):
+        loaded = load_data(str(path), chunksize=chunksize)
+        assert len(loaded) == 200
+        assert 'id' not in loaded.columns
+        assert loaded['age'].dtype == np.int8
+        assert loaded['cholesterol'].dtype == np.int16
+
+def test_load_data_falls_back_to_nullable_ints_on_missing_values(tmp_path):
+    df = generate_frame(200, random_state=2)
+    df['age'] = df['age'].astype('float64')
+    df.loc[5, 'age'] = np.nan
+    df.loc[7, 'resting_hr'] = np.nan
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+
+    for chunksize in (None, 64):
+        loaded = load_data(str(path), chunksize=chunksize)
+        assert len(loaded) == 200
+        assert str(loaded['age'].dtype) == 'Int8'
+        assert loaded['age'].isna().sum() == 1
+        assert loaded['resting_hr'].isna().sum() == 1
+
+def _stream_ids(df, chunksize, random_state=42):
+    chunks = (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+    test_ids, n_test, n_train = set(), 0, 0
+    for X_train, X_test, y_train, y_test in split_stream(chunks, 'disease_risk', 0.2, random_state):
+        test_ids.update(df.loc[X_test.index, 'id'])
+        n_test += len(X_test)
+        n_train += len(X_train)
+    return test_ids, n_train, n_test
+
+def test_split_stream_is_deterministic_across_chunk_sizes():
+    df = generate_frame(2000, random_state=3)
+    test_ids, n_train, n_test = _stream_ids(df, 2000)
+
+    assert n_train + n_test == 2000
+    for chunksize in (1, 97, 500):
+        assert _stream_ids(df, chunksize)[0] == test_ids
+    assert _stream_ids(df.iloc[::-1], 250)[0] == test_ids
+    assert _stream_ids(df, 2000, random_state=7)[0] != test_ids
+
+def test_split_stream_keeps_class_proportions_approximately():
+    df = generate_frame(20000, random_state=4)
+    parts = list(split_stream([df], 'disease_risk', test_size=0.2))
+    _, X_test, y_train, y_test = parts[0]
+
+    assert abs(len(X_test) / len(df) - 0.2) < 0.01
+    for label in df['disease_risk'].unique():
+        n_class = (df['disease_risk'] == label).sum()
+        assert abs((y_test == label).sum() / n_class - 0.2) < 0.02
+
+@pytest.fixture(scope='module')
+def warehouse(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('warehouse')
+    df = generate_frame(3_000, random_state=6)
+    # A content duplicate under a new id, which load_data drops
+    df = pd.concat([df, df.iloc[[10]].assign(id=10_000)], ignore_index=True)
+    csv_path = tmp_path / 'data.csv'
+    df.to_csv(csv_path, index=False)
+    url = f"sqlite:///{tmp_path / 'warehouse.db'}"
+    bulk_load(url, str(csv_path), n_writers=1)
+    return url, str(csv_path)
+
+def test_iter_warehouse_chunks_pushes_down_columns_and_predicate(warehouse):
+    url, csv_path = warehouse
+    chunks = list(iter_warehouse_chunks(
+        url, columns=['id', 'age', 'disease_risk'], where="age >= :min_age", params={'min_age': 60}, chunksize=400
+    ))
+    expected = pd.read_csv(csv_path).query('age >= 60')
+
+    assert all(len(chunk) <= 400 for chunk in chunks) and len(chunks) > 1
+    result = pd.concat(chunks)
+    assert list(result.columns) == ['id', 'age', 'disease_risk']
+    assert result['age'].dtype == np.int8 and result['id'].dtype == np.int32
+    assert sorted(result['id']) == sorted(expected['id'])
+    with pytest.raises(ValueError):
+        next(iter_warehouse_chunks(url, columns=['id', 'password']))
+
+def test_split_warehouse_data_matches_the_csv_split(warehouse):
+    url, csv_path = warehouse
+    expected = split_data(load_data(csv_path), 'disease_risk')
+    result = split_warehouse_data(url, 'disease_risk', chunksize=500)
+
+    for csv_part, warehouse_part in zip(expected, result):
+        assert len(csv_part) == len(warehouse_part)
+        np.testing.assert_array_equal(
+            csv_part.reset_index(drop=True).astype(object).to_numpy(), warehouse_part.astype(object).to_numpy()
+        )
+    for csv_y, warehouse_y in ((expected[2], result[2]), (expected[3], result[3])):
+        assert csv_y.value_counts().to_dict() == warehouse_y.value_counts().to_dict()
+    assert result[0]['gender'].dtype == 'category'
+
+def test_split_warehouse_data_pushes_down_columns_and_predicate(warehouse):
+    url, csv_path = warehouse
+    X_train, X_test, y_train, y_test = split_warehouse_data(
+        url, 'disease_risk', columns=['age', 'bmi'], where="age >= :min_age", params={'min_age': 50}
+    )
+    expected = pd.read_csv(csv_path).drop(columns='id').drop_duplicates().query('age >= 50')
+
+    assert list(X_train.columns) == ['age', 'bmi']
+    assert len(X_train) + len(X_test) == len(expected)
+    assert X_train['age'].min() >= 50 and X_test['age'].min() >= 50
+    positive_rate = expected['disease_risk'].mean()
+    for y in (y_train, y_test):
+        assert abs(y.mean() - positive_rate) < 1 / len(y) + 1e-9
+
+@pytest.mark.parametrize('cache_format', ['parquet', 'feather'])
+def test_cache_is_written_atomically_and_reused(tmp_path, monkeypatch, cache_format):
+    import dataloader
+
+    df = generate_frame(300, random_state=12)
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    cache_dir = tmp_path / 'cache'
+
+    # An interrupted write leaves only its temporary file, never the cache entry
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(pd.DataFrame, f"to_{cache_format}", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        load_data(str(path), cache_dir=str(cache_dir), cache_format=cache_format)
+    monkeypatch.undo()
+    cache_file = dataloader._cache_path(str(path), str(cache_dir), cache_format)
+    assert not os.path.exists(cache_file)
+
+    first = load_data(str(path), cache_dir=str(cache_dir), cache_format=cache_format)
+    assert os.listdir(cache_dir) == [os.path.basename(cache_file)]
+    cached = load_data(str(path), cache_dir=str(cache_dir), cache_format=cache_format)
+    pd.testing.assert_frame_equal(cached.reset_index(drop=True), first.reset_index(drop=True))
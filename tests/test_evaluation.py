@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, f1_score, precision_recall_curve,
+    precision_score, recall_score, roc_auc_score
+)
+
+from evaluation import PRECISION_TARGETS, evaluate_probabilities, fast_roc_auc, threshold_sweep
+
+def _scores(tied: bool, n: int = 2000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    y_true = rng.random(n) < 0.25
+    y_prob = np.clip(rng.normal(0.35 + 0.25 * y_true, 0.2), 0, 1)
+    if tied:
+        y_prob = np.round(y_prob, 1)
+    return y_true.astype(int), y_prob
+
+@pytest.mark.parametrize('tied', [False, True])
+def test_metrics_match_sklearn(tied):
+    y_true, y_prob = _scores(tied)
+    y_pred = (y_prob > 0.5).astype(int)
+    metrics = evaluate_probabilities(y_true, y_prob)
+
+    assert metrics["ROC AUC"] == pytest.approx(roc_auc_score(y_true, y_prob))
+    assert fast_roc_auc(y_true, y_prob) == pytest.approx(roc_auc_score(y_true, y_prob))
+    assert metrics["PR AUC"] == pytest.approx(average_precision_score(y_true, y_prob))
+    assert metrics["Accuracy"] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics["Precision"] == pytest.approx(precision_score(y_true, y_pred, zero_division=0))
+    assert metrics["Recall"] == pytest.approx(recall_score(y_true, y_pred))
+    assert metrics["F1 Score"] == pytest.approx(f1_score(y_true, y_pred))
+
+    precision, recall, _ = precision_recall_curve(y_true, y_prob)
+    for target in PRECISION_TARGETS:
+        assert metrics[f"Recall at Precision {target:g}"] == pytest.approx(recall[precision >= target].max())
+
+def test_precision_is_zero_without_predicted_positives():
+    y_true, y_prob = _scores(tied=False)
+    y_prob = y_prob * 0.4
+    metrics = evaluate_probabilities(y_true, y_prob)
+
+    assert metrics["Precision"] == 0.0 == precision_score(y_true, y_prob > 0.5, zero_division=0)
+    assert metrics["PR AUC"] == pytest.approx(average_precision_score(y_true, y_prob))
+    assert threshold_sweep(y_true, y_prob, [0.9])["precision"].iloc[0] == 0.0
+
+def test_threshold_sweep_matches_sklearn_at_every_score():
+    y_true, y_prob = _scores(tied=True)
+    sweep = threshold_sweep(y_true, y_prob)
+
+    assert len(sweep) == len(np.unique(y_prob))
+    for row in sweep.itertuples():
+        y_pred = y_prob >= row.threshold
+        assert row.precision == pytest.approx(precision_score(y_true, y_pred, zero_division=0))
+        assert row.recall == pytest.approx(recall_score(y_true, y_pred))
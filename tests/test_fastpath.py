@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+from fastpath import (
+    FastLogisticScorer, FastTreeScorer, check_parity, compile_pipeline, load_scorer, save_compiled, validate_rows
+)
+from inference import INPUT_FEATURES, NUMERIC_INPUTS, CATEGORICAL_INPUTS
+from mlpipeline import create_pipeline, create_preprocessor
+from synthdata import generate_frame
+
+@pytest.fixture(scope='module')
+def data():
+    df = generate_frame(3_000, random_state=7)
+    X, y = df[INPUT_FEATURES], df['disease_risk']
+    return X.iloc[:2_000], y.iloc[:2_000], X.iloc[2_000:].reset_index(drop=True)
+
+def _fit(model, X, y, **fit_params):
+    return create_pipeline(type(model).__name__, model, create_preprocessor()).fit(X, y, **fit_params)
+
+def test_logistic_parity_and_round_trip(data, tmp_path):
+    X_train, y_train, X_test = data
+    pipeline = _fit(LogisticRegression(max_iter=1000), X_train, y_train)
+    compiled = compile_pipeline(pipeline)
+    assert compiled["kind"] == "logistic"
+
+    scorer = load_scorer(save_compiled(compiled, str(tmp_path / 'lr.json')))
+    assert isinstance(scorer, FastLogisticScorer)
+    assert check_parity(pipeline, scorer, X_test) <= 1e-9
+
+def test_logistic_scorer_matches_pipeline_predict_proba(data):
+    X_train, y_train, X_test = data
+    pipeline = _fit(LogisticRegression(max_iter=1000, C=0.5), X_train, y_train)
+    scorer = FastLogisticScorer(compile_pipeline(pipeline))
+    expected = pipeline.predict_proba(X_test)[:, 1]
+
+    labels, probabilities = scorer.predict_frame(X_test)
+    np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(labels, pipeline.predict(X_test))
+
+    records = X_test.head(50).to_dict('records')
+    record_labels, record_probabilities = scorer.predict_records(records)
+    np.testing.assert_allclose(record_probabilities, expected[:50], rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(record_labels, labels[:50])
+    assert scorer.predict_records(records[0])[1][0] == pytest.approx(expected[0], abs=1e-9)
+
+    assert check_parity(pipeline, scorer, X_test, atol=1e-9) <= 1e-9
+    scorer._intercept += 1e-3
+    with pytest.raises(RuntimeError):
+        check_parity(pipeline, scorer, X_test, atol=1e-9)
+
+def test_xgboost_parity_and_round_trip(data, tmp_path):
+    X_train, y_train, X_test = data
+    pipeline = _fit(XGBClassifier(n_estimators=60, max_depth=4, random_state=0), X_train, y_train)
+    compiled = compile_pipeline(pipeline)
+    assert compiled["kind"] == "xgboost"
+    assert compiled["n_trees"] == 60
+    assert compiled["trees"]["threshold"].dtype == np.float32
+
+    scorer = load_scorer(save_compiled(compiled, str(tmp_path / 'xgb.npz')))
+    assert isinstance(scorer, FastTreeScorer)
+    check_parity(pipeline, scorer, X_test)
+
+def test_xgboost_missing_values_follow_default_branches(data):
+    X_train, y_train, X_test = data
+    pipeline = _fit(XGBClassifier(n_estimators=40, max_depth=4, random_state=0), X_train, y_train)
+    scorer = FastTreeScorer(compile_pipeline(pipeline))
+
+    X_missing = X_test.head(200).astype({f: np.float64 for f in NUMERIC_INPUTS})
+    X_missing.loc[0, 'age'] = np.nan
+    X_missing.loc[1, ['bmi', 'cholesterol', 'systolic_bp']] = np.nan
+    X_missing.loc[2, NUMERIC_INPUTS] = np.nan
+    check_parity(pipeline, scorer, X_missing)
+
+def test_xgboost_early_stopping_keeps_best_iteration_trees(data):
+    X_train, y_train, X_test = data
+    X_fit, X_val, y_fit, y_val = X_train.iloc[:1_500], X_train.iloc[1_500:], y_train.iloc[:1_500], y_train.iloc[1_500:]
+    model = XGBClassifier(n_estimators=400, learning_rate=0.3, max_depth=6, early_stopping_rounds=5, random_state=0)
+    pipeline = create_pipeline("XGBoost", model, create_preprocessor())
+    X_val_transformed = create_preprocessor().fit(X_fit, y_fit).transform(X_val)
+    pipeline.fit(X_fit, y_fit, classifier__eval_set=[(X_val_transformed, y_val)], classifier__verbose=False)
+
+    best_iteration = pipeline.named_steps['classifier'].best_iteration
+    assert best_iteration + 1 < pipeline.named_steps['classifier'].get_booster().num_boosted_rounds()
+    compiled = compile_pipeline(pipeline)
+    assert compiled["n_trees"] == best_iteration + 1
+    check_parity(pipeline, FastTreeScorer(compiled), X_test)
+
+def test_validate_rows_rejects_bad_values():
+    row = {f: 1 for f in NUMERIC_INPUTS}
+    row['gender'] = 'Female'
+    assert validate_rows([row], NUMERIC_INPUTS, CATEGORICAL_INPUTS) == ""
+    assert "missing features" in validate_rows([{'age': 1}], NUMERIC_INPUTS, CATEGORICAL_INPUTS)
+    assert "finite number" in validate_rows([{**row, 'age': 'abc'}], NUMERIC_INPUTS, CATEGORICAL_INPUTS)
+    assert "finite number" in validate_rows([{**row, 'bmi': None}], NUMERIC_INPUTS, CATEGORICAL_INPUTS)
+    assert validate_rows([{**row, 'bmi': None}], NUMERIC_INPUTS, CATEGORICAL_INPUTS, allow_missing=True) == ""
+    assert "string" in validate_rows([{**row, 'gender': 3}], NUMERIC_INPUTS, CATEGORICAL_INPUTS)
+    assert validate_rows([], NUMERIC_INPUTS, CATEGORICAL_INPUTS)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+
+from foldcache import FoldCache
+from inference import INPUT_FEATURES
+from mlpipeline import create_preprocessor
+from sweep import run_sweep
+from synthdata import generate_frame
+
+@pytest.fixture(scope='module')
+def data():
+    df = generate_frame(1_500, random_state=11)
+    X, y = df[INPUT_FEATURES], df['disease_risk']
+    return X.iloc[:1_200], y.iloc[:1_200], X.iloc[1_200:]
+
+def _models():
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Random Forest": RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+        "XGBoost": XGBClassifier(n_estimators=30, max_depth=3, random_state=0),
+    }
+
+@pytest.mark.parametrize('refit', [True, False])
+def test_cached_sweep_is_bit_identical(data, tmp_path, refit):
+    X_train, y_train, X_test = data
+    uncached = run_sweep(_models(), create_preprocessor(), X_train, y_train, X_test, n_workers=2, refit=refit)
+    cache = FoldCache(str(tmp_path / 'cache'))
+    cached = run_sweep(
+        _models(), create_preprocessor(), X_train, y_train, X_test, n_workers=2, refit=refit, fold_cache=cache
+    )
+
+    for name in uncached:
+        np.testing.assert_array_equal(cached[name]["y_prob"], uncached[name]["y_prob"])
+        np.testing.assert_array_equal(cached[name]["y_pred"], uncached[name]["y_pred"])
+        assert cached[name]["cv_scores"] == uncached[name]["cv_scores"]
+    assert len(os.listdir(cache.cache_dir)) == 5 + refit
+
+def _put(cache, key, n_bytes, mtime):
+    cache.put(key, {'fitted': key}, {'X_resampled': np.zeros(n_bytes // 8), 'y_resampled': None})
+    os.utime(os.path.join(cache.cache_dir, key), (mtime, mtime))
+
+def test_evicts_least_recently_used_entries_beyond_the_limit(tmp_path):
+    cache = FoldCache(str(tmp_path), max_bytes=2_500_000)
+    for i, key in enumerate(['a', 'b', 'c']):
+        _put(cache, key, 1_000_000, mtime=1_000 + i)
+    cache.load('a')  # Recently used again: 'b' is now the oldest
+
+    cache.evict()
+    assert [cache.contains(k) for k in 'abc'] == [True, False, True]
+
+    _put(cache, 'd', 1_000_000, mtime=500)
+    cache.evict(protect={'d'})
+    assert [cache.contains(k) for k in 'acd'] == [True, False, True]
+
+def test_put_is_atomic_and_first_writer_wins(tmp_path):
+    cache = FoldCache(str(tmp_path))
+    cache.put('k', {'writer': 1}, {'X_test': np.arange(3.0)})
+    cache.put('k', {'writer': 2}, {'X_test': np.arange(5.0)})
+
+    entry = cache.load('k')
+    assert entry['preprocessor'] == {'writer': 1}
+    np.testing.assert_array_equal(entry['X_test'], np.arange(3.0))
+    assert entry['X_val'] is None
+    assert os.listdir(tmp_path) == ['k']  # No temporary directories left behind
@@ -0,0 +1,57 @@
+import mlflow
+import numpy as np
+import pytest
+from mlflow.tracking import MlflowClient
+
+from incremental import (
+    MLFLOW_EXPERIMENT_NAME, REGISTERED_MODEL_NAME, IncrementalRiskModel, load_current_model, run_incremental_update
+)
+from synthdata import generate_frame
+
+@pytest.fixture
+def tracking_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    mlflow.set_tracking_uri(uri)
+    mlflow.create_experiment(MLFLOW_EXPERIMENT_NAME, artifact_location=(tmp_path / "mlruns").as_uri())
+    yield uri
+    mlflow.set_tracking_uri(None)
+
+def test_updates_train_on_the_delta_and_register_versions(tracking_uri, tmp_path):
+    df = generate_frame(3_000, random_state=8)
+    path = tmp_path / 'data.csv'
+    df.iloc[:2_000].to_csv(path, index=False)
+
+    first = run_incremental_update('csv', str(path))
+    assert first['last_id'] == 2_000
+    assert 1_400 < first['rows_trained'] < 1_800
+
+    df.to_csv(path, index=False)
+    second = run_incremental_update('csv', str(path))
+    assert second['last_id'] == 3_000
+    assert 700 < second['rows_trained'] < 900  # only ids 2001..3000
+
+    model, last_id = load_current_model()
+    assert isinstance(model, IncrementalRiskModel) and last_id == 3_000
+    assert model.n_samples_seen_ == first['rows_trained'] + second['rows_trained']
+
+    unchanged = run_incremental_update('csv', str(path))
+    assert unchanged['rows_trained'] == 0
+
+    versions = MlflowClient().search_model_versions(f"name='{REGISTERED_MODEL_NAME}'")
+    assert sorted(int(v.version) for v in versions) == [1, 2]
+    runs = mlflow.search_runs(experiment_names=[MLFLOW_EXPERIMENT_NAME])
+    assert sorted(runs['params.previous_last_id'].dropna().astype(int)) == [0, 2_000]
+
+def test_scaler_is_frozen_after_the_first_batch():
+    df = generate_frame(2_000, random_state=9)
+    X, y = df.drop(columns=['id', 'disease_risk']), df['disease_risk']
+    model = IncrementalRiskModel().partial_fit(X.iloc[:1_000], y.iloc[:1_000])
+    mean = model.preprocessor_.scaler_.mean_.copy()
+
+    shifted = X.iloc[1_000:].assign(age=X['age'].iloc[1_000:] + 40)
+    model.partial_fit(shifted, y.iloc[1_000:])
+    np.testing.assert_array_equal(model.preprocessor_.scaler_.mean_, mean)
+    assert model.n_samples_seen_ == 2_000
+
+    model.fit(shifted, y.iloc[1_000:])
+    assert model.preprocessor_.scaler_.mean_[0] != mean[0]
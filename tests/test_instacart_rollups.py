@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SQLDataModelling'))
+import instacart_rollups as rollups  # noqa: E402
+
+KEYS = {
+    'MV_CUSTOMER_LAST_ORDER': 'CustomerID',
+    'MV_ORDER_TOTALS': 'OrderID',
+    'MV_PRODUCT_SALES': 'ProductID',
+    'MV_STORE_SALES': 'StoreID',
+}
+
+def _snapshot(engine) -> dict:
+    with engine.connect() as conn:
+        return {
+            name: conn.execute(text(f"SELECT * FROM {name} ORDER BY {key}")).fetchall()
+            for name, key in KEYS.items()
+        }
+
+def _full_recompute(engine) -> dict:
+    rollups.build_summaries(engine)
+    return _snapshot(engine)
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'instacart.db'}")
+    rollups.create_schema(engine)
+    rollups.generate_data(engine, n_customers=60, n_orders=400, n_products=40, n_stores=5)
+    rollups.create_indexes(engine)
+    rollups.build_summaries(engine)
+    return engine
+
+def test_refresh_with_nothing_logged_is_a_no_op(engine):
+    assert rollups.refresh_summaries(engine) == 0
+
+def test_refresh_matches_full_recompute_after_new_orders(engine):
+    rollups.generate_data(engine, n_customers=60, n_orders=50, n_products=40, n_stores=5, order_id_offset=400)
+    assert rollups.refresh_summaries(engine) > 0
+    refreshed = _snapshot(engine)
+    assert refreshed == _full_recompute(engine)
+
+def test_refresh_picks_up_changes_to_existing_rows(engine):
+    with engine.begin() as conn:
+        # Refund/cancel existing orders, including customers' latest orders
+        conn.execute(text("UPDATE ORDERS SET OrderStatus = 'Refunded' WHERE OrderID IN (400, 399, 17)"))
+        conn.execute(text("UPDATE ORDERS SET CustomerID = 1 WHERE OrderID = 250"))
+        conn.execute(text("UPDATE PAYMENTS SET Amount = 999.99 WHERE PaymentID = 42"))
+        conn.execute(text("DELETE FROM ORDERITEMS WHERE OrderID = 10"))
+        conn.execute(text("UPDATE ORDERITEMS SET Quantity = Quantity + 3 WHERE OrderID = 11"))
+        conn.execute(text("DELETE FROM ORDERS WHERE OrderID = 5"))
+        conn.execute(text("DELETE FROM PRODUCTSTORE WHERE ProductID = 3"))
+        conn.execute(text("INSERT INTO CUSTOMERS (CustomerID, FirstName, LastName, CustomerEmail) "
+                          "VALUES (61, 'New', 'Customer', 'new@example.com')"))
+
+    assert rollups.refresh_summaries(engine) > 0
+    refreshed = _snapshot(engine)
+    assert refreshed == _full_recompute(engine)
+
+    statuses = {row.OrderID: row.OrderStatus for row in refreshed['MV_ORDER_TOTALS']}
+    assert statuses[400] == 'Refunded'
+    assert 5 not in statuses
+    assert rollups.refresh_summaries(engine) == 0
+
+def test_summary_queries_match_original_queries(engine):
+    with engine.connect() as conn:
+        for name, (original, summary) in rollups.BENCH_QUERIES.items():
+            expected = conn.execute(text(original)).fetchall()
+            actual = conn.execute(text(summary)).fetchall()
+            if name == 'product_sales':
+                # The original SUM() is NULL for products never ordered; the summary stores 0
+                expected = [row[:3] + (row[3] or 0,) for row in expected]
+            assert [tuple(r) for r in actual] == [tuple(r) for r in expected], name
@@ -0,0 +1,25 @@
+from instrumentation import PEAK_RSS_KEY, StageTimings
+
+def test_worker_stage_dicts_carry_seconds_and_peak_rss():
+    worker = StageTimings()
+    with worker.stage('fit'):
+        sum(range(1000))
+    report = worker.as_dict()
+    assert set(report) == {'fit', PEAK_RSS_KEY}
+
+    parent = StageTimings()
+    parent.merge(report)
+    parent.merge({'fit': 1.0, PEAK_RSS_KEY: 1e6})
+    assert parent.calls['fit'] == 2
+    assert parent.worker_peak_rss_mb == 1e6
+    assert PEAK_RSS_KEY not in parent.seconds
+
+def test_metrics_include_per_stage_rss():
+    timings = StageTimings()
+    with timings.stage('load data'):
+        data = bytearray(10 * 1024 * 1024)
+    metrics = timings.to_metrics()
+    assert metrics['rss_after_load_data_mb'] > 0
+    assert metrics['time_load_data_s'] >= 0
+    assert PEAK_RSS_KEY in metrics and 'worker_peak_rss_mb' not in metrics
+    assert len(data) and 'RSS MB' in timings.summary()
@@ -0,0 +1,78 @@
+import mlflow
+import numpy as np
+import pytest
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LogisticRegression
+
+from mlflowlogger import MlflowLogger
+
+@pytest.fixture
+def tracking_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    mlflow.set_tracking_uri(uri)
+    experiment_id = mlflow.create_experiment("test_mlflowlogger", artifact_location=(tmp_path / "mlruns").as_uri())
+    mlflow.set_experiment(experiment_id=experiment_id)
+    yield uri
+    mlflow.set_tracking_uri(None)
+
+def _fitted_model():
+    X = np.random.default_rng(0).normal(size=(50, 3))
+    return LogisticRegression().fit(X, (X[:, 0] > 0).astype(int))
+
+def test_buffered_metrics_reach_the_logged_model(tracking_uri):
+    with mlflow.start_run(run_name="parent") as parent, MlflowLogger() as logger:
+        with logger.run("child") as run_id:
+            logger.log_param("model", "lr")
+            logger.log_metric("test_recall", 0.75)
+            logger.log_model(_fitted_model(), "model")
+            logger.log_metric("logged_after_model", 1.0)
+
+    client = MlflowClient()
+    run = client.get_run(run_id)
+    assert run.data.params == {"model": "lr"}
+    assert run.data.metrics == {"test_recall": 0.75, "logged_after_model": 1.0}
+    assert run.data.tags["mlflow.parentRunId"] == parent.info.run_id
+    assert run.info.status == "FINISHED"
+
+    models = client.search_logged_models(experiment_ids=[run.info.experiment_id])
+    assert len(models) == 1
+    assert {m.key: m.value for m in models[0].metrics} == {"test_recall": 0.75}
+
+def test_failed_block_marks_run_failed(tracking_uri):
+    with mlflow.start_run(run_name="parent"), MlflowLogger() as logger:
+        with pytest.raises(ValueError):
+            with logger.run("child") as run_id:
+                logger.log_metric("cv_mean_f1_score", 0.5)
+                raise ValueError("boom")
+
+    run = MlflowClient().get_run(run_id)
+    assert run.info.status == "FAILED"
+    assert run.data.metrics == {"cv_mean_f1_score": 0.5}
+
+def test_close_reraises_background_errors(tracking_uri):
+    with mlflow.start_run(run_name="parent"):
+        logger = MlflowLogger()
+        logger.log_text("x", "notes.txt", run_id="does-not-exist")
+        with pytest.raises(Exception):
+            logger.close()
+
+def test_logged_pipelines_are_pickled_where_the_registry_looks(tracking_uri, tmp_path):
+    from inference import INPUT_FEATURES, load_pipeline
+    from mlpipeline import create_pipeline, create_preprocessor
+    from registry import resolve_model
+    from sweep import FoldEnsemble
+    from synthdata import generate_frame
+
+    df = generate_frame(600, random_state=2)
+    X, y = df[INPUT_FEATURES], df['disease_risk']
+    pipeline = create_pipeline("LR", LogisticRegression(max_iter=1000), create_preprocessor())
+    ensemble = FoldEnsemble(pipeline, n_splits=2).fit(X, y)
+
+    with mlflow.start_run(run_name="parent"), MlflowLogger() as logger:
+        with logger.run("ensemble"):
+            logger.log_metric("test_recall", 0.9)
+            logger.log_model(ensemble, "model")
+
+    info = resolve_model(db_path=str(tmp_path / 'mlflow.db'))
+    assert info['model_path'].endswith('model.pkl') and info['run_name'] == "ensemble"
+    np.testing.assert_allclose(load_pipeline(info['model_path']).predict_proba(X), ensemble.predict_proba(X))
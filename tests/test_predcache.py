@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from inference import INPUT_FEATURES
+from predcache import PredictionCache
+from registry import WARMUP_RECORD
+
+class CountingModel:
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.rows_scored = 0
+
+    def predict_proba(self, X):
+        self.rows_scored += len(X)
+        p = (X['age'].to_numpy() / 100.0).astype(np.float64)
+        return np.column_stack([1 - p, p])
+
+def _frame(*ages):
+    return pd.DataFrame([dict(WARMUP_RECORD, age=age) for age in ages], columns=INPUT_FEATURES)
+
+def test_repeated_and_float_noise_rows_are_cache_hits():
+    model, cache = CountingModel(), PredictionCache(model_version='v1')
+    _, first = cache.score_frame(model, _frame(40, 70))
+    _, again = cache.score_frame(model, _frame(70, 40.0000001, 55))
+
+    assert model.rows_scored == 3
+    np.testing.assert_allclose(again[:2], first[::-1])
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 3
+
+def test_rewritten_artifact_invalidates_the_cache(tmp_path):
+    artifact = tmp_path / 'model.pkl'
+    artifact.write_bytes(b'v1')
+    model, cache = CountingModel(), PredictionCache(model_path=str(artifact))
+    cache.score_frame(model, _frame(40))
+
+    artifact.write_bytes(b'version 2')
+    assert cache.check_version(force=True)
+    cache.score_frame(model, _frame(40))
+    assert model.rows_scored == 2
+    assert cache.stats()['invalidations'] == 1
+
+def test_newly_resolved_model_invalidates_the_cache(tmp_path):
+    paths = [tmp_path / 'a.pkl', tmp_path / 'b.pkl']
+    for path in paths:
+        path.write_bytes(b'model')
+    current = [str(paths[0])]
+    model, cache = CountingModel(), PredictionCache(resolve_path=lambda: current[0])
+    assert cache.model_path == str(paths[0])
+    cache.score_frame(model, _frame(40))
+
+    assert not cache.check_version(force=True)
+    current[0] = str(paths[1])
+    assert cache.check_version(force=True)
+    assert cache.model_path == str(paths[1])
+
+    def failing():
+        raise LookupError("no model")
+    cache.resolve_path = failing
+    assert not cache.check_version(force=True)
+    assert cache.model_path == str(paths[1])
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from inference import INPUT_FEATURES
+from mlpipeline import create_pipeline, create_preprocessor
+from predictservice import PredictionService
+from synthdata import generate_frame
+
+@pytest.fixture(scope='module')
+def pipeline():
+    df = generate_frame(1_000, random_state=3)
+    return create_pipeline("LR", LogisticRegression(max_iter=1000), create_preprocessor()).fit(
+        df[INPUT_FEATURES], df['disease_risk']
+    )
+
+@pytest.fixture(scope='module')
+def patient():
+    row = generate_frame(1, random_state=4)[INPUT_FEATURES].iloc[0].to_dict()
+    return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+
+class FailsOnNegativeAge:
+    """
+    Wraps a pipeline and raises for any batch containing age < 0.
+    """
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.classes_ = pipeline.classes_
+
+    def predict_proba(self, X):
+        if (X['age'] < 0).any():
+            raise ValueError("negative age")
+        return self.pipeline.predict_proba(X)
+
+def test_bad_value_is_a_400(pipeline, patient):
+    async def run():
+        service = PredictionService(pipeline)
+        service.batcher.start()
+        try:
+            ok = await service._route('POST', '/predict', json.dumps(patient).encode())
+            bad = await service._route('POST', '/predict', json.dumps({**patient, 'age': 'abc'}).encode())
+        finally:
+            await service.batcher.stop()
+        return ok, bad
+
+    (ok_status, ok_payload), (bad_status, bad_payload) = asyncio.run(run())
+    assert ok_status == 200 and 0.0 <= ok_payload['probability'] <= 1.0
+    assert bad_status == 400 and 'age' in bad_payload['error']
+
+def test_failing_request_does_not_fail_its_batch(pipeline, patient):
+    async def run():
+        service = PredictionService(FailsOnNegativeAge(pipeline), max_wait_ms=50)
+        service.batcher.start()
+        try:
+            return await asyncio.gather(
+                service._route('POST', '/predict', json.dumps(patient).encode()),
+                service._route('POST', '/predict', json.dumps({**patient, 'age': -1}).encode()),
+                service._route('POST', '/predict', json.dumps(patient).encode()),
+            )
+        finally:
+            await service.batcher.stop()
+
+    statuses = [status for status, _ in asyncio.run(run())]
+    assert statuses == [200, 500, 200]
+
+def test_malformed_request_line_and_unknown_routes(pipeline):
+    async def run():
+        service = PredictionService(pipeline)
+        service.batcher.start()
+        server = await asyncio.start_server(service._handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b"GARBAGE\r\n\r\n")
+            await writer.drain()
+            malformed = await reader.read()
+            writer.close()
+
+            for i in range(20):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f"GET /scan/{i} HTTP/1.1\r\nConnection: close\r\n\r\n".encode())
+                await writer.drain()
+                await reader.read()
+                writer.close()
+        finally:
+            server.close()
+            await service.batcher.stop()
+        return malformed, service.latency
+
+    malformed, latency = asyncio.run(run())
+    assert malformed.startswith(b"HTTP/1.1 400")
+    assert set(latency) == {'other'} and latency['other'].total == 20
+
+class ConstantModel:
+    classes_ = np.array([0, 1])
+
+    def __init__(self, probability):
+        self.probability = probability
+
+    def predict_proba(self, X):
+        return np.tile([1 - self.probability, self.probability], (len(X), 1))
+
+def test_requests_during_a_reload_are_scored_and_cached_by_the_new_model(tmp_path, patient, monkeypatch):
+    import time
+    import predictservice
+    from predcache import PredictionCache
+
+    artifact = tmp_path / 'model.pkl'
+    artifact.write_bytes(b'old')
+
+    def slow_load(path):
+        time.sleep(0.2)
+        return ConstantModel(0.9)
+    monkeypatch.setattr(predictservice, 'load_pipeline', slow_load)
+
+    async def run():
+        cache = PredictionCache(model_path=str(artifact))
+        service = PredictionService(ConstantModel(0.1), cache=cache)
+        service.batcher.start()
+        try:
+            assert (await service._predict([patient]))[0][1] == 0.1
+            artifact.write_bytes(b'new model')
+            cache._checked_at = float('-inf')
+            others = [{**patient, 'age': patient['age'] + i} for i in range(1, 6)]
+            during = await asyncio.gather(*(service._predict([row]) for row in [patient] + others))
+            after = await service._predict([patient] + others)
+        finally:
+            await service.batcher.stop()
+        return during, after, cache.stats()
+
+    during, after, stats = asyncio.run(run())
+    assert all(result[0][1] == 0.9 for result in during)
+    assert all(probability == 0.9 for _, probability in after)
+    assert stats['invalidations'] == 1
+
+def test_metrics_report_batch_sizes_in_rows(pipeline, patient):
+    async def run():
+        service = PredictionService(pipeline, max_batch_rows=100)
+        service.batcher.start()
+        try:
+            await service._route('POST', '/predict/batch', json.dumps([patient] * 3).encode())
+            service._observe('/predict/batch', 7.5)
+            return (await service._route('GET', '/metrics', b''))[1]
+        finally:
+            await service.batcher.stop()
+
+    metrics = asyncio.run(run())
+    batch_rows = metrics['batch_rows']
+    assert batch_rows['count'] == 1 and batch_rows['sum_rows'] == 3
+    assert list(batch_rows['buckets_rows']) == ['1', '2', '4', '8', '16', '32', '64', '100', '+Inf']
+    assert batch_rows['buckets_rows']['2'] == 0 and batch_rows['buckets_rows']['4'] == 1
+    assert not any(key.endswith('_ms') for key in batch_rows)
+    assert metrics['latency']['/predict/batch']['sum_ms'] == 7.5
@@ -0,0 +1,23 @@
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+
+from rdsdataload import TABLE_NAME, bulk_load, life_style_data
+from synthdata import generate_frame
+
+def test_float_columns_are_double_precision_on_mysql():
+    ddl = str(CreateTable(life_style_data).compile(dialect=mysql.dialect()))
+    for column in ('bmi', 'sleep_hours', 'water_intake_l'):
+        assert f"{column} FLOAT(53)" in ddl
+
+def test_floats_round_trip_exactly(tmp_path):
+    df = generate_frame(500, random_state=3)
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    url = f"sqlite:///{tmp_path / 'warehouse.db'}"
+
+    assert bulk_load(url, str(path), n_writers=1)["rows"] == 500
+    stored = pd.read_sql_table(TABLE_NAME, create_engine(url)).set_index('id').loc[df['id']]
+    for column in ('bmi', 'sleep_hours', 'water_intake_l'):
+        assert (stored[column].to_numpy() == pd.read_csv(path)[column].to_numpy()).all()
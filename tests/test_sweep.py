@@ -0,0 +1,32 @@
+import mlflow.sklearn
+import numpy as np
+from sklearn.base import clone, is_classifier
+from sklearn.linear_model import LogisticRegression
+
+from inference import INPUT_FEATURES
+from mlpipeline import create_preprocessor
+from sweep import FoldEnsemble, run_sweep
+from synthdata import generate_frame
+
+def test_fold_ensemble_is_a_refittable_sklearn_classifier(tmp_path):
+    df = generate_frame(1_500, random_state=5)
+    X, y = df[INPUT_FEATURES], df['disease_risk']
+    X_train, y_train, X_test = X.iloc[:1_200], y.iloc[:1_200], X.iloc[1_200:]
+
+    results = run_sweep(
+        {"Logistic Regression": LogisticRegression(max_iter=1000)}, create_preprocessor(),
+        X_train, y_train, X_test, n_workers=1, refit=False
+    )
+    ensemble = results["Logistic Regression"]["pipeline"]
+    assert isinstance(ensemble, FoldEnsemble) and is_classifier(ensemble)
+    assert results["Logistic Regression"]["worker_peak_rss_mb"] > 0
+    assert 'peak_rss_mb' not in results["Logistic Regression"]["stage_seconds"]
+    np.testing.assert_allclose(ensemble.predict_proba(X_test)[:, 1], results["Logistic Regression"]["y_prob"])
+
+    refit = clone(ensemble).fit(X_train, y_train)
+    assert len(refit.estimators_) == len(ensemble.estimators_)
+    np.testing.assert_allclose(refit.predict_proba(X_test), ensemble.predict_proba(X_test), atol=1e-12)
+
+    mlflow.sklearn.save_model(ensemble, str(tmp_path / 'model'), serialization_format='cloudpickle')
+    loaded = mlflow.sklearn.load_model(str(tmp_path / 'model'))
+    np.testing.assert_array_equal(loaded.predict(X_test), ensemble.predict(X_test))
@@ -0,0 +1,12 @@
+import mlpipeline
+from train import sampler_params
+
+def test_sampler_params_follow_the_configured_oversampler(monkeypatch):
+    assert sampler_params()["sampler_class"] == "SMOTE"
+
+    monkeypatch.setattr(mlpipeline, "OVERSAMPLER", "approx_smote")
+    params = sampler_params()
+    assert params["resampling_method"] == "approx_smote"
+    assert params["sampler_class"] == "ApproxSMOTE"
+    assert params["sampler_max_reference"] == mlpipeline.create_sampler().max_reference
+    assert type(mlpipeline.create_pipeline("LR", None, None).named_steps['smote']).__name__ == "ApproxSMOTE"
@@ -1,19 +1,48 @@
 import pandas as pd
 import numpy as np
 import mlflow
-import mlflow.sklearn
-from sklearn.model_selection import StratifiedKFold
-from sklearn.model_selection import cross_val_score
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold, train_test_split
+import mlpipeline
 from mlpipeline import (
-    create_preprocessor, get_models, create_pipeline, get_metrics, get_feature_importances, CONTINUOUS_FEATURES
+    create_preprocessor, get_models, create_pipeline, create_sampler, get_feature_importances,
+    get_search_spaces, CONTINUOUS_FEATURES
 )
-from dataloader import load_data, split_data
+from dataloader import load_data, split_data, split_warehouse_data
+from sweep import run_sweep, FoldEnsemble
+from foldcache import FoldCache
+from instrumentation import StageTimings, profiled
+from evaluation import SWEEP_GRID, evaluate_probabilities, permutation_importance, threshold_sweep
+from mlflowlogger import MlflowLogger
 
 # --- Configuration ---
 DATA_FILE = 'data/health_lifestyle_dataset.csv' # Assuming 'data' is a sibling directory
+DATA_CACHE_DIR = 'data/.cache' # Cleaned-frame Parquet cache, keyed by source file hash
+DATA_SOURCE = 'csv' # 'csv' (DATA_FILE) or 'warehouse' (stream WAREHOUSE_URL's life_style_data table)
+WAREHOUSE_URL = 'sqlite:///data/warehouse.db' # Any SQLAlchemy URL, e.g. the RDS MySQL instance
 TARGET_COLUMN = 'disease_risk'
 MLFLOW_EXPERIMENT_NAME = "Disease_Risk_Classification_SMOTE"
 RANDOM_STATE = 42
+N_WORKERS = None # Process budget for the model sweep (None = all cores)
+REFIT_ON_FULL_TRAIN = True # False reuses the CV fold pipelines as the final model
+FOLD_CACHE_DIR = 'data/.fold_cache' # Shared preprocessed/SMOTE fold matrices (None disables)
+TUNE = False # True runs successive-halving hyperparameter search instead of the fixed models
+TUNING_CANDIDATES = 32 # Random candidates in the first (cheapest) rung
+TUNING_FACTOR = 3 # Keep the best 1/factor of candidates per rung; budget grows by factor
+EARLY_STOPPING_ROUNDS = 25
+PERMUTATION_IMPORTANCE = True # Model-agnostic test-set importance for every model (incl. SVC)
+PROFILE = False # True writes a cProfile dump of the run to data/profiles and logs it to MLflow
+
+def sampler_params() -> dict:
+    """
+    MLflow params describing the oversampler create_pipeline() uses, so SMOTE
+    and ApproxSMOTE runs can be told apart and compared.
+    """
+    sampler = create_sampler()
+    params = {"resampling_method": mlpipeline.OVERSAMPLER, "sampler_class": type(sampler).__name__}
+    params.update({f"sampler_{k}": v for k, v in sampler.get_params().items()})
+    return params
 
 def train_and_evaluate_models(
     X_train: pd.DataFrame, 
@@ -21,12 +50,27 @@ def train_and_evaluate_models(
     y_train: pd.Series, 
     y_test: pd.Series, 
     preprocessor,
-    selected_model_name: str = None
+    selected_model_name: str = None,
+    n_workers: int = None,
+    refit: bool = True,
+    fold_cache_dir: str = None,
+    timings: StageTimings = None,
+    logger: MlflowLogger = None
 ) -> dict:
     """
     Trains and evaluates models using cross-validation and test set metrics,
     logging all results to MLflow. Can be limited to a single selected model.
+    Fits run in parallel through sweep.run_sweep (n_workers processes); with
+    refit=False the CV fold pipelines are reused instead of a full refit.
+    With fold_cache_dir set, each fold is preprocessed and resampled once and
+    shared by all models. Per-stage durations are logged on each model run
+    and accumulated into `timings`. Tracking goes through `logger` (buffered,
+    models written in the background); without one, a private logger is
+    closed before returning.
     """
+    timings = timings if timings is not None else StageTimings()
+    owns_logger = logger is None
+    logger = logger if logger is not None else MlflowLogger()
     all_models = get_models()
     results = {}
     
@@ -42,61 +86,199 @@ def train_and_evaluate_models(
         models_to_train = all_models
 
     # Log parameters common to all runs (outside the model loop)
-    mlflow.log_param("test_size", 0.2)
-    mlflow.log_param("random_state", RANDOM_STATE)
-    mlflow.log_param("resampling_method", "SMOTE")
-    mlflow.log_param("numerical_scaling", "StandardScaler")
-    mlflow.log_param("categorical_encoding", "OneHotEncoder")
+    logger.log_params({
+        "test_size": 0.2,
+        "random_state": RANDOM_STATE,
+        **sampler_params(),
+        "numerical_scaling": "StandardScaler",
+        "categorical_encoding": "OneHotEncoder",
+    })
     
-    for name, model in models_to_train.items():
-        with mlflow.start_run(run_name=name, nested=True) as run:
+    # 1-3. Fit every (model, fold) cell plus the full-training-set fits as one
+    # parallel task graph; results come back here for logging.
+    fold_cache = FoldCache(fold_cache_dir) if fold_cache_dir else None
+    sweep_results = run_sweep(
+        models_to_train, preprocessor, X_train, y_train, X_test,
+        n_workers=n_workers, refit=refit, fold_cache=fold_cache, timings=timings
+    )
+
+    for name, sweep_result in sweep_results.items():
+        with logger.run(name):
             print(f"\n--- {name} ---")
-            
-            # 1. Setup Pipeline with Preprocessor and SMOTE
-            pipeline = create_pipeline(name, model, preprocessor)
-            
+            pipeline = sweep_result["pipeline"]
+
             # 2. K-Fold Cross-Validation on Training Set
-            cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=RANDOM_STATE)
-            cv_scores = cross_val_score(pipeline, X_train, y_train, cv=cv, scoring='f1', n_jobs=-1)
-            cv_mean_f1 = np.mean(cv_scores)
+            cv_mean_f1 = np.mean(sweep_result["cv_scores"])
             print(f"5-Fold CV F1-Score (Train): {cv_mean_f1:.4f}")
-            mlflow.log_metric("cv_mean_f1_score", cv_mean_f1)
-            
-            # 3. Train on full training set
-            pipeline.fit(X_train, y_train)
-            
-            # 4. Predict on Test Set
-            y_pred = pipeline.predict(X_test)
-            
-            # Determine probability for ROC AUC calculation
-            if hasattr(pipeline.named_steps['classifier'], "predict_proba"):
-                y_prob = pipeline.predict_proba(X_test)[:, 1]
-            # SVC is trained with probability=True in model_pipeline.py
-            else: 
-                y_prob = pipeline.predict_proba(X_test)[:, 1] 
-
-            # 5. Calculate Metrics
-            metrics = get_metrics(y_test, y_pred, y_prob)
+            logger.log_metric("cv_mean_f1_score", cv_mean_f1)
+            logger.log_metric("fit_seconds_total", sweep_result["fit_seconds"])
+            logger.log_metrics({f"time_{stage}_s": seconds for stage, seconds in sweep_result["stage_seconds"].items()})
+            logger.log_metric("worker_peak_rss_mb", sweep_result["worker_peak_rss_mb"])
+            logger.log_param("refit_on_full_train", refit)
+
+            # 4-5. Test-set probabilities were computed in the worker; every
+            # threshold-dependent metric is derived from that one vector
+            with timings.stage('evaluate'):
+                metrics = evaluate_probabilities(y_test, sweep_result["y_prob"])
             results[name] = metrics
-            
-            for metric_name, value in metrics.items():
-                mlflow.log_metric(f"test_{metric_name.lower().replace(' ', '_')}", value)
-                print(f"Test {metric_name}: {value:.4f}")
+            _log_test_metrics(logger, metrics, y_test, sweep_result["y_prob"])
 
-            # 6. Log Model and Feature Importance
-            mlflow.sklearn.log_model(pipeline, "model")
+            # 6. Log Model and Feature Importance (the model is serialised by
+            # the logger's writer thread; this only queues it)
+            with timings.stage('log_model'):
+                logger.log_model(pipeline, "model")
             
-            importance_df = get_feature_importances(pipeline, name)
+            if isinstance(pipeline, FoldEnsemble):
+                importance_df = pipeline.get_feature_importances(name)
+            else:
+                importance_df = get_feature_importances(pipeline, name)
             if not importance_df.empty:
                 # Log the top 10 feature importances/coefficients
                 top_10 = importance_df.head(10).to_string()
-                mlflow.log_text(top_10, "feature_importance/top_10_features.txt")
-                
+                logger.log_text(top_10, "feature_importance/top_10_features.txt")
+
+            if PERMUTATION_IMPORTANCE:
+                X_test_transformed = None
+                cache_key = sweep_result.get("test_cache_key")
+                if fold_cache is not None and cache_key and fold_cache.contains(cache_key):
+                    X_test_transformed = fold_cache.load(cache_key)['X_test']
+                with timings.stage('permutation_importance'):
+                    permutation_df = permutation_importance(
+                        pipeline, X_test, y_test, X_transformed=X_test_transformed, n_jobs=n_workers or -1
+                    )
+                logger.log_text(permutation_df.to_string(), "feature_importance/permutation_importance.txt")
+
+    if owns_logger:
+        logger.close()
     return results
 
-def compare_results(results: dict):
+def _log_test_metrics(logger: MlflowLogger, metrics: dict, y_test: pd.Series, y_prob: np.ndarray):
+    """
+    Logs test_* metrics, the threshold sweep table and the full threshold
+    curve for the logger's current run.
+    """
+    for metric_name, value in metrics.items():
+        print(f"Test {metric_name}: {value:.4f}")
+    logger.log_metrics({f"test_{metric_name.lower().replace(' ', '_')}": value for metric_name, value in metrics.items()})
+    logger.log_text(threshold_sweep(y_test, y_prob, SWEEP_GRID).to_string(index=False), "evaluation/threshold_sweep.txt")
+    # Full precision/recall curve at every distinct score (the grid above is a readable summary)
+    logger.log_text(threshold_sweep(y_test, y_prob).to_csv(index=False), "evaluation/threshold_curve.csv")
+
+def _early_stopped_xgboost(pipeline, X_train: pd.DataFrame, y_train: pd.Series, max_rounds: int):
+    """
+    Refits a tuned XGBoost pipeline with early stopping on a stratified 10%
+    validation split of the training set, up to `max_rounds` boosting rounds.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.1, random_state=RANDOM_STATE, stratify=y_train
+    )
+    pipeline = clone(pipeline).set_params(
+        classifier__n_estimators=max_rounds,
+        classifier__early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        classifier__n_jobs=None,
+    )
+    # The pipeline refits the same preprocessor on X_fit, so this transform matches.
+    X_val_transformed = clone(pipeline.named_steps['preprocessor']).fit(X_fit, y_fit).transform(X_val)
+    pipeline.fit(X_fit, y_fit, classifier__eval_set=[(X_val_transformed, y_val)], classifier__verbose=False)
+    return pipeline
+
+def tune_models(
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    preprocessor,
+    selected_model_name: str = None,
+    n_workers: int = None,
+    timings: StageTimings = None,
+    logger: MlflowLogger = None
+) -> dict:
+    """
+    Tunes each model family with successive halving (HalvingRandomSearchCV):
+    many random candidates are raced on a small budget (rows or trees) and
+    only the best third survives to each larger rung. Every trial is logged
+    as a nested MLflow run; the winner is evaluated on the test set like
+    train_and_evaluate_models. XGBoost's winner is refit with early stopping.
+    Trials themselves do not early-stop: the rung budget (n_estimators) sets
+    their number of boosting rounds.
+    """
+    timings = timings if timings is not None else StageTimings()
+    owns_logger = logger is None
+    logger = logger if logger is not None else MlflowLogger()
+    search_spaces = get_search_spaces()
+    if selected_model_name and selected_model_name in search_spaces:
+        search_spaces = {selected_model_name: search_spaces[selected_model_name]}
+        print(f"\nStarting tuning for selected model: {selected_model_name}...")
+    elif selected_model_name:
+        print(f"\nError: Model '{selected_model_name}' has no search space. Tuning all models.")
+    else:
+        print("\nStarting tuning for all models...")
+    all_models = get_models()
+    results = {}
+
+    for name, (resource, min_resources, max_resources, distributions) in search_spaces.items():
+        with logger.run(f"Tuning_{name}"):
+            print(f"\n--- Tuning {name} (budget: {resource}) ---")
+            logger.log_params(sampler_params())
+            model = all_models[name]
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=1)  # Parallelism comes from the search itself
+            pipeline = create_pipeline(name, model, clone(preprocessor))
+
+            search = HalvingRandomSearchCV(
+                pipeline, distributions,
+                n_candidates=TUNING_CANDIDATES, factor=TUNING_FACTOR,
+                resource=resource, min_resources=min_resources, max_resources=max_resources,
+                cv=StratifiedKFold(n_splits=5, shuffle=True, random_state=RANDOM_STATE),
+                scoring='f1', refit=True, n_jobs=n_workers or -1, random_state=RANDOM_STATE
+            )
+            search_seconds_before = timings.seconds['tune_search']
+            with timings.stage('tune_search'):
+                search.fit(X_train, y_train)
+            logger.log_metric("time_tune_search_s", timings.seconds['tune_search'] - search_seconds_before)
+
+            # Log every (candidate, rung) trial as its own nested run
+            cv_results = pd.DataFrame(search.cv_results_)
+            param_columns = [c for c in cv_results.columns if c.startswith('param_')]
+            for i, trial in cv_results.iterrows():
+                with logger.run(f"{name}_trial_{i}"):
+                    logger.log_params({c[len('param_'):]: trial[c] for c in param_columns})
+                    logger.log_params({"rung": int(trial['iter']), "n_resources": int(trial['n_resources'])})
+                    logger.log_metrics({
+                        "cv_mean_f1_score": trial['mean_test_score'],
+                        "cv_std_f1_score": trial['std_test_score'],
+                        "mean_fit_time": trial['mean_fit_time'],
+                    })
+
+            print(f"Best CV F1-Score: {search.best_score_:.4f} with {search.best_params_}")
+            logger.log_params({f"best_{k}": v for k, v in search.best_params_.items()})
+            logger.log_metrics({"cv_mean_f1_score": search.best_score_, "n_trials": len(cv_results)})
+
+            best_pipeline = search.best_estimator_
+            if name == "XGBoost":
+                with timings.stage('early_stopping_refit'):
+                    best_pipeline = _early_stopped_xgboost(best_pipeline, X_train, y_train, max_resources)
+                best_iteration = best_pipeline.named_steps['classifier'].best_iteration
+                print(f"Early stopping selected {best_iteration + 1} boosting rounds")
+                logger.log_metric("best_iteration", best_iteration)
+
+            with timings.stage('predict'):
+                y_prob = best_pipeline.predict_proba(X_test)[:, 1]
+            with timings.stage('evaluate'):
+                metrics = evaluate_probabilities(y_test, y_prob)
+            results[name] = metrics
+            _log_test_metrics(logger, metrics, y_test, y_prob)
+            with timings.stage('log_model'):
+                logger.log_model(best_pipeline, "model")
+
+    if owns_logger:
+        logger.close()
+    return results
+
+def compare_results(results: dict, logger: MlflowLogger):
     """
     Compiles and compares all model results, identifying the best model by Recall.
+    The comparison is logged to the logger's current run.
     """
     results_df = pd.DataFrame(results).T
     print("\nFinal Model Comparison:")
@@ -105,10 +287,10 @@ def compare_results(results: dict):
     # Identify best model based on Recall (Sensitivity)
     best_model = results_df['Recall'].idxmax()
     print(f"\nBased on Recall (Sensitivity), the best model is: {best_model}")
-    mlflow.log_text(f"Best model based on Recall: {best_model}", "model_comparison/best_model.txt")
+    logger.log_text(f"Best model based on Recall: {best_model}", "model_comparison/best_model.txt")
     
     # Log the final comparison table
-    mlflow.log_text(results_df.to_string(), "model_comparison/all_metrics.txt")
+    logger.log_text(results_df.to_string(), "model_comparison/all_metrics.txt")
 
 
 if __name__ == '__main__':
@@ -117,37 +299,65 @@ if __name__ == '__main__':
     
     # --- User Configuration ---
     # To run only a specific model, change 'None' to one of the model names:
-    # "Logistic Regression", "Random Forest", "XGBoost", or "SVC"
+    # "Logistic Regression", "Random Forest", "XGBoost", "SVC", or "Nystroem SVM"
     MODEL_TO_RUN = "Logistic Regression" 
     # MODEL_TO_RUN = None # To run all models (default)
     
-    with mlflow.start_run(run_name="Overall_Training_Run") as main_run:
+    timings = StageTimings()
+    with mlflow.start_run(run_name="Overall_Training_Run") as main_run, profiled("train", enabled=PROFILE):
+        logger = MlflowLogger()
         try:
-            # 1. Load Data
-            df = load_data(DATA_FILE)
-            if df.empty:
-                raise RuntimeError("Data loading failed.")
-            
-            # 2. Split Data
-            X_train, X_test, y_train, y_test = split_data(df, TARGET_COLUMN)
+            if DATA_SOURCE == 'warehouse':
+                # 1-2. Stream and split directly from the warehouse table
+                with timings.stage('load_data'):
+                    X_train, X_test, y_train, y_test = split_warehouse_data(WAREHOUSE_URL, TARGET_COLUMN)
+            else:
+                # 1. Load Data
+                with timings.stage('load_data'):
+                    df = load_data(DATA_FILE, cache_dir=DATA_CACHE_DIR)
+                if df.empty:
+                    raise RuntimeError("Data loading failed.")
+
+                # 2. Split Data
+                with timings.stage('split_data'):
+                    X_train, X_test, y_train, y_test = split_data(df, TARGET_COLUMN)
+            logger.log_param("data_source", DATA_SOURCE)
         
             # 3. Create Preprocessor
             preprocessor = create_preprocessor()
         
             # 4. Train and Evaluate only the selected model (or all if None)
-            all_results = train_and_evaluate_models(
-            X_train, X_test, y_train, y_test, preprocessor, selected_model_name=MODEL_TO_RUN
-        )
+            if TUNE:
+                all_results = tune_models(
+                    X_train, X_test, y_train, y_test, preprocessor,
+                    selected_model_name=MODEL_TO_RUN, n_workers=N_WORKERS, timings=timings, logger=logger
+                )
+            else:
+                all_results = train_and_evaluate_models(
+                X_train, X_test, y_train, y_test, preprocessor, selected_model_name=MODEL_TO_RUN,
+                n_workers=N_WORKERS, refit=REFIT_ON_FULL_TRAIN, fold_cache_dir=FOLD_CACHE_DIR,
+                timings=timings, logger=logger
+            )
 
             # 5. Final Comparison (Logged in a final, separate run for overview)
             # This summary run will only include results from the model(s) that were trained.
             if all_results:
-                with mlflow.start_run(run_name="Comparison_Summary", nested=True):
-                    compare_results(all_results)
+                with logger.run("Comparison_Summary"):
+                    compare_results(all_results, logger)
             else:
                 print("No models were successfully trained or evaluated.")
+
+            # 6. Barrier: wait for every queued MLflow write (models included)
+            with timings.stage('mlflow_flush'):
+                logger.close()
+
+            # 7. Per-stage durations and peak RSS for the whole run
+            print(f"\n{timings.summary()}")
+            timings.log_to_mlflow()
              
         except Exception as e:
             mlflow.log_param("status", "Failed")
             mlflow.log_param("error_message", str(e))
-            print(f"An error occurred: {e}")
\ No newline at end of file
+            print(f"An error occurred: {e}")
+        finally:
+            logger.close()
\ No newline at end of file